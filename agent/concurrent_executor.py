@@ -0,0 +1,62 @@
+import asyncio
+import contextvars
+import logging
+import os
+from typing import Any, Optional
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+
+from agent.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Semaphore bounding the tool calls of the agent step being executed
+_step_limit: contextvars.ContextVar = contextvars.ContextVar("tool_step_limit", default=None)
+
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose async step runs the tool calls of one LLM turn
+    concurrently, at most `max_concurrency` at a time.
+
+    Observations are returned in the order the model requested the calls, and
+    a call that raises becomes an error observation instead of failing the
+    step, so the other calls of the turn still complete.
+    """
+
+    max_concurrency: int = 4
+
+    async def _aiter_next_step(self, *args: Any, **kwargs: Any):
+        # The base step gathers one _aperform_agent_action task per tool call;
+        # the tasks copy this context and so share the step's semaphore
+        token = _step_limit.set(asyncio.Semaphore(max(self.max_concurrency, 1)))
+        try:
+            async for item in super()._aiter_next_step(*args, **kwargs):
+                yield item
+        finally:
+            try:
+                _step_limit.reset(token)
+            except ValueError:
+                # Step closed from another context, which never saw the semaphore
+                pass
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action: AgentAction,
+                                     run_manager: Optional[Any] = None) -> AgentStep:
+        limit = _step_limit.get()
+        try:
+            if limit is None:
+                return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+            async with limit:
+                return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        except Exception as e:
+            logger.error(f"Tool {agent_action.tool} failed: {str(e)}")
+            return AgentStep(
+                action=agent_action,
+                observation=dumps({"error": f"Tool {agent_action.tool} failed: {str(e)}"})
+            )
+
+
+def tool_call_concurrency() -> int:
+    """Maximum tool calls run at once within one agent step"""
+    return int(os.getenv("TOOL_CALL_CONCURRENCY", "4"))
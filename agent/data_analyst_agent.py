@@ -1,30 +1,82 @@
+import asyncio
 import os
 import json
 import base64
 import io
 import logging
-from typing import Any, Dict, List, Union
-from langchain.agents import AgentExecutor, create_openai_tools_agent
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Dict, List, Union
+from langchain.agents import create_openai_tools_agent
 from langchain.prompts import ChatPromptTemplate
 from langchain_openai import AzureChatOpenAI
 from langchain.tools import Tool
-from agent.tools.data_tools import DataTools
-from agent.tools.visualization_tools import VisualizationTools
-from agent.tools.web_scraping_tools import WebScrapingTools
+import agent.tools as tool_classes
+from agent.concurrent_executor import ConcurrentAgentExecutor, tool_call_concurrency
+from agent.datasets import end_run, start_run
+from agent.executors import CPU, IO, ToolExecutors
+from agent.output_budget import current_budget, end_budget, start_budget
+from agent.serialization import dumps, loads
+from agent.tools.table_catalog import end_catalog, start_catalog
+from agent.llm_cache import create_llm_cache
+
+# Tool objects by attribute name; their classes (and pandas, matplotlib and
+# BeautifulSoup with them) are imported the first time a tool is used
+TOOLSETS = {
+    "data_tools": "DataTools",
+    "viz_tools": "VisualizationTools",
+    "web_tools": "WebScrapingTools",
+}
 
 class DataAnalystAgent:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Setting up Data Analyst Agent components...")
         
+        self._toolsets = {}
+        self._toolsets_lock = threading.Lock()
         self.llm = self._setup_llm()
-        self.data_tools = DataTools()
-        self.viz_tools = VisualizationTools()
-        self.web_tools = WebScrapingTools()
+        self.executors = ToolExecutors()
         self.agent_executor = self._setup_agent()
         
         self.logger.info("Data Analyst Agent setup completed")
     
+    @property
+    def data_tools(self):
+        return self._get_toolset("data_tools")
+    
+    @property
+    def viz_tools(self):
+        return self._get_toolset("viz_tools")
+    
+    @property
+    def web_tools(self):
+        return self._get_toolset("web_tools")
+    
+    def _get_toolset(self, name: str):
+        """Import and construct a tool class on first use"""
+        with self._toolsets_lock:
+            if name not in self._toolsets:
+                self.logger.info(f"Loading {TOOLSETS[name]}...")
+                self._toolsets[name] = getattr(tool_classes, TOOLSETS[name])()
+            return self._toolsets[name]
+    
+    def _lazy_tool(self, toolset: str, method: str):
+        """Return a function that calls a tool method, loading its tool class on first call"""
+        def call(*args, **kwargs):
+            return getattr(self._get_toolset(toolset), method)(*args, **kwargs)
+        call.__name__ = method
+        return call
+    
+    def _lazy_async_tool(self, toolset: str, method: str):
+        """Async counterpart of _lazy_tool; the tool class is loaded off the event loop"""
+        async def call(*args, **kwargs):
+            tools = await asyncio.to_thread(self._get_toolset, toolset)
+            return await getattr(tools, method)(*args, **kwargs)
+        call.__name__ = method
+        return call
+    
     def _setup_llm(self) -> AzureChatOpenAI:
         """Initialize Azure OpenAI LLM"""
         self.logger.info("Setting up Azure OpenAI LLM...")
@@ -35,49 +87,135 @@ class DataAnalystAgent:
         self.logger.info(f"Azure endpoint: {endpoint}")
         self.logger.info(f"Deployment name: {deployment}")
         
+        self.llm_cache = create_llm_cache()
+        if self.llm_cache is not None:
+            self.logger.info(f"LLM completion cache enabled at {self.llm_cache.path}")
+        
         return AzureChatOpenAI(
             azure_endpoint=endpoint,
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2023-12-01-preview"),
             deployment_name=deployment,
             temperature=0.1,
-            max_tokens=4000
+            max_tokens=4000,
+            cache=self.llm_cache,
+            # Streamed calls bypass LangChain's cache, so route through generate when caching
+            disable_streaming=self.llm_cache is not None
         )
     
-    def _setup_agent(self) -> AgentExecutor:
+    def _make_tool(self, name: str, description: str, func, category: str, coroutine=None) -> Tool:
+        """Create a tool whose async variant is `coroutine`, or func run on the executor pool for its category"""
+        def budget(output):
+            # Compact oversized outputs before they are added to the agent scratchpad
+            run_budget = current_budget()
+            return run_budget.apply(name, output) if run_budget is not None else output
+        
+        def budgeted(*args, **kwargs):
+            return budget(func(*args, **kwargs))
+        budgeted.__name__ = name
+        
+        if coroutine is not None:
+            async def abudgeted(*args, **kwargs):
+                output = await coroutine(*args, **kwargs)
+                return await asyncio.to_thread(budget, output)
+            abudgeted.__name__ = name
+        else:
+            abudgeted = self.executors.wrap(budgeted, category)
+        
+        return Tool(
+            name=name,
+            description=description,
+            func=budgeted,
+            coroutine=abudgeted
+        )
+    
+    def _read_artifact(self, artifact_input: str) -> str:
+        """Read part of a tool output that was too large to show in full"""
+        budget = current_budget()
+        if budget is None:
+            return dumps({"error": "No artifacts outside an analysis run"})
+        try:
+            request = loads(artifact_input)
+        except json.JSONDecodeError:
+            request = artifact_input
+        if not isinstance(request, dict):
+            # A bare handle, possibly as a JSON string
+            request = {"artifact": request if isinstance(request, str) else artifact_input}
+        return budget.read(
+            str(request.get("artifact", "")),
+            offset=int(request.get("offset", 0)),
+            max_chars=int(request.get("max_chars", 4000))
+        )
+    
+    def _setup_agent(self) -> ConcurrentAgentExecutor:
         """Setup LangChain agent with tools"""
         self.logger.info("Setting up LangChain agent with tools...")
         
         tools = [
-            Tool(
+            self._make_tool(
                 name="scrape_wikipedia",
-                description="Scrape data from Wikipedia URLs. Input should be a Wikipedia URL.",
-                func=self.web_tools.scrape_wikipedia
+                description="Scrape a table from a Wikipedia URL. Input should be a Wikipedia URL (the first table with data), or JSON with url and either table (index from list_tables) or match (text the column names must contain, e.g. [\"Gross\", \"Year\"]). Returns a dataset handle with the table's columns, row count and a few preview rows.",
+                func=self._lazy_tool("web_tools", "scrape_wikipedia"),
+                category=IO,
+                coroutine=self._lazy_async_tool("web_tools", "ascrape_wikipedia")
             ),
-            Tool(
+            self._make_tool(
                 name="scrape_web",
-                description="Scrape data from any web URL. Input should be a URL.",
-                func=self.web_tools.scrape_web
+                description="Scrape data from any web URL, including CSV, JSON, Parquet and Excel files, which are read directly as tables. Input should be a URL, or JSON with url and table or match as for scrape_wikipedia, or url and \"text\": true for the page text. Tables are returned as a dataset handle with columns, row count and preview rows.",
+                func=self._lazy_tool("web_tools", "scrape_web"),
+                category=IO,
+                coroutine=self._lazy_async_tool("web_tools", "ascrape_web")
             ),
-            Tool(
+            self._make_tool(
+                name="scrape_many",
+                description="Scrape several pages in one call, fetched concurrently. Input should be a JSON list of URLs or of objects with url and optional table, match or text as for scrape_wikipedia and scrape_web (Wikipedia pages use only wikitables). Returns one result per page, in order: a dataset handle, page text or an error.",
+                func=self._lazy_tool("web_tools", "scrape_many"),
+                category=IO,
+                coroutine=self._lazy_async_tool("web_tools", "ascrape_many")
+            ),
+            self._make_tool(
+                name="list_tables",
+                description="List every table of a web page with its index, caption, section heading, shape and column names. Input should be a URL. Pages are parsed once, so scraping another of their tables afterwards costs no download.",
+                func=self._lazy_tool("web_tools", "list_tables"),
+                category=IO,
+                coroutine=self._lazy_async_tool("web_tools", "alist_tables")
+            ),
+            self._make_tool(
                 name="query_duckdb",
-                description="Execute SQL queries on DuckDB. Input should be a SQL query string.",
-                func=self.data_tools.query_duckdb
+                description="Execute SQL queries on DuckDB. read_parquet works on local files and on s3:// or https:// URLs, with globs and hive partitions (year=*/...) on S3; filter on partition columns so only the needed files are read. Input should be a SQL query string; datasets can be queried as tables by handle (e.g. SELECT * FROM ds_1). Returns a new dataset handle with the result rows as preview.",
+                func=self._lazy_tool("data_tools", "query_duckdb"),
+                category=CPU,
+                coroutine=self._lazy_async_tool("data_tools", "aquery_duckdb")
             ),
-            Tool(
+            self._make_tool(
                 name="analyze_data",
-                description="Perform statistical analysis on data. Input should be a JSON string with data and analysis type.",
-                func=self.data_tools.analyze_data
+                description="Perform statistical analysis on data. Input should be a JSON string with a dataset handle (and optional columns), inline data as rows or as columns ({\"col\": [...]}), or a CSV/Parquet/Arrow file path (\"path\"), and the analysis type.",
+                func=self._lazy_tool("data_tools", "analyze_data"),
+                category=CPU
+            ),
+            self._make_tool(
+                name="query_dataset",
+                description="Filter, sort and select columns of a dataset. Input should be JSON with dataset, and optional filter (pandas query expression), columns, sort_by, ascending and limit. Returns a new dataset handle with the matching rows as preview.",
+                func=self._lazy_tool("data_tools", "query_dataset"),
+                category=CPU
             ),
-            Tool(
+            self._make_tool(
                 name="create_plot",
-                description="Create visualizations. Input should be a JSON string with plot type, data, and parameters.",
-                func=self.viz_tools.create_plot
+                description="Create visualizations. Input should be a JSON string with plot type, a dataset handle or inline data, and parameters.",
+                func=self._lazy_tool("viz_tools", "create_plot"),
+                category=CPU
             ),
-            Tool(
+            self._make_tool(
                 name="create_scatterplot",
-                description="Create scatterplot with regression line. Input should be JSON with x_data, y_data, title, labels.",
-                func=self.viz_tools.create_scatterplot
+                description="Create scatterplot with regression line. Input should be JSON with either dataset, x_column and y_column or x_data and y_data, plus title and labels.",
+                func=self._lazy_tool("viz_tools", "create_scatterplot"),
+                category=CPU
+            ),
+            self._make_tool(
+                name="read_artifact",
+                description="Read more of a truncated tool output. Input should be JSON with artifact (e.g. \"artifact://1\"), and optional offset and max_chars.",
+                func=self._read_artifact,
+                category=CPU
             )
         ]
         
@@ -94,7 +232,13 @@ When answering questions:
 - If multiple questions are asked, provide answers as a JSON array
 - If a single question with multiple parts is asked, provide a JSON object
 - For plots, return base64-encoded data URIs under 100,000 bytes
+- Large tool outputs are shortened and images are replaced by references like "artifact://1": put the reference in your final answer where the image or value belongs and it will be replaced with the full value
 - Be precise with numerical answers
+- When the question needs data from several pages, scrape them with a single scrape_many call instead of one call per page
+- When a page has several tables, use list_tables and then scrape the one you need by index or column match instead of re-scraping the page
+- For large files and SQL questions, aggregate in DuckDB (query_duckdb) and fetch only the rows you need
+- Scraped tables are kept on the server: pass their dataset handle (e.g. "ds_1") to other tools instead of copying rows, and use query_dataset to look at specific rows
+- Scraped columns are already typed: currency, thousands separators, footnotes and magnitudes like "bn" are parsed into numbers and dates are parsed (see "type_inference" in the scrape result), so compare and filter them as numbers
 - Always validate your data sources and calculations
 
 Use the available tools to:
@@ -112,35 +256,144 @@ Use the available tools to:
         
         self.logger.info(f"Agent created with {len(tools)} tools")
         
-        return AgentExecutor(agent=agent, tools=tools, verbose=True, max_iterations=10)
+        # Tool calls the model makes in the same turn run concurrently
+        return ConcurrentAgentExecutor(
+            agent=agent,
+            tools=tools,
+            verbose=True,
+            max_iterations=10,
+            max_concurrency=tool_call_concurrency()
+        )
     
     async def analyze(self, question: str) -> Union[List, Dict]:
         """Main analysis method that processes the question and returns results"""
         self.logger.info(f"Starting analysis for question: {question[:100]}...")
         
+        # Datasets registered by tools during this run are dropped when it ends
+        registry_token = start_run()
+        catalog_token = start_catalog()
+        budget_token = start_budget()
         try:
             # Run the agent
             self.logger.info("Invoking LangChain agent executor...")
             result = await self.agent_executor.ainvoke({"input": question})
             
             self.logger.info(f"Agent execution completed. Result keys: {list(result.keys())}")
+            self._log_token_report()
             
-            # Parse the output - try to extract JSON if present
-            output = result["output"]
-            self.logger.info(f"Raw output length: {len(output)} characters")
-            self.logger.info(f"Raw output preview: {output[:200]}...")
+            return current_budget().resolve(self._parse_output(result["output"]))
             
-            # Try to parse as JSON
-            try:
-                parsed_result = json.loads(output)
-                self.logger.info(f"Successfully parsed output as JSON: {type(parsed_result)}")
-                return parsed_result
-            except json.JSONDecodeError as jde:
-                self.logger.warning(f"Failed to parse output as JSON: {str(jde)}")
-                # If not valid JSON, return as string
-                return {"result": output}
-                
         except Exception as e:
             self.logger.error(f"Analysis failed with exception: {str(e)}")
             self.logger.exception("Full exception traceback:")
-            return {"error": f"Analysis failed: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Analysis failed: {str(e)}"}
+        finally:
+            end_budget(budget_token)
+            end_catalog(catalog_token)
+            end_run(registry_token)
+    
+    async def astream_analyze(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream progress events for an analysis: LLM calls, tool calls with timings, partial answer text and the final result"""
+        self.logger.info(f"Starting streamed analysis for question: {question[:100]}...")
+        
+        started = {}
+        pending_inputs = defaultdict(deque)
+        llm_calls = 0
+        
+        registry_token = start_run()
+        catalog_token = start_catalog()
+        budget_token = start_budget()
+        try:
+            async for event in self.agent_executor.astream_events({"input": question}, version="v2"):
+                kind = event["event"]
+                run_id = event["run_id"]
+                data = event.get("data", {})
+                
+                if kind == "on_chat_model_start":
+                    llm_calls += 1
+                    started[run_id] = (time.time(), llm_calls)
+                    yield {"type": "llm_start", "call": llm_calls}
+                
+                elif kind == "on_chat_model_stream":
+                    text = getattr(data.get("chunk"), "content", "")
+                    if text:
+                        yield {"type": "token", "text": text}
+                
+                elif kind == "on_chat_model_end":
+                    start, call = started.pop(run_id, (time.time(), llm_calls))
+                    tool_calls = getattr(data.get("output"), "tool_calls", None) or []
+                    yield {
+                        "type": "llm_end",
+                        "call": call,
+                        "duration_s": round(time.time() - start, 3),
+                        "tool_calls": [tool_call["name"] for tool_call in tool_calls]
+                    }
+                
+                elif kind == "on_chain_stream" and not event.get("parent_ids"):
+                    # Tool start events carry no input; take it from the executor's planned actions
+                    for action in data.get("chunk", {}).get("actions", []):
+                        pending_inputs[action.tool].append(action.tool_input)
+                
+                elif kind == "on_tool_start":
+                    started[run_id] = time.time()
+                    queued = pending_inputs[event["name"]]
+                    tool_input = queued.popleft() if queued else data.get("input")
+                    yield {"type": "tool_start", "tool": event["name"], "input": self._preview(tool_input)}
+                
+                elif kind == "on_tool_end":
+                    start = started.pop(run_id, time.time())
+                    yield {
+                        "type": "tool_end",
+                        "tool": event["name"],
+                        "duration_s": round(time.time() - start, 3),
+                        "output": self._preview(data.get("output"))
+                    }
+                
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    output = data["output"]["output"]
+                    self.logger.info(f"Streamed analysis completed after {llm_calls} LLM calls")
+                    report = self._log_token_report()
+                    yield {
+                        "type": "final",
+                        "result": current_budget().resolve(self._parse_output(output)),
+                        "tool_output_tokens": {key: value for key, value in report.items() if key != "calls"}
+                    }
+        
+        except Exception as e:
+            self.logger.error(f"Streamed analysis failed with exception: {str(e)}")
+            self.logger.exception("Full exception traceback:")
+            yield {"type": "error", "error": f"Analysis failed: {str(e)}"}
+        finally:
+            end_budget(budget_token)
+            end_catalog(catalog_token)
+            end_run(registry_token)
+    
+    def _parse_output(self, output: str) -> Union[List, Dict]:
+        """Parse the agent's final output, extracting JSON if present"""
+        self.logger.info(f"Raw output length: {len(output)} characters")
+        self.logger.info(f"Raw output preview: {output[:200]}...")
+        
+        # Try to parse as JSON
+        try:
+            parsed_result = loads(output)
+            self.logger.info(f"Successfully parsed output as JSON: {type(parsed_result)}")
+            return parsed_result
+        except json.JSONDecodeError as jde:
+            self.logger.warning(f"Failed to parse output as JSON: {str(jde)}")
+            # If not valid JSON, return as string
+            return {"result": output}
+    
+    def _log_token_report(self) -> Dict[str, Any]:
+        """Log how many tool output tokens the run sent to the LLM, and how many compaction saved"""
+        report = current_budget().report()
+        self.logger.info(
+            f"Tool outputs: {report['tool_calls']} calls, {report['tokens']} tokens sent "
+            f"({report['original_tokens']} before compaction, {report['tokens_saved']} saved)"
+        )
+        return report
+    
+    @staticmethod
+    def _preview(value: Any, limit: int = 2000) -> str:
+        """Truncate a tool input or output for progress events"""
+        text = value if isinstance(value, str) else str(value)
+        return text if len(text) <= limit else text[:limit] + f"... [{len(text) - limit} more characters]"
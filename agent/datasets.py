@@ -0,0 +1,218 @@
+import base64
+import contextvars
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from agent.serialization import dumps, loads, records
+
+if TYPE_CHECKING:
+    # Only for annotations: importing the registry must not pull in pandas
+    import pandas as pd
+    import pyarrow as pa
+
+_ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+
+class DatasetRegistry:
+    """
+    Server-side store of DataFrames for one analysis run.
+
+    Tools register the tables they produce and hand the LLM a short handle
+    plus the schema and a few preview rows; later tools look the full
+    DataFrame up by handle instead of receiving rows back as JSON.
+    """
+
+    def __init__(self, max_datasets: int = None, preview_rows: int = None):
+        self.max_datasets = max_datasets or int(os.getenv("DATASET_REGISTRY_MAX", "50"))
+        self.preview_rows = preview_rows or int(os.getenv("DATASET_PREVIEW_ROWS", "5"))
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, df: "pd.DataFrame", prefix: str = "ds") -> str:
+        """Store a DataFrame and return its handle"""
+        with self._lock:
+            handle = f"{prefix}_{next(self._counter)}"
+            self._frames[handle] = df
+            while len(self._frames) > self.max_datasets:
+                self._frames.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> "pd.DataFrame":
+        with self._lock:
+            df = self._frames.get(handle)
+            available = list(self._frames)
+        if df is None:
+            raise LookupError(f"Unknown dataset '{handle}'. Available datasets: {', '.join(available) or 'none'}")
+        return df
+
+    def select(self, handle: str, columns: Optional[List[str]] = None) -> "pd.DataFrame":
+        """Look up a dataset, optionally restricted to some columns"""
+        df = self.get(handle)
+        if columns:
+            missing = [column for column in columns if column not in df.columns]
+            if missing:
+                raise LookupError(f"Columns not found in dataset '{handle}': {missing}. Available: {list(df.columns)}")
+            df = df[columns]
+        return df
+
+    def describe(self, handle: str, preview_rows: int = None) -> Dict[str, Any]:
+        """Schema, row count and a few preview rows of a dataset, for the LLM"""
+        df = self.get(handle)
+        rows = self.preview_rows if preview_rows is None else preview_rows
+        return {
+            "dataset": handle,
+            "row_count": int(len(df)),
+            "columns": [{"name": str(name), "dtype": str(dtype)} for name, dtype in df.dtypes.items()],
+            "preview": preview_records(df, rows),
+        }
+
+    def handles(self) -> List[str]:
+        with self._lock:
+            return list(self._frames)
+
+
+def preview_records(df: "pd.DataFrame", rows: int) -> List[Dict[str, Any]]:
+    """First rows of a DataFrame as JSON-safe records (NaN becomes null), floats exact"""
+    return loads(dumps(records(df.head(rows))))
+
+
+def frame_from_input(input_data: Dict[str, Any]) -> "pd.DataFrame":
+    """
+    Build a tool's input DataFrame from a dataset handle, inline data (a list
+    of rows or a dict of columns), a base64 Arrow IPC buffer ("arrow") or a
+    CSV, JSON, Parquet or Arrow file ("path"), optionally restricted to "columns"
+    """
+    if input_data.get("dataset"):
+        return current_registry().select(input_data["dataset"], input_data.get("columns"))
+    if input_data.get("arrow"):
+        df = to_frame(base64.b64decode(input_data["arrow"]))
+    elif input_data.get("path"):
+        df = frame_from_path(input_data["path"])
+    else:
+        df = to_frame(input_data.get("data", []))
+    columns = input_data.get("columns")
+    if columns:
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise LookupError(f"Columns not found in data: {missing}. Available: {list(df.columns)}")
+        df = df[columns]
+    return df
+
+
+def to_frame(data: Any) -> "pd.DataFrame":
+    """
+    A DataFrame from rows (list of dicts), columns (dict of arrays), an Arrow
+    table or IPC buffer, or a file path, copying as little as the source allows
+    """
+    import pandas as pd
+
+    if isinstance(data, pd.DataFrame):
+        return data
+    if isinstance(data, (str, os.PathLike)):
+        return frame_from_path(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return arrow_to_frame(read_arrow_ipc(data))
+    if hasattr(data, "to_pandas") and hasattr(data, "schema"):
+        return arrow_to_frame(data)
+    # Columns become arrays directly; rows need every key looked up per row
+    return pd.DataFrame(data)
+
+
+def frame_from_path(path: Union[str, os.PathLike]) -> "pd.DataFrame":
+    """Read a CSV, TSV, JSON (lines), Parquet, Excel or Arrow IPC file; Arrow files are memory-mapped"""
+    from agent.tools.structured_files import read_tables, sniff_format
+
+    path = os.fspath(path)
+    if path.lower().endswith(_ARROW_EXTENSIONS):
+        import pyarrow as pa
+        return arrow_to_frame(read_arrow_ipc(pa.memory_map(path)))
+    file_format = sniff_format(path, None, _head(path))
+    if file_format is None:
+        raise ValueError(f"Unsupported file type: {path}")
+    return read_tables(path, file_format)[0][1]
+
+
+def read_arrow_ipc(source) -> "pa.Table":
+    """An Arrow table from an IPC buffer or memory map, in the file or the stream format"""
+    import pyarrow as pa
+
+    buffer = source if isinstance(source, pa.MemoryMappedFile) else pa.BufferReader(pa.py_buffer(source))
+    magic = buffer.read(6)
+    buffer.seek(0)
+    if magic == b"ARROW1":
+        return pa.ipc.open_file(buffer).read_all()
+    return pa.ipc.open_stream(buffer).read_all()
+
+
+def arrow_to_frame(table) -> "pd.DataFrame":
+    """
+    Convert an Arrow table or record batch to pandas, one block per column so
+    numeric columns without nulls are not copied. Decimals become numbers
+    instead of Python Decimal objects: integers (e.g. DuckDB's SUM of an
+    integer column) stay exact as int64, or nullable Int64 when they have
+    nulls, and decimals with a scale (or too large for int64) become floats.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    fields, nullable = [], []
+    for position, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            column = table.column(position)
+            if field.type.scale == 0 and _fits_int64(column):
+                field = pa.field(field.name, pa.int64())
+                if column.null_count:
+                    nullable.append(position)
+            else:
+                field = pa.field(field.name, pa.float64())
+        fields.append(field)
+    if fields == list(table.schema):
+        return table.to_pandas(split_blocks=True)
+    table = table.cast(pa.schema(fields))
+    df = table.to_pandas(split_blocks=True)
+    for position in nullable:
+        # to_pandas would turn integers with nulls into floats
+        df.isetitem(position, table.column(position).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get))
+    return df
+
+
+def _fits_int64(column) -> bool:
+    if column.type.precision <= 18:
+        return True
+    import pyarrow.compute as pc
+
+    bounds = pc.min_max(column)
+    low, high = bounds["min"].as_py(), bounds["max"].as_py()
+    return low is None or (-2 ** 63 <= low and high < 2 ** 63)
+
+
+def _head(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read(4)
+
+
+_current_registry: contextvars.ContextVar = contextvars.ContextVar("dataset_registry", default=None)
+_default_registry = DatasetRegistry()
+
+
+def current_registry() -> DatasetRegistry:
+    """Registry of the running analysis, or a process-wide one when tools are called directly"""
+    return _current_registry.get() or _default_registry
+
+
+def start_run() -> contextvars.Token:
+    """Give the current context (one analysis run) a fresh registry"""
+    return _current_registry.set(DatasetRegistry())
+
+
+def end_run(token: contextvars.Token):
+    """Drop the run's registry, releasing its DataFrames"""
+    try:
+        _current_registry.reset(token)
+    except ValueError:
+        # A streamed run closed from another context; that context already discarded the registry
+        pass
@@ -0,0 +1,46 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+# Tool categories, each backed by its own bounded pool
+IO = "io"
+CPU = "cpu"
+
+
+class ToolExecutors:
+    """Bounded per-category pools that keep blocking tool work off the event loop"""
+
+    def __init__(self, io_workers: int = None, cpu_workers: int = None):
+        self.logger = logging.getLogger(__name__)
+
+        io_workers = io_workers or int(os.getenv("TOOL_IO_WORKERS", "8"))
+        cpu_workers = cpu_workers or int(os.getenv("TOOL_CPU_WORKERS", str(os.cpu_count() or 2)))
+
+        # Scraping waits on sockets; pandas and matplotlib work is CPU bound
+        self.pools = {
+            IO: ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="tool-io"),
+            CPU: ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="tool-cpu"),
+        }
+        self.logger.info(f"Tool executors ready (io={io_workers}, cpu={cpu_workers})")
+
+    def wrap(self, func: Callable[..., Any], category: str) -> Callable[..., Awaitable[Any]]:
+        """Return a coroutine function that runs func on the pool for its category"""
+        pool = self.pools[category]
+
+        @functools.wraps(func)
+        async def run(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            # Carry context variables (e.g. per-request state) into the worker thread
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, func, *args, **kwargs)
+            return await loop.run_in_executor(pool, call)
+
+        return run
+
+    def shutdown(self, wait: bool = True):
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
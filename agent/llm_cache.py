@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+
+# Per-run message fields that differ between otherwise identical conversations
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """Drop run-specific message IDs and metadata from a serialized message list"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    for message in messages:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for field in _VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(field, None)
+    return json.dumps(messages, sort_keys=True)
+
+
+class TieredLLMCache(BaseCache):
+    """
+    Completion cache with an in-memory LRU tier in front of a SQLite tier.
+
+    LangChain passes the serialized message list as `prompt` and a string of the
+    model parameters as `llm_string`; for a tool-bound AzureChatOpenAI the latter
+    includes the deployment, temperature and tool schemas, so both together
+    identify a completion.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 86400, max_bytes: int = 256 * 1024 * 1024,
+                 memory_entries: int = 256):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+
+        # Memory entries are (expires_at, generations), expiring with their disk rows
+        self._memory: "OrderedDict[str, Tuple[float, Sequence[Generation]]]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed_at)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{_normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            if key in self._memory:
+                expires_at, generations = self._memory[key]
+                if now < expires_at:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return generations
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._stats["misses"] += 1
+                return None
+
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._stats["disk_hits"] += 1
+
+        generations = [loads(item) for item in json.loads(row[0])]
+        self._remember(key, generations, row[1] + self.ttl_seconds)
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self._key(prompt, llm_string)
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self._stats["writes"] += 1
+            self._evict()
+        self._remember(key, return_val, now + self.ttl_seconds)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM completions")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self._memory)
+        stats["disk_entries"] = entries
+        stats["disk_bytes"] = size
+        return stats
+
+    def _remember(self, key: str, generations: Sequence[Generation], expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, generations)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under the size cap"""
+        self._conn.execute("DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            self._stats["evictions"] += 1
+            total -= size
+
+
+def create_llm_cache() -> Optional[TieredLLMCache]:
+    """
+    Build the completion cache from environment variables, or None when it
+    is disabled or its file cannot be opened (e.g. on a read-only deploy)
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return None
+    path = os.getenv("LLM_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "data_analyst_agent", "llm_cache.sqlite3")
+    try:
+        return TieredLLMCache(
+            path,
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 86400))),
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+        )
+    except (OSError, sqlite3.Error) as e:
+        logging.getLogger(__name__).warning(f"LLM completion cache disabled, cannot open {path}: {e}")
+        return None
@@ -0,0 +1,238 @@
+import contextvars
+import itertools
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from agent.datasets import current_registry, preview_records
+from agent.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_PREFIX = "artifact://"
+ARTIFACT_PATTERN = re.compile(r"artifact://\d+")
+
+# Outputs never shrink below this, even once the run budget is spent
+MIN_OUTPUT_TOKENS = 200
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when its encoding is available, otherwise about four characters per token"""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    # The encoding is downloaded on first use; offline hosts fall back to the estimate
+                    logger.warning(f"tiktoken unavailable, estimating token counts: {str(e)}")
+                    _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+class OutputBudget:
+    """
+    Token budget for the tool outputs of one analysis run.
+
+    Outputs over the per-call budget (or over what is left of the run budget)
+    are compacted before they reach the LLM: images and long strings become
+    artifact references, lists of records become a dataset handle with a
+    summary, and anything still too large is truncated. The full values stay
+    here and are put back into the final answer.
+    """
+
+    def __init__(self, tool_tokens: int = None, run_tokens: int = None, preview_rows: int = None):
+        self.tool_tokens = tool_tokens if tool_tokens is not None else int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", "2000"))
+        self.run_tokens = run_tokens if run_tokens is not None else int(os.getenv("RUN_OUTPUT_MAX_TOKENS", "12000"))
+        self.preview_rows = preview_rows if preview_rows is not None else int(os.getenv("TOOL_OUTPUT_PREVIEW_ROWS", "3"))
+        self.artifacts: Dict[str, Any] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def apply(self, tool: str, output: Any) -> Any:
+        """Return the output to hand to the LLM, compacted if it is over budget"""
+        if not isinstance(output, str):
+            return output
+
+        original_tokens = count_tokens(output)
+        limit = self._limit()
+        compacted = False
+        if limit and original_tokens > limit:
+            output = self._compact(output, limit)
+            compacted = True
+        tokens = count_tokens(output) if compacted else original_tokens
+
+        with self._lock:
+            self.calls.append({
+                "tool": tool,
+                "original_tokens": original_tokens,
+                "tokens": tokens,
+                "compacted": compacted,
+            })
+        if compacted:
+            logger.info(f"Compacted {tool} output from {original_tokens} to {tokens} tokens")
+        return output
+
+    def read(self, ref: str, offset: int = 0, max_chars: int = 4000) -> str:
+        """Return a slice of a stored artifact"""
+        value = self.artifacts.get(ref.strip())
+        if value is None:
+            return dumps({"error": f"Unknown artifact '{ref}'. Available: {', '.join(self.artifacts) or 'none'}"})
+        text = value if isinstance(value, str) else dumps(value)
+        return dumps({
+            "artifact": ref,
+            "offset": offset,
+            "total_chars": len(text),
+            "content": text[offset:offset + max_chars],
+        })
+
+    def resolve(self, value: Any) -> Any:
+        """Replace artifact references in a final answer with the stored values"""
+        if isinstance(value, str):
+            if value in self.artifacts:
+                return self.artifacts[value]
+            return ARTIFACT_PATTERN.sub(lambda m: self._artifact_text(m.group(0)), value)
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        return value
+
+    def report(self) -> Dict[str, Any]:
+        """Token counts for the run's tool outputs, before and after compaction"""
+        with self._lock:
+            calls = list(self.calls)
+        original = sum(call["original_tokens"] for call in calls)
+        sent = sum(call["tokens"] for call in calls)
+        return {
+            "tool_calls": len(calls),
+            "original_tokens": original,
+            "tokens": sent,
+            "tokens_saved": original - sent,
+            "calls": calls,
+        }
+
+    def _limit(self) -> int:
+        if self.tool_tokens <= 0:
+            return 0
+        if self.run_tokens <= 0:
+            return self.tool_tokens
+        with self._lock:
+            used = sum(call["tokens"] for call in self.calls)
+        return max(min(self.tool_tokens, self.run_tokens - used), MIN_OUTPUT_TOKENS)
+
+    def _store(self, value: Any) -> str:
+        ref = f"{ARTIFACT_PREFIX}{next(self._counter)}"
+        self.artifacts[ref] = value
+        return ref
+
+    def _artifact_text(self, ref: str) -> str:
+        value = self.artifacts.get(ref, ref)
+        return value if isinstance(value, str) else dumps(value)
+
+    def _compact(self, output: str, limit: int) -> str:
+        try:
+            value = loads(output)
+        except ValueError:
+            return self._truncate(output, limit)
+
+        value = self._compact_value(value, max_chars=limit * 2)
+        text = dumps(value)
+        if count_tokens(text) > limit:
+            return self._truncate(text, limit)
+        return text
+
+    def _compact_value(self, value: Any, max_chars: int) -> Any:
+        if isinstance(value, str):
+            # Images are only useful in the final answer; the model passes the reference through
+            if value.startswith("data:"):
+                return self._store(value)
+            if len(value) > max_chars:
+                return {"artifact": self._store(value), "total_chars": len(value), "head": value[:200]}
+            return value
+        if isinstance(value, list):
+            if len(value) > self.preview_rows * 2 and all(isinstance(item, dict) for item in value):
+                return summarize_records(value, self.preview_rows)
+            return [self._compact_value(item, max_chars) for item in value]
+        if isinstance(value, dict):
+            return {key: self._compact_value(item, max_chars) for key, item in value.items()}
+        return value
+
+    def _truncate(self, text: str, limit: int) -> str:
+        ref = self._store(text)
+        keep = max(limit * 3, 200)
+        return dumps({
+            "truncated": True,
+            "artifact": ref,
+            "total_chars": len(text),
+            "head": text[:keep],
+            "note": "Use read_artifact with this artifact and an offset to read more",
+        })
+
+
+def summarize_records(records: List[Dict[str, Any]], preview_rows: int) -> Dict[str, Any]:
+    """Register a list of records as a dataset and describe it: schema, row count, head/tail and column stats"""
+    import pandas as pd
+
+    df = pd.DataFrame(records)
+    registry = current_registry()
+    handle = registry.add(df)
+    summary = registry.describe(handle, preview_rows=preview_rows)
+    summary["tail"] = preview_records(df.tail(preview_rows), preview_rows)
+    summary["column_stats"] = column_stats(df)
+    return summary
+
+
+def column_stats(df) -> Dict[str, Dict[str, Any]]:
+    """Min/max/mean for numeric columns, distinct count and most common value for the rest"""
+    import pandas as pd
+
+    stats = {}
+    for name in df.columns:
+        column = df[name]
+        numeric = pd.to_numeric(column, errors="coerce")
+        if len(column) and numeric.notna().mean() > 0.9:
+            stats[str(name)] = {
+                "min": float(numeric.min()),
+                "max": float(numeric.max()),
+                "mean": round(float(numeric.mean()), 4),
+                "nulls": int(numeric.isna().sum()),
+            }
+        else:
+            top = column.astype(str).value_counts()
+            stats[str(name)] = {
+                "distinct": int(len(top)),
+                "top": str(top.index[0]) if len(top) else None,
+                "nulls": int(column.isna().sum()),
+            }
+    return stats
+
+
+_current_budget: contextvars.ContextVar = contextvars.ContextVar("output_budget", default=None)
+
+
+def current_budget() -> Optional[OutputBudget]:
+    """Budget of the running analysis, or None when tools are called directly"""
+    return _current_budget.get()
+
+
+def start_budget() -> contextvars.Token:
+    return _current_budget.set(OutputBudget())
+
+
+def end_budget(token: contextvars.Token):
+    try:
+        _current_budget.reset(token)
+    except ValueError:
+        # A streamed run closed from another context; that context already discarded the budget
+        pass
@@ -0,0 +1,163 @@
+"""
+JSON encoding for tool outputs and API responses.
+
+orjson is used when it is installed and the standard library otherwise. Both
+encode numpy scalars and arrays, pandas objects, timestamps and Decimals,
+and write NaN and infinities as null. DataFrames are encoded as
+{column: {index: value}}, like DataFrame.to_dict(), and Series as
+{index: value}, with floats written exactly and dates as for scalars.
+"""
+import datetime
+import decimal
+import json
+import math
+from typing import Any, Dict, List, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson else 0
+_DATETIMES = (datetime.datetime, datetime.date, datetime.time)
+
+
+def dumps(obj: Any) -> str:
+    """Encode `obj` as a JSON string"""
+    return dumps_bytes(obj).decode("utf-8") if orjson else _stdlib_dumps(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode `obj` as UTF-8 JSON bytes, as written to a response body"""
+    if orjson:
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits, numpy object arrays and the like
+            pass
+    return _stdlib_dumps(obj).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON; raises json.JSONDecodeError (orjson's error subclasses it)"""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN literals and huge integers are accepted by the standard library only
+            pass
+    return json.loads(data)
+
+
+def records(df) -> List[Dict[Any, Any]]:
+    """The rows of a DataFrame as dicts, converted column by column as in dumps"""
+    columns = [_column_values(values) for _, values in df.items()]
+    return [dict(zip(df.columns, row)) for row in zip(*columns)]
+
+
+def _frame_dict(obj) -> dict:
+    """A DataFrame or Series as nested dicts of Python scalars, or None for anything else"""
+    if not _is_pandas(obj):
+        return None
+    import pandas as pd
+
+    if not isinstance(obj, (pd.DataFrame, pd.Series)):
+        return None
+    keys = _column_values(obj.index.to_series())
+    if isinstance(obj, pd.Series):
+        return dict(zip(keys, _column_values(obj)))
+    return {column: dict(zip(keys, _column_values(values))) for column, values in obj.items()}
+
+
+def _column_values(values) -> list:
+    """
+    A Series as Python scalars. tolist() converts numeric columns in C, unlike
+    to_dict(); naive datetimes are formatted as isoformat() would in one pass
+    """
+    if values.dtype.kind == "M" and getattr(values.dtype, "tz", None) is None:
+        import numpy as np
+        import pandas as pd
+
+        text = pd.Series(np.datetime_as_string(values.to_numpy(), unit="us"), index=values.index, dtype=object)
+        text = text.str.removesuffix(".000000")
+        return text.where(values.notna().to_numpy(), None).tolist()
+    return values.tolist()
+
+
+def _orjson_default(obj):
+    # Checked first: pandas Timestamps fill whole columns of records
+    if isinstance(obj, _DATETIMES):
+        return _isoformat(obj)
+    converted = _frame_dict(obj)
+    if converted is not None:
+        return converted
+    return _convert(obj)
+
+
+def _stdlib_default(obj):
+    if isinstance(obj, _DATETIMES):
+        return _isoformat(obj)
+    converted = _frame_dict(obj)
+    if converted is not None:
+        return converted
+    if getattr(obj, "dtype", None) is not None and obj.dtype.kind == "M":
+        # datetime64 as orjson writes it; tolist() would give integers for nanoseconds
+        import pandas as pd
+
+        return _isoformat(pd.Timestamp(obj)) if obj.ndim == 0 else [_stdlib_default(value) for value in obj]
+    if hasattr(obj, "tolist"):
+        # numpy arrays and scalars
+        return obj.tolist()
+    return _convert(obj)
+
+
+def _isoformat(obj):
+    # NaT is a datetime too, and the only one unequal to itself
+    return None if obj != obj else obj.isoformat()
+
+
+def _convert(obj):
+    """Types neither encoder knows, shared by both"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if _is_pandas(obj):
+        import pandas as pd
+
+        if obj is pd.NA:
+            return None
+        if isinstance(obj, pd.Timedelta):
+            return obj.isoformat()
+    if hasattr(obj, "item"):
+        # numpy scalars orjson does not take natively, such as datetime64 and object
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _is_pandas(obj) -> bool:
+    return type(obj).__module__.startswith("pandas")
+
+
+def _stdlib_dumps(obj: Any) -> str:
+    try:
+        return json.dumps(obj, default=_stdlib_default, ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        # Non-finite floats: replace them and encode again
+        return json.dumps(_finite(obj), default=_stdlib_default, ensure_ascii=False, allow_nan=False)
+
+
+def _finite(obj):
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    converted = _frame_dict(obj)
+    if converted is not None:
+        return _finite(converted)
+    if getattr(obj, "dtype", None) is not None and obj.dtype.kind in "fO" and not _is_pandas(obj):
+        # Float and object arrays may hold NaN; the rest are left to the default hook
+        return _finite(obj.tolist())
+    return obj
@@ -0,0 +1,21 @@
+"""
+Agent tool classes.
+
+The classes are imported on first attribute access so that importing the
+package does not pull in pandas, matplotlib or BeautifulSoup.
+"""
+import importlib
+
+_TOOL_MODULES = {
+    "DataTools": "agent.tools.data_tools",
+    "VisualizationTools": "agent.tools.visualization_tools",
+    "WebScrapingTools": "agent.tools.web_scraping_tools",
+}
+
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name):
+    if name in _TOOL_MODULES:
+        return getattr(importlib.import_module(_TOOL_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
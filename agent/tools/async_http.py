@@ -0,0 +1,209 @@
+import asyncio
+import contextlib
+import logging
+import os
+import weakref
+from typing import AsyncIterator, Dict, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from agent.tools.http_cache import HTTPCache, shared_http_cache
+from agent.tools.http_fixtures import HTTPFixtures, shared_http_fixtures
+
+logger = logging.getLogger(__name__)
+
+# Chunk size when a cached body is replayed to a streaming reader
+_REPLAY_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _LoopState:
+    """Client and semaphores bound to one event loop"""
+
+    def __init__(self, client: httpx.AsyncClient, max_connections: int):
+        self.client = client
+        self.slots = asyncio.Semaphore(max_connections)
+        self.hosts: Dict[str, asyncio.Semaphore] = {}
+
+
+class AsyncHTTPClient:
+    """
+    Pooled async HTTP client for scraping.
+
+    Keeps connections alive across requests (HTTP/2 when the `h2` package is
+    installed), bounds every request by connect, read and total timeouts, and
+    limits concurrent requests both overall and per host so one slow site
+    cannot take every connection. Responses go through the same on-disk
+    HTTPCache as the synchronous scraping session.
+    """
+
+    def __init__(self, connect_timeout: float = 5.0, read_timeout: float = 20.0, total_timeout: float = 60.0,
+                 max_connections: int = 32, max_per_host: int = 6, http2: bool = True,
+                 cache: Optional[HTTPCache] = None, fixtures: Optional[HTTPFixtures] = None):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.total_timeout = total_timeout
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.http2 = http2 and _http2_available()
+        self.cache = cache
+        # Record or replay responses instead of plain live traffic
+        self.fixtures = fixtures
+        # An AsyncClient's connections belong to the loop that opened them
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+    @contextlib.asynccontextmanager
+    async def stream(self, url: str) -> AsyncIterator[Union["_StoringBody", "_ReplayBody"]]:
+        """
+        GET a URL within the concurrency limits and yield its body (an async
+        iterator of chunks with `url` and `headers`), raising httpx errors for
+        failed requests. The total timeout covers reading the body; the response
+        is cached when it is read to the end.
+        """
+        state = self._state()
+        host = urlsplit(url).netloc
+        host_slots = state.hosts.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        async with state.slots, host_slots:
+            try:
+                async with asyncio.timeout(self.total_timeout):
+                    request = state.client.build_request("GET", url)
+                    # The lookup reads the cached body from SQLite, so it runs off the event loop
+                    entry = await asyncio.to_thread(self._revalidation, request) if self.cache else None
+                    if entry is not None and entry.get("fresh"):
+                        yield _ReplayBody(url, entry)
+                        return
+
+                    response = await state.client.send(request, stream=True)
+                    try:
+                        if entry is not None and response.status_code == 304:
+                            entry = await asyncio.to_thread(self.cache.refresh, request, entry, response)
+                            self.cache.record("revalidated", len(entry["body"]))
+                            yield _ReplayBody(url, entry)
+                            return
+
+                        response.raise_for_status()
+                        if self.cache:
+                            self.cache.record("changed" if entry is not None else "misses")
+                        body = _StoringBody(response, self.cache.max_entry_bytes if self.cache else 0)
+                        yield body
+                        if self.cache and body.storable:
+                            await asyncio.to_thread(self.cache.store, request, response, b"".join(body.chunks))
+                    finally:
+                        await response.aclose()
+            except TimeoutError:
+                raise httpx.TimeoutException(f"Request to {url} exceeded {self.total_timeout}s")
+
+    async def aclose(self):
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.aclose()
+
+    def _revalidation(self, request: httpx.Request) -> Optional[Dict]:
+        """
+        The cached entry for a request: marked "fresh" (and counted as a hit)
+        when it can be used as is, otherwise with conditional headers added to
+        the request. None when nothing is cached.
+        """
+        entry = self.cache.lookup(request)
+        if entry is None:
+            return None
+        if self.cache.is_fresh(entry, request):
+            self.cache.touch(request)
+            self.cache.record("hits", len(entry["body"]))
+            return {**entry, "fresh": True}
+
+        for name, header in (("If-None-Match", "ETag"), ("If-Modified-Since", "Last-Modified")):
+            value = next((v for k, v in entry["headers"].items() if k.lower() == header.lower()), None)
+            if value:
+                request.headers[name] = value
+        return entry
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            transport = None
+            if self.fixtures is not None:
+                transport = self.fixtures.async_transport(httpx.AsyncHTTPTransport(limits=limits, http2=self.http2))
+            client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                limits=limits,
+                http2=self.http2,
+                follow_redirects=True,
+                transport=transport,
+            )
+            state = _LoopState(client, self.max_connections)
+            self._states[loop] = state
+        return state
+
+
+class _StoringBody:
+    """
+    Body of a streamed response with its URL and headers. Chunks are kept for
+    the cache up to `max_bytes`; `complete` once read to the end.
+    """
+
+    def __init__(self, response: httpx.Response, max_bytes: int):
+        self._response = response
+        self.url = str(response.url)
+        self.headers = response.headers
+        self.max_bytes = max_bytes
+        self.chunks = []
+        self.size = 0
+        self.complete = False
+
+    async def __aiter__(self):
+        async for chunk in self._response.aiter_bytes():
+            self.size += len(chunk)
+            if self.size <= self.max_bytes:
+                self.chunks.append(chunk)
+            else:
+                self.chunks.clear()
+            yield chunk
+        self.complete = True
+
+    @property
+    def storable(self) -> bool:
+        return self.complete and self.size <= self.max_bytes
+
+
+class _ReplayBody:
+    """A cached body in chunks, as it would have been downloaded"""
+
+    def __init__(self, url: str, entry: Dict):
+        self.url = url
+        self.headers = httpx.Headers(entry["headers"])
+        self._body = entry["body"]
+
+    async def __aiter__(self):
+        for start in range(0, len(self._body), _REPLAY_CHUNK_SIZE):
+            yield self._body[start:start + _REPLAY_CHUNK_SIZE]
+
+
+def create_async_client() -> AsyncHTTPClient:
+    """Build the async scraping client from environment variables"""
+    fixtures = shared_http_fixtures()
+    return AsyncHTTPClient(
+        connect_timeout=float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.getenv("SCRAPE_READ_TIMEOUT", "20")),
+        total_timeout=float(os.getenv("SCRAPE_TOTAL_TIMEOUT", "60")),
+        max_connections=int(os.getenv("SCRAPE_MAX_CONNECTIONS", "32")),
+        max_per_host=int(os.getenv("SCRAPE_MAX_PER_HOST", "6")),
+        http2=os.getenv("SCRAPE_HTTP2", "true").lower() in ("1", "true", "yes"),
+        # Recorded and replayed traffic bypasses the cache so every request reaches the fixtures
+        cache=shared_http_cache() if fixtures is None else None,
+        fixtures=fixtures
+    )
@@ -1,49 +1,112 @@
+import asyncio
+import logging
 import pandas as pd
 import numpy as np
-import json
 from typing import Dict, List, Any, Union
+from agent.datasets import current_registry, frame_from_input, to_frame
+from agent.serialization import dumps, loads
+from agent.tools.type_inference import parse_numeric
+
+logger = logging.getLogger(__name__)
 
 class DataTools:
     def __init__(self):
-        # Remove DuckDB dependency for Vercel deployment
-        self.conn = None
-        print("DataTools initialized (lightweight version for Vercel)")
+        # The DuckDB engine and SQL result cache are shared by the process and opened on the first SQL query
+        self.engine = None
+        self.sql_cache = None
+        print("DataTools initialized")
     
-    def query_duckdb(self, query: str) -> str:
-        """Placeholder for DuckDB queries - not available in lightweight deployment"""
-        return json.dumps({
-            "error": "DuckDB queries not available in this deployment",
-            "message": "Use local deployment for database functionality"
-        })
+    def query_duckdb(self, query: str, cancellation=None) -> str:
+        """Run DuckDB SQL; registered datasets can be queried by handle, and the result is stored as a new dataset"""
+        try:
+            from agent.tools.duckdb_engine import QueryCancelled, referenced_tables, shared_duckdb_engine
+            from agent.tools.sql_cache import shared_sql_cache
+        except ImportError as e:
+            return dumps({"error": f"DuckDB is not available: {str(e)}"})
+        
+        try:
+            sql, preview_rows, refresh = query, 20, False
+            if query.lstrip().startswith("{"):
+                input_data = loads(query)
+                sql = input_data.get("query") or input_data.get("sql") or ""
+                preview_rows = min(int(input_data.get("preview_rows", 20)), 100)
+                refresh = bool(input_data.get("refresh", False))
+            if not sql.strip():
+                return dumps({"error": "No SQL query provided"})
+            
+            if self.engine is None:
+                self.engine = shared_duckdb_engine()
+                self.sql_cache = shared_sql_cache()
+            registry = current_registry()
+            tables = {handle: registry.get(handle) for handle in referenced_tables(sql, registry.handles())}
+            frame, truncated = self._cached_query(sql, tables, cancellation, refresh)
+            
+            result_handle = registry.add(frame)
+            output = {"success": True, **registry.describe(result_handle, preview_rows=preview_rows)}
+            if truncated:
+                output["truncated"] = f"Only the first {self.engine.max_rows} rows were kept; aggregate or add a LIMIT in SQL"
+            return dumps(output)
+            
+        except QueryCancelled as e:
+            return dumps({"error": str(e)})
+        except Exception as e:
+            return dumps({"error": f"DuckDB query failed: {str(e)}"})
+    
+    def _cached_query(self, sql: str, tables: Dict[str, pd.DataFrame], cancellation, refresh: bool):
+        """(frame, truncated) of a query, from the SQL result cache when its sources are unchanged"""
+        from agent.tools.sql_cache import is_cacheable, normalize_sql, source_versions
+        
+        normalized = normalize_sql(sql)
+        versions = None
+        if self.sql_cache is not None and is_cacheable(normalized):
+            try:
+                versions = source_versions(normalized, tables, self.engine)
+            except Exception as e:
+                # A source that cannot be versioned (e.g. an unreachable URL) only means the result is not cached
+                logger.debug(f"Not caching query, sources could not be versioned: {e}")
+        if versions is None:
+            result = self.engine.query(sql, tables=tables, cancellation=cancellation)
+            return result.frame, result.truncated
+        
+        key = self.sql_cache.key(normalized, versions)
+        cached = None if refresh else self.sql_cache.lookup(key)
+        if cached is not None:
+            return cached
+        result = self.engine.query(sql, tables=tables, cancellation=cancellation)
+        sources = [name for name in versions if name != "catalog"]
+        self.sql_cache.store(key, normalized, sources, result.frame, result.truncated)
+        return result.frame, result.truncated
+    
+    async def aquery_duckdb(self, query: str) -> str:
+        """query_duckdb on a worker thread; cancelling the call interrupts the running query"""
+        from agent.tools.duckdb_engine import Cancellation
+        
+        cancellation = Cancellation()
+        try:
+            return await asyncio.to_thread(self.query_duckdb, query, cancellation)
+        except asyncio.CancelledError:
+            cancellation.cancel()
+            raise
     
     def analyze_data(self, data_input: str) -> str:
         """Perform statistical analysis on data using pandas and numpy only"""
         try:
             # Parse input JSON
-            input_data = json.loads(data_input)
-            data = input_data.get("data", [])
+            input_data = loads(data_input)
             analysis_type = input_data.get("analysis_type", "describe")
             
-            if not data:
-                return json.dumps({"error": "No data provided"})
+            # Load the dataset by handle, or build it from inline rows
+            df = frame_from_input(input_data)
             
-            # Convert to DataFrame
-            df = pd.DataFrame(data)
+            if df.empty:
+                return dumps({"error": "No data provided"})
             
             results = {}
             
             if analysis_type == "describe":
                 # Basic descriptive statistics
-                desc = df.describe()
-                results["description"] = {}
-                for col in desc.columns:
-                    results["description"][col] = {}
-                    for stat in desc.index:
-                        value = desc.loc[stat, col]
-                        if pd.isna(value):
-                            results["description"][col][stat] = None
-                        else:
-                            results["description"][col][stat] = float(value) if isinstance(value, (np.integer, np.floating)) else str(value)
+                # Serialized in bulk as {column: {statistic: value}}, NaN as null
+                results["description"] = df.describe()
                 
                 results["info"] = {
                     "shape": list(df.shape),
@@ -55,13 +118,7 @@ class DataTools:
                 # Correlation analysis using pandas
                 numeric_cols = df.select_dtypes(include=[np.number]).columns
                 if len(numeric_cols) >= 2:
-                    corr_matrix = df[numeric_cols].corr()
-                    results["correlation_matrix"] = {}
-                    for col1 in corr_matrix.columns:
-                        results["correlation_matrix"][col1] = {}
-                        for col2 in corr_matrix.columns:
-                            value = corr_matrix.loc[col1, col2]
-                            results["correlation_matrix"][col1][col2] = float(value) if not pd.isna(value) else None
+                    results["correlation_matrix"] = df[numeric_cols].corr()
                 else:
                     results["error"] = "Need at least 2 numeric columns for correlation"
             
@@ -71,16 +128,16 @@ class DataTools:
                 y_col = input_data.get("y_column")
                 
                 if not x_col or not y_col:
-                    return json.dumps({"error": "Need x_column and y_column for regression"})
+                    return dumps({"error": "Need x_column and y_column for regression"})
                 
                 if x_col not in df.columns or y_col not in df.columns:
-                    return json.dumps({"error": "Specified columns not found in data"})
+                    return dumps({"error": "Specified columns not found in data"})
                 
                 # Clean data (remove NaN values)
                 clean_data = df[[x_col, y_col]].dropna()
                 
                 if len(clean_data) < 2:
-                    return json.dumps({"error": "Not enough data points for regression"})
+                    return dumps({"error": "Not enough data points for regression"})
                 
                 x = clean_data[x_col].values
                 y = clean_data[y_col].values
@@ -95,7 +152,7 @@ class DataTools:
                 denominator = np.sum((x - x_mean) ** 2)
                 
                 if denominator == 0:
-                    return json.dumps({"error": "Cannot perform regression: x values are all the same"})
+                    return dumps({"error": "Cannot perform regression: x values are all the same"})
                 
                 slope = numerator / denominator
                 intercept = y_mean - slope * x_mean
@@ -140,21 +197,52 @@ class DataTools:
                             }
             
             else:
-                return json.dumps({"error": f"Unknown analysis type: {analysis_type}"})
+                return dumps({"error": f"Unknown analysis type: {analysis_type}"})
             
-            return json.dumps({
+            return dumps({
                 "success": True,
                 "analysis_type": analysis_type,
                 "results": results
             })
             
         except Exception as e:
-            return json.dumps({"error": f"Analysis failed: {str(e)}"})
+            return dumps({"error": f"Analysis failed: {str(e)}"})
+    
+    def query_dataset(self, query_input: str) -> str:
+        """Filter, sort and project a registered dataset, storing the result as a new dataset"""
+        try:
+            input_data = loads(query_input)
+            handle = input_data.get("dataset")
+            if not handle:
+                return dumps({"error": "No dataset handle provided"})
+            
+            registry = current_registry()
+            df = registry.get(handle)
+            
+            if input_data.get("filter"):
+                df = df.query(input_data["filter"], engine="python")
+            if input_data.get("sort_by"):
+                df = df.sort_values(input_data["sort_by"], ascending=input_data.get("ascending", True))
+            if input_data.get("columns"):
+                df = df[input_data["columns"]]
+            if input_data.get("limit"):
+                df = df.head(int(input_data["limit"]))
+            
+            result_handle = registry.add(df.reset_index(drop=True))
+            preview_rows = min(int(input_data.get("preview_rows", 20)), 100)
+            return dumps({"success": True, **registry.describe(result_handle, preview_rows=preview_rows)})
+            
+        except Exception as e:
+            return dumps({"error": f"Dataset query failed: {str(e)}"})
     
-    def filter_data(self, data: List[Dict], filters: Dict) -> List[Dict]:
-        """Filter data based on conditions"""
+    def filter_data(self, data: Any, filters: Dict) -> Union[List[Dict], pd.DataFrame]:
+        """
+        Filter data based on conditions. `data` may be rows, a dict of columns,
+        an Arrow table or IPC buffer, a file path or a DataFrame; rows come back
+        as rows, anything else as a DataFrame
+        """
         try:
-            df = pd.DataFrame(data)
+            df = to_frame(data)
             
             for column, condition in filters.items():
                 if column in df.columns:
@@ -171,20 +259,30 @@ class DataTools:
                         # Simple equality filter
                         df = df[df[column] == condition]
             
-            return df.to_dict('records')
+            return df.to_dict('records') if isinstance(data, list) else df
         except Exception as e:
             print(f"Error filtering data: {e}")
             return data
     
-    def clean_numeric_data(self, data: List[Dict], columns: List[str]) -> List[Dict]:
-        """Clean numeric data by removing outliers and handling missing values"""
+    def clean_numeric_data(self, data: Any, columns: List[str]) -> Union[List[Dict], pd.DataFrame]:
+        """
+        Clean numeric data by removing outliers and handling missing values.
+        Accepts the same inputs as filter_data and returns rows only for rows
+        """
         try:
-            df = pd.DataFrame(data)
+            df = to_frame(data)
+            if not isinstance(data, list):
+                # Leave the caller's frame (or Arrow buffers it shares) untouched
+                df = df.copy(deep=False)
             
             for column in columns:
                 if column in df.columns:
-                    # Convert to numeric, coercing errors to NaN
-                    df[column] = pd.to_numeric(df[column], errors='coerce')
+                    # Parse formatted numbers ("$1,234", "1.5 bn[a]"), unparseable values become missing
+                    values = parse_numeric(df[column])
+                    if not pd.api.types.is_numeric_dtype(values):
+                        # Identifiers such as ZIP codes keep their leading zeros
+                        continue
+                    df[column] = values.astype('Float64')
                     
                     # Remove outliers using IQR method
                     Q1 = df[column].quantile(0.25)
@@ -198,9 +296,9 @@ class DataTools:
                     
                     # Fill missing values with median
                     median_val = df[column].median()
-                    df[column].fillna(median_val, inplace=True)
+                    df[column] = df[column].fillna(median_val)
             
-            return df.to_dict('records')
+            return df.to_dict('records') if isinstance(data, list) else df
         except Exception as e:
             print(f"Error cleaning numeric data: {e}")
             return data
\ No newline at end of file
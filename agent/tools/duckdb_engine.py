@@ -0,0 +1,207 @@
+"""
+Embedded DuckDB engine behind the query_duckdb tool.
+
+One database per process (each API worker has its own) is opened on first
+use and kept for the life of the process, so extensions, settings and the
+Parquet metadata cache survive between queries; every query runs on its own
+cursor. Results are fetched as Arrow record batches, capped at
+DUCKDB_MAX_ROWS, and converted to a DataFrame without building Python rows.
+Queries are interrupted after DUCKDB_QUERY_TIMEOUT seconds or when their
+Cancellation is cancelled. Remote Parquet (s3:// and http(s):// URLs in
+read_parquet) is read through the cached object store in object_store.py.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rows per Arrow record batch read from a result
+_BATCH_ROWS = 64 * 1024
+
+
+class QueryCancelled(Exception):
+    pass
+
+
+class QueryTimeout(QueryCancelled):
+    pass
+
+
+class QueryResult(NamedTuple):
+    frame: "pd.DataFrame"
+    truncated: bool
+
+
+class Cancellation:
+    """Interrupts the query it is attached to when cancelled, from any thread"""
+
+    def __init__(self):
+        self.cancelled = False
+        self.timed_out = False
+        self._cursor = None
+        self._lock = threading.Lock()
+
+    def cancel(self, timed_out: bool = False):
+        with self._lock:
+            self.cancelled = True
+            self.timed_out = self.timed_out or timed_out
+            cursor = self._cursor
+        if cursor is not None:
+            cursor.interrupt()
+
+    def attach(self, cursor):
+        with self._lock:
+            self._cursor = cursor
+            cancelled = self.cancelled
+        if cancelled:
+            cursor.interrupt()
+
+    def detach(self):
+        with self._lock:
+            self._cursor = None
+
+
+class DuckDBEngine:
+    """A long-lived DuckDB database with a cursor per query"""
+
+    def __init__(self, database: str = None, threads: int = None, memory_limit: str = None,
+                 timeout: float = None, max_rows: int = None, object_store=None):
+        import duckdb
+        from agent.tools.object_store import create_object_store
+
+        self.database = database or os.getenv("DUCKDB_DATABASE", ":memory:")
+        self.threads = threads or int(os.getenv("DUCKDB_THREADS", str(os.cpu_count() or 2)))
+        self.memory_limit = memory_limit or os.getenv("DUCKDB_MEMORY_LIMIT", "")
+        self.timeout = timeout if timeout is not None else float(os.getenv("DUCKDB_QUERY_TIMEOUT", "120"))
+        self.max_rows = max_rows or int(os.getenv("DUCKDB_MAX_ROWS", "1000000"))
+        # False disables the object store; None builds it from the environment
+        self.object_store = create_object_store() if object_store is None else object_store or None
+
+        # Parquet footers are cached across queries, so repeated scans of the same files skip them
+        config = {"threads": self.threads, "enable_object_cache": True}
+        if self.memory_limit:
+            config["memory_limit"] = self.memory_limit
+        self._interrupted = duckdb.InterruptException
+        self._connection = duckdb.connect(self.database, config=config)
+        self._lock = threading.Lock()
+        # Bumped by every statement that may write, so results over database tables can be versioned
+        self.generation = 0
+        self._instance = uuid.uuid4().hex
+        logger.info(f"DuckDB {duckdb.__version__} ready (database={self.database}, threads={self.threads}, "
+                    f"memory_limit={self.memory_limit or 'default'})")
+
+    def cursor(self):
+        # Cursors share the database; creating one touches the parent connection, so it is serialized
+        with self._lock:
+            return self._connection.cursor()
+
+    def catalog_version(self) -> Optional[str]:
+        """None while the database has no tables or views of its own, else a version valid in this process"""
+        if self.database == ":memory:" and self.generation == 0:
+            return None
+        cursor = self.cursor()
+        try:
+            count = cursor.execute(
+                "SELECT (SELECT COUNT(*) FROM duckdb_tables() WHERE NOT internal) + "
+                "(SELECT COUNT(*) FROM duckdb_views() WHERE NOT internal)"
+            ).fetchone()[0]
+        finally:
+            cursor.close()
+        return f"{self._instance}:{self.generation}" if count else None
+
+    def parse(self, sql: str) -> dict:
+        """DuckDB's parse tree of a SELECT query (json_serialize_sql); {"error": true, ...} when it does not parse"""
+        cursor = self.cursor()
+        try:
+            return json.loads(cursor.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0])
+        finally:
+            cursor.close()
+
+    def query(self, sql: str, tables: Optional[Dict[str, "pd.DataFrame"]] = None, timeout: float = None,
+              cancellation: Optional[Cancellation] = None) -> QueryResult:
+        """
+        Run a query and return its first max_rows rows as a DataFrame. `tables`
+        are registered as views visible to this query only. Raises QueryTimeout
+        or QueryCancelled when the query is interrupted.
+        """
+        import pyarrow as pa
+        from agent.datasets import arrow_to_frame
+        from agent.tools.sql_cache import is_read_only, normalize_sql
+
+        timeout = self.timeout if timeout is None else timeout
+        cancellation = cancellation or Cancellation()
+        timer = threading.Timer(timeout, cancellation.cancel, kwargs={"timed_out": True}) if timeout else None
+        cursor = self.cursor()
+        try:
+            if self.object_store is not None:
+                sql, remote = self.object_store.rewrite(sql)
+                tables = {**(tables or {}), **remote}
+            for name, frame in (tables or {}).items():
+                cursor.register(name, frame)
+            cancellation.attach(cursor)
+            if timer is not None:
+                timer.start()
+            if not is_read_only(normalize_sql(sql)):
+                self.generation += 1
+            reader = _arrow_reader(cursor.execute(sql))
+            batches, rows = [], 0
+            for batch in reader:
+                batches.append(batch)
+                rows += batch.num_rows
+                if rows >= self.max_rows:
+                    break
+            truncated = rows > self.max_rows or (rows == self.max_rows and _has_more(reader))
+            table = pa.Table.from_batches(batches, schema=reader.schema).slice(0, self.max_rows)
+            return QueryResult(arrow_to_frame(table), truncated)
+        except self._interrupted:
+            if cancellation.timed_out:
+                raise QueryTimeout(f"Query exceeded the {timeout:g} second time limit")
+            raise QueryCancelled("Query was cancelled")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            cancellation.detach()
+            cursor.close()
+
+    def close(self):
+        self._connection.close()
+
+
+def _arrow_reader(result):
+    """Record batch reader of an executed cursor (fetch_record_batch before DuckDB added to_arrow_reader)"""
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(_BATCH_ROWS)
+    return result.fetch_record_batch(_BATCH_ROWS)
+
+
+def _has_more(reader) -> bool:
+    for batch in reader:
+        if batch.num_rows:
+            return True
+    return False
+
+
+def referenced_tables(sql: str, names) -> list:
+    """The names that appear as identifiers in a query"""
+    return [name for name in names if re.search(rf"(?<![\w.]){re.escape(name)}(?!\w)", sql)]
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def shared_duckdb_engine() -> DuckDBEngine:
+    """Process-wide DuckDB engine, opened on first use"""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = DuckDBEngine()
+    return _shared_engine
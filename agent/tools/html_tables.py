@@ -0,0 +1,357 @@
+"""
+Table extraction from HTML pages.
+
+Tables are read as rows of cells with their rowspan/colspan, expanded into a
+rectangular grid, and turned into a DataFrame whose column names combine the
+leading header rows.
+
+The lxml engine feeds the page to libxml2's HTML parser in chunks (as it is
+downloaded, with StreamParser), keeps only table subtrees (paragraphs and list
+items outside tables are cleared as soon as they are parsed, headings are
+remembered as the current section) and stops at the first table the caller
+accepts. Cell text is read with one compiled XPath per cell instead of
+walking the tree in Python. BeautifulSoup's html.parser is used when lxml is
+not installed, when libxml2 cannot parse the page, or when
+SCRAPE_HTML_PARSER=bs4.
+"""
+import logging
+import os
+import re
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = None
+
+# Block elements that are cleared when they end outside a table
+_PRUNED_TAGS = ("p", "li", "dd", "dt", "pre", "blockquote", "script", "style")
+_HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+# Elements whose content is not page text
+_TEXTLESS_TAGS = ("script", "style", "template")
+
+# Bytes handed to the incremental parser at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Text of a cell, without stylesheet and script content (as BeautifulSoup's get_text)
+_CELL_TEXT = etree.XPath(".//text()[not(ancestor::style) and not(ancestor::script)]") if etree is not None else None
+# Rows of a table itself, not of tables nested in its cells
+_TABLE_ROWS = etree.XPath("./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr") if etree is not None else None
+# Text of a heading without Wikipedia's "[edit]" links
+_HEADING_TEXT = etree.XPath(
+    ".//text()[not(ancestor::*[contains(concat(' ', normalize-space(@class), ' '), ' mw-editsection ')])]"
+) if etree is not None else None
+
+# Spans beyond this are treated as malformed
+_MAX_SPAN = 1000
+_SPAN_DIGITS = re.compile(r"\d+")
+
+
+class Cell(NamedTuple):
+    text: str
+    header: bool
+    rowspan: int
+    colspan: int
+
+
+Table = List[List[Cell]]
+
+
+class PageTable(NamedTuple):
+    rows: Table
+    caption: str
+    section: str  # text of the nearest heading before the table
+    classes: List[str]
+
+
+def _span(value: Optional[str]) -> int:
+    if not value:
+        return 1
+    match = _SPAN_DIGITS.match(value.strip())
+    return min(max(int(match.group()), 1), _MAX_SPAN) if match else 1
+
+
+def iter_tables(content: bytes, class_name: Optional[str] = None, engine: str = None) -> Iterator[Table]:
+    """
+    Yield the tables of a page (optionally only those with `class_name`) as
+    lists of rows of cells, parsing the page only as far as it is consumed.
+    """
+    for table in iter_page_tables(content, class_name, engine):
+        yield table.rows
+
+
+def iter_page_tables(content: bytes, class_name: Optional[str] = None, engine: str = None) -> Iterator[PageTable]:
+    """Like iter_tables, with each table's caption, section heading and classes"""
+    engine = engine or os.getenv("SCRAPE_HTML_PARSER", "lxml")
+    if engine == "lxml" and etree is not None:
+        tables = _iter_tables_lxml(content, class_name)
+        try:
+            first = next(tables, None)
+        except etree.LxmlError as e:
+            logger.warning(f"lxml could not parse the page, falling back to html.parser: {str(e)}")
+        else:
+            if first is not None:
+                yield first
+                yield from tables
+            return
+    yield from _iter_tables_soup(content, class_name)
+
+
+def build_grid(rows: Table) -> List[List[Optional[Cell]]]:
+    """Expand rowspan/colspan into a rectangular grid; positions no cell covers are None"""
+    grid = []
+    carried: Dict[int, List] = {}  # column -> [rows left, cell] for cells spanning down
+    for row in rows:
+        if not carried and all(cell.rowspan == 1 and cell.colspan == 1 for cell in row):
+            grid.append(list(row))
+            continue
+        line: List[Optional[Cell]] = []
+        for cell in row:
+            while len(line) in carried:
+                line.append(_take(carried, len(line)))
+            for _ in range(cell.colspan):
+                if cell.rowspan > 1:
+                    carried[len(line)] = [cell.rowspan - 1, cell]
+                line.append(cell)
+        # Cells spanning down into columns after this row's last cell
+        for column in sorted(column for column in carried if column >= len(line)):
+            line.extend([None] * (column - len(line)))
+            line.append(_take(carried, column))
+        grid.append(line)
+
+    width = max((len(line) for line in grid), default=0)
+    for line in grid:
+        line.extend([None] * (width - len(line)))
+    return grid
+
+
+def _take(carried: Dict[int, List], column: int) -> Cell:
+    entry = carried[column]
+    entry[0] -= 1
+    if entry[0] == 0:
+        del carried[column]
+    return entry[1]
+
+
+def table_frame(rows: Table, clean: bool = False) -> "pd.DataFrame":
+    """
+    Build a DataFrame from table rows. Leading rows made only of header cells
+    form the column names (joined top to bottom for multi-row headers; the
+    first row is the header when none are); empty rows are dropped.
+    """
+    import pandas as pd
+
+    grid = build_grid(rows)
+    if not grid:
+        return pd.DataFrame()
+
+    header_rows = 1
+    while header_rows < len(grid) - 1 and all(cell is None or cell.header for cell in grid[header_rows]):
+        header_rows += 1
+    if not all(cell is None or cell.header for cell in grid[0]):
+        header_rows = 1
+
+    columns = _column_names(grid[:header_rows])
+    data = []
+    for line in grid[header_rows:]:
+        values = [cell.text if cell is not None else None for cell in line]
+        if clean:
+            # Clean up common Wikipedia formatting
+            values = [value.replace('\n', ' ').replace('[edit]', '').strip() if value else value for value in values]
+        if any(values):
+            data.append(values)
+
+    if not data:
+        return pd.DataFrame(columns=columns)
+    # Built column by column; values stay strings until type inference
+    return pd.DataFrame(dict(zip(columns, map(list, zip(*data)))), columns=columns)
+
+
+def _column_names(header_grid: List[List[Optional[Cell]]]) -> List[str]:
+    names = []
+    seen: Dict[str, int] = {}
+    for index, cells in enumerate(zip(*header_grid)):
+        parts = []
+        for cell in cells:
+            # A header spanning several header rows contributes its text once
+            if cell is not None and cell.text and (not parts or parts[-1] != cell.text):
+                parts.append(cell.text)
+        name = " ".join(parts) or f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _has_class(element, class_name: Optional[str]) -> bool:
+    return class_name is None or class_name in (element.get("class") or "").split()
+
+
+def _heading_text(texts) -> str:
+    return " ".join(" ".join(text.split()) for text in texts if text.strip())
+
+
+def _iter_tables_lxml(content: bytes, class_name: Optional[str]) -> Iterator[PageTable]:
+    parser = StreamParser(class_name, engine="lxml")
+    # Fed in chunks so that the page is only parsed as far as it is consumed
+    for start in range(0, len(content), STREAM_CHUNK_SIZE):
+        yield from parser.feed(content[start:start + STREAM_CHUNK_SIZE])
+    yield from parser.close()
+
+
+class StreamParser:
+    """
+    Incremental parser for a page that arrives in chunks.
+
+    feed() returns the tables completed by each chunk, so a download can stop
+    as soon as the table it is for has been read. With `text_chars`, the
+    first `text_chars` characters of the page text (as BeautifulSoup's
+    get_text(strip=True)) are collected as well; every element is then seen
+    by Python instead of only tables, headings and block elements.
+
+    Without lxml, or with engine "bs4", chunks are buffered and parsed by
+    BeautifulSoup on close().
+    """
+
+    def __init__(self, class_name: Optional[str] = None, text_chars: int = 0, engine: str = None):
+        engine = engine or os.getenv("SCRAPE_HTML_PARSER", "lxml")
+        self.class_name = class_name
+        self.text_chars = text_chars
+        self._text: List[str] = []
+        self._text_length = 0
+        self._depth = 0  # tables open around the current element
+        self._skip = 0  # script and style elements open around the current element
+        self._section = ""
+        if engine == "lxml" and etree is not None:
+            self._parser = etree.HTMLPullParser(
+                events=("start", "end"), tag=None if text_chars else ("table",) + _PRUNED_TAGS + _HEADING_TAGS,
+                recover=True, huge_tree=True, remove_comments=True, remove_pis=True
+            )
+            self._buffer = None
+        else:
+            self._parser = None
+            self._buffer: List[bytes] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text)[:self.text_chars]
+
+    def feed(self, chunk: bytes) -> List[PageTable]:
+        if self._parser is None:
+            self._buffer.append(chunk)
+            return []
+        self._parser.feed(chunk)
+        return list(self._process(self._parser.read_events()))
+
+    def close(self) -> List[PageTable]:
+        if self._parser is None:
+            from bs4 import BeautifulSoup
+
+            soup = BeautifulSoup(b"".join(self._buffer), 'html.parser')
+            self._buffer = []
+            if self.text_chars:
+                self._text = [soup.get_text(strip=True)]
+            return list(_iter_tables_soup(soup, self.class_name))
+        self._parser.close()
+        return list(self._process(self._parser.read_events()))
+
+    def _process(self, events) -> Iterator[PageTable]:
+        collect = bool(self.text_chars)
+        for event, element in events:
+            if collect:
+                self._collect_text(event, element)
+            if element.tag == "table":
+                if event == "start":
+                    self._depth += 1
+                    continue
+                self._depth -= 1
+                if self._depth > 0:
+                    # Nested tables are read as part of the outermost one
+                    continue
+                if _has_class(element, self.class_name):
+                    yield self._page_table(element)
+            elif event == "start" or self._depth > 0:
+                continue
+            elif element.tag in _HEADING_TAGS:
+                self._section = _heading_text(_HEADING_TEXT(element))
+            # Finished elements outside tables are dropped as the page streams by;
+            # their tails are kept while text is collected, as the parent's text reads them later
+            element.clear(keep_tail=collect)
+            if collect:
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    parent.remove(element.getprevious())
+
+    def _collect_text(self, event: str, element):
+        """
+        Add the text that became complete with this event: before an element
+        starts, its parent's text or its previous sibling's tail; when it ends,
+        its own text or its last child's tail.
+        """
+        if event == "start":
+            parent = element.getparent()
+            previous = element.getprevious()
+            text = None if parent is None else parent.text if previous is None else previous.tail
+            inside_skipped = self._skip > 0
+            if element.tag in _TEXTLESS_TAGS:
+                self._skip += 1
+        else:
+            text = element[-1].tail if len(element) else element.text
+            inside_skipped = self._skip > 0
+            if element.tag in _TEXTLESS_TAGS:
+                self._skip -= 1
+        if text and not inside_skipped and self._text_length < self.text_chars:
+            text = text.strip()
+            if text:
+                self._text.append(text)
+                self._text_length += len(text)
+
+    def _page_table(self, element) -> PageTable:
+        caption = element.find("caption")
+        rows = [
+            [
+                Cell("".join(text.strip() for text in _CELL_TEXT(cell)), cell.tag == "th",
+                     _span(cell.get("rowspan")), _span(cell.get("colspan")))
+                for cell in row.iterchildren("td", "th")
+            ]
+            for row in _TABLE_ROWS(element)
+        ]
+        return PageTable(rows, _heading_text(_CELL_TEXT(caption)) if caption is not None else "",
+                         self._section, (element.get("class") or "").split())
+
+
+def _iter_tables_soup(content, class_name: Optional[str]) -> Iterator[PageTable]:
+    from bs4 import BeautifulSoup
+
+    soup = content if isinstance(content, BeautifulSoup) else BeautifulSoup(content, 'html.parser')
+    attrs = {'class': class_name} if class_name else {}
+    for table in soup.find_all('table', attrs):
+        if table.find_parent('table') is not None:
+            # Nested tables are read as part of the outermost one, as with lxml
+            continue
+        rows = [
+            [
+                Cell(cell.get_text(strip=True), cell.name == 'th',
+                     _span(cell.get('rowspan')), _span(cell.get('colspan')))
+                for cell in row.find_all(['td', 'th'], recursive=False)
+            ]
+            for row in table.find_all('tr')
+            if row.find_parent('table') is table
+        ]
+        caption = table.find('caption', recursive=False)
+        heading = table.find_previous(list(_HEADING_TAGS))
+        section = ""
+        if heading is not None:
+            for edit_link in heading.find_all(class_='mw-editsection'):
+                edit_link.extract()
+            section = " ".join(heading.get_text(" ").split())
+        yield PageTable(rows, " ".join(caption.get_text(" ").split()) if caption else "",
+                        section, table.get('class') or [])
@@ -0,0 +1,349 @@
+import email.utils
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the transfer rather than the stored (already decoded) body
+_TRANSFER_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+
+# Upper bound for heuristic freshness derived from Last-Modified
+_MAX_HEURISTIC_SECONDS = 86400
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into {directive: argument or None}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HTTPCache:
+    """
+    On-disk private HTTP cache for GET responses, stored in SQLite.
+
+    Freshness follows the response's Cache-Control max-age, then Expires, then
+    a heuristic from Last-Modified. Stale entries with an ETag or Last-Modified
+    are revalidated with a conditional request, so an unchanged page costs a
+    304 instead of a full download. `force_fresh_seconds` treats every stored
+    response as fresh for that long regardless of its headers.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, force_fresh_seconds: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Streamed bodies larger than this are not kept in memory for storing
+        self.max_entry_bytes = max_bytes // 4
+        self.force_fresh_seconds = force_fresh_seconds
+        self._stats = {
+            "hits": 0, "misses": 0, "revalidated": 0, "changed": 0,
+            "stores": 0, "evictions": 0, "bytes_saved": 0,
+        }
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                vary TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    @staticmethod
+    def key(request: PreparedRequest) -> str:
+        return hashlib.sha256(f"{request.method} {request.url}".encode("utf-8")).hexdigest()
+
+    def lookup(self, request: PreparedRequest) -> Optional[Dict[str, Any]]:
+        """Return the stored entry for a request, or None if there is none or it varies on other headers"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, vary, body, stored_at, expires_at FROM responses WHERE key = ?",
+                (self.key(request),)
+            ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, vary, body, stored_at, expires_at = row
+        for name, value in json.loads(vary).items():
+            if request.headers.get(name) != value:
+                return None
+        return {
+            "url": url, "status": status, "headers": json.loads(headers), "body": body,
+            "stored_at": stored_at, "expires_at": expires_at,
+        }
+
+    def is_fresh(self, entry: Dict[str, Any], request: PreparedRequest) -> bool:
+        if "no-cache" in parse_cache_control(request.headers.get("Cache-Control", "")):
+            return False
+        now = time.time()
+        return now < entry["expires_at"] or now < entry["stored_at"] + self.force_fresh_seconds
+
+    def store(self, request: PreparedRequest, response: Response, body: Optional[bytes] = None) -> bool:
+        """Store a complete 200 response (with `body` when it was read as a stream) unless its headers forbid it"""
+        if request.method != "GET" or response.status_code != 200:
+            return False
+        response_cc = parse_cache_control(response.headers.get("Cache-Control", ""))
+        request_cc = parse_cache_control(request.headers.get("Cache-Control", ""))
+        vary = [name.strip() for name in response.headers.get("Vary", "").split(",") if name.strip()]
+        if "no-store" in response_cc or "no-store" in request_cc or "*" in vary:
+            return False
+
+        now = time.time()
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _TRANSFER_HEADERS}
+        vary_values = {name: request.headers.get(name) for name in vary if name.lower() != "accept-encoding"}
+        if body is None:
+            body = response.content
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, vary, body, size, stored_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(request), str(request.url), response.status_code, json.dumps(headers),
+                 json.dumps(vary_values), body, len(body), now, self._expires_at(response.headers, now), now)
+            )
+            self._stats["stores"] += 1
+            self._evict()
+        return True
+
+    def refresh(self, request: PreparedRequest, entry: Dict[str, Any], not_modified: Response) -> Dict[str, Any]:
+        """Merge the headers of a 304 into a stored entry and restart its freshness"""
+        headers = CaseInsensitiveDict(entry["headers"])
+        for name, value in not_modified.headers.items():
+            if name.lower() not in _TRANSFER_HEADERS:
+                headers[name] = value
+        now = time.time()
+        entry = {**entry, "headers": dict(headers), "stored_at": now, "expires_at": self._expires_at(headers, now)}
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                (json.dumps(entry["headers"]), now, entry["expires_at"], now, self.key(request))
+            )
+        return entry
+
+    def touch(self, request: PreparedRequest):
+        with self._lock:
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), self.key(request)))
+
+    def record(self, event: str, body_bytes: int = 0):
+        with self._lock:
+            self._stats[event] += 1
+            self._stats["bytes_saved"] += body_bytes
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"] + stats["revalidated"] + stats["changed"]
+        stats["hit_rate"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        stats["entries"] = entries
+        stats["bytes"] = size
+        return stats
+
+    def _expires_at(self, headers, now: float) -> float:
+        cache_control = parse_cache_control(headers.get("Cache-Control", ""))
+        if "no-cache" in cache_control:
+            return now
+
+        date = _parse_date(headers.get("Date")) or now
+        if _seconds(cache_control.get("max-age")) is not None:
+            lifetime = _seconds(cache_control["max-age"])
+        elif headers.get("Expires"):
+            # An invalid Expires (e.g. "0") means already expired
+            lifetime = (_parse_date(headers["Expires"]) or date) - date
+        elif _parse_date(headers.get("Last-Modified")) is not None:
+            lifetime = min((date - _parse_date(headers["Last-Modified"])) / 10, _MAX_HEURISTIC_SECONDS)
+        else:
+            lifetime = 0
+        age = _seconds(headers.get("Age")) or 0
+        return now + max(lifetime - age, 0)
+
+    def _evict(self):
+        """Drop least recently used entries until under the size cap"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._stats["evictions"] += 1
+            total -= size
+
+
+class CachingAdapter(HTTPAdapter):
+    """Transport adapter that answers GETs from an HTTPCache and revalidates stale entries"""
+
+    def __init__(self, cache: HTTPCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        entry = self.cache.lookup(request)
+        if entry is not None and self.cache.is_fresh(entry, request):
+            self.cache.touch(request)
+            self.cache.record("hits", len(entry["body"]))
+            return self._cached_response(request, entry)
+
+        conditional = request
+        if entry is not None:
+            conditional = request.copy()
+            headers = CaseInsensitiveDict(entry["headers"])
+            if headers.get("ETag"):
+                conditional.headers["If-None-Match"] = headers["ETag"]
+            if headers.get("Last-Modified"):
+                conditional.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = super().send(conditional, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            response.close()
+            entry = self.cache.refresh(request, entry, response)
+            self.cache.record("revalidated", len(entry["body"]))
+            return self._cached_response(request, entry)
+
+        self.cache.record("changed" if entry is not None else "misses")
+        if kwargs.get("stream"):
+            # Reading a streamed body here would defeat streaming; it is stored if the caller reads it to the end
+            response.raw = _StoringStream(response.raw, self.cache, request, response)
+        else:
+            self.cache.store(request, response)
+        return response
+
+    def _cached_response(self, request: PreparedRequest, entry: Dict[str, Any]) -> Response:
+        response = Response()
+        response.status_code = entry["status"]
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(entry["body"])
+        response._content = entry["body"]
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+
+class _StoringStream:
+    """Raw body of a streamed response that stores the response in the cache once it has been read completely"""
+
+    def __init__(self, raw, cache: HTTPCache, request: PreparedRequest, response: Response):
+        self._raw = raw
+        self._cache = cache
+        self._request = request
+        self._response = response
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None):
+        chunks = []
+        size = 0
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            if chunks is not None:
+                size += len(chunk)
+                if size <= self._cache.max_entry_bytes:
+                    chunks.append(chunk)
+                else:
+                    chunks = None
+            yield chunk
+        # Reached only when the caller did not stop early; raw (undecoded) bodies are not stored
+        if decode_content and chunks is not None:
+            self._cache.store(self._request, self._response, body=b"".join(chunks))
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+def create_http_cache() -> Optional[HTTPCache]:
+    """
+    Build the HTTP cache from environment variables, or None when it is
+    disabled or its file cannot be opened (e.g. on a read-only deploy)
+    """
+    if os.getenv("HTTP_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    path = os.getenv("HTTP_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "data_analyst_agent", "http_cache.sqlite3")
+    try:
+        return HTTPCache(
+            path,
+            max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            force_fresh_seconds=float(os.getenv("HTTP_CACHE_FORCE_FRESH_SECONDS", "0"))
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"HTTP cache disabled, cannot open {path}: {e}")
+        return None
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_http_cache() -> Optional[HTTPCache]:
+    """Process-wide HTTP cache shared by all scraping sessions"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = create_http_cache() or False
+    return _shared_cache or None
+
+
+def install(session, cache: Optional[HTTPCache] = None):
+    """Mount a caching adapter on a requests session for http and https URLs"""
+    cache = cache or shared_http_cache()
+    if cache is None:
+        return session
+    adapter = CachingAdapter(cache)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
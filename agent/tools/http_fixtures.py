@@ -0,0 +1,296 @@
+"""
+Record and replay of the scraping tools' HTTP traffic.
+
+With SCRAPE_HTTP_MODE=record every response the scraping tools receive
+(status, headers and body) is saved gzip-compressed under SCRAPE_FIXTURES_DIR,
+keyed by method and URL. With SCRAPE_HTTP_MODE=replay those recordings are
+served without touching the network, optionally with simulated latency and
+bandwidth, so parser and pipeline benchmarks are reproducible offline. A
+request that was never recorded fails like a connection error. The HTTP cache
+is bypassed in both modes, so every request is recorded or replayed.
+"""
+import asyncio
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from agent.tools.http_cache import _TRANSFER_HEADERS
+
+MODES = ("live", "record", "replay")
+
+
+class Recording(NamedTuple):
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class FixtureStore:
+    """Recorded responses in a directory, one gzip file per request: a JSON header line followed by the body"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method} {url}".encode("utf-8")).hexdigest()
+
+    def path(self, method: str, url: str) -> str:
+        return os.path.join(self.directory, self.key(method, url) + ".gz")
+
+    def load(self, method: str, url: str) -> Optional[Recording]:
+        try:
+            with gzip.open(self.path(method, url), "rb") as file:
+                meta = json.loads(file.readline())
+                return Recording(meta["url"], meta["status"], meta["headers"], file.read())
+        except FileNotFoundError:
+            return None
+
+    def recordings(self) -> Iterator[Tuple[str, str, int]]:
+        """(method, url, status) of every recording, read from the header lines"""
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(".gz"):
+                with gzip.open(os.path.join(self.directory, name), "rb") as file:
+                    meta = json.loads(file.readline())
+                yield meta["method"], meta["url"], meta["status"]
+
+    def save(self, method: str, url: str, status: int, headers, body: bytes):
+        # Bodies are stored decoded, so encoding and length headers no longer apply
+        headers = {name: value for name, value in headers.items() if name.lower() not in _TRANSFER_HEADERS}
+        meta = {"method": method, "url": url, "status": status, "headers": headers, "recorded_at": time.time()}
+        # Written under a temporary name so a concurrent replay never reads half a recording
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as file:
+            file.write(json.dumps(meta).encode("utf-8") + b"\n")
+            file.write(body)
+        os.replace(temp_path, self.path(method, url))
+
+
+class HTTPFixtures:
+    """Record or replay mode with its store, and the latency and bandwidth (bytes/s) replays simulate"""
+
+    def __init__(self, mode: str, store: FixtureStore, latency: float = 0.0, bandwidth: Optional[float] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown HTTP fixture mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.store = store
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def adapter(self) -> "FixtureAdapter":
+        return FixtureAdapter(self)
+
+    def async_transport(self, inner: httpx.AsyncBaseTransport) -> "FixtureTransport":
+        return FixtureTransport(self, inner)
+
+
+class FixtureAdapter(HTTPAdapter):
+    """Transport adapter that records live responses or replays recorded ones"""
+
+    def __init__(self, fixtures: HTTPFixtures, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures = fixtures
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.fixtures.mode == "replay":
+            return self._replay(request)
+        # Recorded bodies are the bytes as sent, so ask for them unencoded
+        request.headers["Accept-Encoding"] = "identity"
+        response = super().send(request, **kwargs)
+        response.raw = _RecordingRaw(response.raw, self.fixtures.store, request, response)
+        return response
+
+    def _replay(self, request: requests.PreparedRequest) -> requests.Response:
+        recording = self.fixtures.store.load(request.method, request.url)
+        if recording is None:
+            raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}", request=request)
+        if self.fixtures.latency:
+            time.sleep(self.fixtures.latency)
+        response = requests.Response()
+        response.status_code = recording.status
+        response.reason = http.client.responses.get(recording.status, "")
+        response.headers = CaseInsensitiveDict(recording.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _ThrottledBody(recording.body, self.fixtures.bandwidth)
+        return response
+
+
+class _RecordingRaw:
+    """Raw body of a live response, saved as a recording once read; closing it early reads the rest first"""
+
+    def __init__(self, raw, store: FixtureStore, request: requests.PreparedRequest, response: requests.Response):
+        self._raw = raw
+        self._store = store
+        self._request = request
+        self._response = response
+        self._chunks = []
+        self._saved = False
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None):
+        for chunk in self._raw.stream(amt, decode_content=True):
+            self._chunks.append(chunk)
+            yield chunk
+        self._save()
+
+    def close(self):
+        if not self._saved:
+            for chunk in self._raw.stream(2 ** 16, decode_content=True):
+                self._chunks.append(chunk)
+            self._save()
+        self._raw.close()
+
+    def _save(self):
+        if not self._saved:
+            self._saved = True
+            self._store.save(self._request.method, self._request.url, self._response.status_code,
+                             self._response.headers, b"".join(self._chunks))
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class _ThrottledBody(io.BytesIO):
+    """A recorded body read no faster than `bandwidth` bytes per second"""
+
+    def __init__(self, body: bytes, bandwidth: Optional[float]):
+        super().__init__(body)
+        self.bandwidth = bandwidth
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        data = super().read(size)
+        if self.bandwidth and data:
+            time.sleep(len(data) / self.bandwidth)
+        return data
+
+
+class FixtureTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records responses of `inner` or replays recorded ones"""
+
+    def __init__(self, fixtures: HTTPFixtures, inner: httpx.AsyncBaseTransport):
+        self.fixtures = fixtures
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self.fixtures.mode == "replay":
+            recording = await asyncio.to_thread(self.fixtures.store.load, request.method, str(request.url))
+            if recording is None:
+                raise httpx.ConnectError(f"No recorded response for {request.method} {request.url}", request=request)
+            if self.fixtures.latency:
+                await asyncio.sleep(self.fixtures.latency)
+            return httpx.Response(recording.status, headers=recording.headers,
+                                  stream=_ReplayStream(recording.body, self.fixtures.bandwidth))
+
+        request.headers["Accept-Encoding"] = "identity"
+        response = await self.inner.handle_async_request(request)
+        return httpx.Response(
+            response.status_code, headers=response.headers, extensions=response.extensions,
+            stream=_RecordingStream(response.stream, self.fixtures.store, request, response)
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, body: bytes, bandwidth: Optional[float], chunk_size: int = 16 * 1024):
+        self.body = body
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+
+    async def __aiter__(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            chunk = self.body[start:start + self.chunk_size]
+            if self.bandwidth:
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+            yield chunk
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Body of a live response, saved as a recording once read; closing it early reads the rest first"""
+
+    def __init__(self, stream, store: FixtureStore, request: httpx.Request, response: httpx.Response):
+        self._stream = stream
+        # One iterator for reading and draining, so closing continues where the reader stopped
+        self._chunks_left = stream.__aiter__()
+        self._store = store
+        self._request = request
+        self._response = response
+        self._chunks = []
+        self._saved = False
+
+    async def __aiter__(self):
+        async for chunk in self._chunks_left:
+            self._chunks.append(chunk)
+            yield chunk
+        await self._save()
+
+    async def aclose(self):
+        try:
+            if not self._saved:
+                async for chunk in self._chunks_left:
+                    self._chunks.append(chunk)
+                await self._save()
+        finally:
+            await self._stream.aclose()
+
+    async def _save(self):
+        if not self._saved:
+            self._saved = True
+            await asyncio.to_thread(self._store.save, self._request.method, str(self._request.url),
+                                    self._response.status_code, self._response.headers, b"".join(self._chunks))
+
+
+def create_http_fixtures() -> Optional[HTTPFixtures]:
+    """Build record/replay fixtures from environment variables, or None for live traffic"""
+    mode = os.getenv("SCRAPE_HTTP_MODE", "live").lower()
+    if mode == "live":
+        return None
+    bandwidth = float(os.getenv("SCRAPE_REPLAY_BANDWIDTH_MB", "0")) * 1024 * 1024
+    return HTTPFixtures(
+        mode,
+        FixtureStore(os.getenv("SCRAPE_FIXTURES_DIR", "fixtures/http")),
+        latency=float(os.getenv("SCRAPE_REPLAY_LATENCY", "0")),
+        bandwidth=bandwidth or None
+    )
+
+
+_shared_fixtures = None
+_shared_fixtures_lock = threading.Lock()
+
+
+def shared_http_fixtures() -> Optional[HTTPFixtures]:
+    """Process-wide record/replay fixtures shared by all scraping sessions, or None for live traffic"""
+    global _shared_fixtures
+    with _shared_fixtures_lock:
+        if _shared_fixtures is None:
+            _shared_fixtures = create_http_fixtures() or False
+    return _shared_fixtures or None
+
+
+def install(session, fixtures: Optional[HTTPFixtures] = None) -> bool:
+    """Mount the record/replay adapter on a requests session; False when traffic is live"""
+    fixtures = fixtures or shared_http_fixtures()
+    if fixtures is None:
+        return False
+    adapter = fixtures.adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return True
@@ -0,0 +1,499 @@
+"""
+Remote Parquet for query_duckdb: S3 and HTTP objects read through a local cache.
+
+`read_parquet('s3://bucket/year=*/court=*/file.parquet')` calls in a query
+are replaced by Arrow datasets over the matching objects, so DuckDB pushes its
+projection and filters down to them: hive partitions (`key=value` path
+segments) that the filter rules out are skipped and only the needed column
+chunks are read, before any of their bytes are fetched. Bucket listings and
+Parquet footers (with the row group statistics) are kept in SQLite and reused
+across queries and restarts; column chunks are fetched with range requests in
+fixed-size blocks that are cached on disk and evicted least recently used.
+
+S3 objects are read anonymously (public buckets) from AWS or from an
+S3-compatible endpoint (S3_ENDPOINT); plain HTTP(S) URLs need servers that
+honour Range requests and cannot contain globs.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the end of a Parquet file for its footer; readers fetch this much at once
+_TAIL_BYTES = 64 * 1024
+_TIMEOUT = (10, 60)
+_GLOB_CHARS = "*?["
+# read_parquet / parquet_scan of a single remote URL, optionally with hive_partitioning
+_REMOTE_SCAN = re.compile(
+    r"\b(?:read_parquet|parquet_scan)\s*\(\s*'((?:s3|https?)://[^']+)'"
+    r"(?:\s*,\s*hive_partitioning\s*=\s*(true|false|1|0))?\s*\)",
+    re.IGNORECASE
+)
+# Datasets (listing plus discovered schema) kept in memory per URL
+_MAX_DATASETS = 64
+
+
+class ObjectInfo(NamedTuple):
+    path: str
+    url: str
+    size: int
+    etag: str
+
+
+class ObjectCache:
+    """
+    SQLite store for object listings (expiring after `listing_ttl` seconds),
+    Parquet footers, and data blocks evicted least recently used beyond `max_bytes`
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024 * 1024, listing_ttl: float = 60):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.listing_ttl = listing_ttl
+        self._stats = {
+            "listing_hits": 0, "listing_misses": 0, "footer_hits": 0, "footer_misses": 0,
+            "block_hits": 0, "block_misses": 0, "evictions": 0,
+        }
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS listings (
+                key TEXT PRIMARY KEY,
+                objects TEXT NOT NULL,
+                listed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS footers (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blocks (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS blocks_accessed ON blocks (accessed_at);
+        """)
+        self._block_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+
+    def listing(self, key: str) -> Optional[List[ObjectInfo]]:
+        with self._lock:
+            row = self._conn.execute("SELECT objects, listed_at FROM listings WHERE key = ?", (key,)).fetchone()
+            fresh = row is not None and time.time() < row[1] + self.listing_ttl
+            self._stats["listing_hits" if fresh else "listing_misses"] += 1
+        return [ObjectInfo(*entry) for entry in json.loads(row[0])] if fresh else None
+
+    def put_listing(self, key: str, objects: List[ObjectInfo]):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO listings (key, objects, listed_at) VALUES (?, ?, ?)",
+                               (key, json.dumps([list(info) for info in objects]), time.time()))
+
+    def footer(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM footers WHERE key = ?", (key,)).fetchone()
+            self._stats["footer_hits" if row else "footer_misses"] += 1
+        return row[0] if row else None
+
+    def put_footer(self, key: str, data: bytes):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO footers (key, data) VALUES (?, ?)", (key, data))
+
+    def block(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blocks WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["block_misses"] += 1
+                return None
+            self._stats["block_hits"] += 1
+            self._conn.execute("UPDATE blocks SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put_block(self, key: str, data: bytes):
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM blocks WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO blocks (key, data, size, accessed_at) VALUES (?, ?, ?, ?)",
+                               (key, data, len(data), time.time()))
+            self._block_bytes += len(data) - (previous[0] if previous else 0)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._conn.executescript("DELETE FROM listings; DELETE FROM footers; DELETE FROM blocks;")
+            self._block_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["blocks"] = self._conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+            stats["block_bytes"] = self._block_bytes
+        return stats
+
+    def _evict(self):
+        """Drop least recently used blocks until under the size cap"""
+        if self._block_bytes <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM blocks ORDER BY accessed_at").fetchall():
+            if self._block_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM blocks WHERE key = ?", (key,))
+            self._stats["evictions"] += 1
+            self._block_bytes -= size
+
+
+class ObjectStore:
+    """S3 and HTTP(S) objects listed and read through an ObjectCache"""
+
+    def __init__(self, cache: ObjectCache, block_size: int = 1024 * 1024, s3_endpoint: str = None,
+                 s3_region: str = "us-east-1", session: requests.Session = None):
+        self.cache = cache
+        self.block_size = block_size
+        self.s3_endpoint = (s3_endpoint or "").rstrip("/")
+        self.s3_region = s3_region
+        self.session = session or requests.Session()
+        self.requests = 0
+        self.bytes_fetched = 0
+        self._datasets: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rewrite(self, sql: str) -> Tuple[str, Dict[str, object]]:
+        """Replace remote read_parquet calls with dataset names; returns the query and the datasets to register"""
+        tables = {}
+
+        def replace(match):
+            name = f"remote_parquet_{len(tables) + 1}"
+            hive = (match.group(2) or "true").lower() in ("true", "1")
+            tables[name] = self.dataset(match.group(1), hive_partitioning=hive)
+            return name
+
+        return _REMOTE_SCAN.sub(replace, sql), tables
+
+    def dataset(self, url: str, hive_partitioning: bool = True):
+        """Arrow dataset over the objects matching a URL (glob), with hive partitions as columns unless disabled"""
+        key = (url, hive_partitioning)
+        with self._lock:
+            cached = self._datasets.get(key)
+            if cached is not None and time.time() < cached[0] + self.cache.listing_ttl:
+                self._datasets.move_to_end(key)
+                return cached[1]
+
+        objects = self.resolve(url)
+        if not objects:
+            raise FileNotFoundError(f"No files match {url}")
+        base_dir = _literal_prefix(_path(url)).rpartition("/")[0]
+        file_format = ds.ParquetFileFormat(
+            default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+        )
+        dataset = ds.dataset(
+            [info.path for info in objects],
+            filesystem=pafs.PyFileSystem(_ObjectFileSystem(self, objects)),
+            format=file_format,
+            partitioning=ds.HivePartitioning.discover(infer_dictionary=False) if hive_partitioning else None,
+            partition_base_dir=base_dir
+        )
+        with self._lock:
+            self._datasets[key] = (time.time(), dataset)
+            while len(self._datasets) > _MAX_DATASETS:
+                self._datasets.popitem(last=False)
+        return dataset
+
+    def resolve(self, url: str) -> List[ObjectInfo]:
+        """The objects a URL names; S3 URLs may contain globs (* within a path segment, ** across)"""
+        parts = urlsplit(url)
+        listing_key = url.split("?")[0]
+        objects = self.cache.listing(listing_key)
+        if objects is not None:
+            return objects
+        if parts.scheme == "s3":
+            objects = self._list_s3(parts)
+        elif any(char in parts.path for char in _GLOB_CHARS):
+            raise ValueError(f"Globs are only supported for s3:// URLs: {url}")
+        else:
+            objects = [self._http_object(url)]
+        self.cache.put_listing(listing_key, objects)
+        return objects
+
+    def read(self, info: ObjectInfo, start: int, end: int) -> bytes:
+        """Bytes [start, end) of an object, from cached blocks where possible"""
+        first, last = start // self.block_size, (end - 1) // self.block_size
+        blocks = {}
+        missing = []
+        for index in range(first, last + 1):
+            data = self.cache.block(self._block_key(info, index))
+            if data is None:
+                missing.append(index)
+            else:
+                blocks[index] = data
+        # Consecutive missing blocks are fetched with one range request
+        for run in _runs(missing):
+            run_start = run[0] * self.block_size
+            data = self.fetch(info.url, run_start, min(info.size, (run[-1] + 1) * self.block_size))
+            for index in run:
+                block = data[(index - run[0]) * self.block_size:(index - run[0] + 1) * self.block_size]
+                self.cache.put_block(self._block_key(info, index), block)
+                blocks[index] = block
+        data = b"".join(blocks[index] for index in range(first, last + 1))
+        offset = start - first * self.block_size
+        return data[offset:offset + end - start]
+
+    def footer(self, info: ObjectInfo) -> bytes:
+        """The last bytes of a Parquet object: its footer, and at least the tail readers fetch with it"""
+        key = f"{info.url}|{info.etag}|{info.size}"
+        data = self.cache.footer(key)
+        if data is None:
+            data = self.fetch(info.url, max(0, info.size - _TAIL_BYTES), info.size)
+            if data[-4:] == b"PAR1":
+                needed = int.from_bytes(data[-8:-4], "little") + 8
+                if needed > len(data):
+                    data = self.fetch(info.url, info.size - needed, info.size - len(data)) + data
+            self.cache.put_footer(key, data)
+        return data
+
+    def fetch(self, url: str, start: int, end: int) -> bytes:
+        response = self.session.get(url, headers={"Range": f"bytes={start}-{end - 1}"}, timeout=_TIMEOUT)
+        response.raise_for_status()
+        data = response.content
+        if response.status_code == 200:
+            # The server ignored the range and sent the whole object
+            data = data[start:end]
+        with self._lock:
+            self.requests += 1
+            self.bytes_fetched += len(response.content)
+        return data
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {"requests": self.requests, "bytes_fetched": self.bytes_fetched}
+        return {**stats, **self.cache.stats()}
+
+    def _block_key(self, info: ObjectInfo, index: int) -> str:
+        return hashlib.sha256(f"{info.url}|{info.etag}|{info.size}|{self.block_size}|{index}".encode()).hexdigest()
+
+    def _s3_url(self, bucket: str, key: str, region: str) -> str:
+        if self.s3_endpoint:
+            return f"{self.s3_endpoint}/{bucket}/{quote(key)}"
+        return f"https://{bucket}.s3.{region}.amazonaws.com/{quote(key)}"
+
+    def _list_s3(self, parts) -> List[ObjectInfo]:
+        """ListObjectsV2 under the pattern's literal prefix, filtered by the glob"""
+        bucket, pattern = parts.netloc, parts.path.lstrip("/")
+        region = parse_qs(parts.query).get("s3_region", [self.s3_region])[0]
+        prefix = _literal_prefix(pattern)
+        matches = re.compile(_glob_regex(pattern)).fullmatch
+        bucket_url = self._s3_url(bucket, "", region)
+        objects, token = [], None
+        while True:
+            params = {"list-type": "2", "prefix": prefix}
+            if token:
+                params["continuation-token"] = token
+            response = self.session.get(bucket_url, params=params, timeout=_TIMEOUT)
+            response.raise_for_status()
+            with self._lock:
+                self.requests += 1
+            root = ElementTree.fromstring(response.content)
+            for contents in _children(root, "Contents"):
+                key = _text(contents, "Key")
+                if matches(key):
+                    objects.append(ObjectInfo(f"{bucket}/{key}", self._s3_url(bucket, key, region),
+                                              int(_text(contents, "Size")), _text(contents, "ETag").strip('"')))
+            if _text(root, "IsTruncated") != "true":
+                return objects
+            token = _text(root, "NextContinuationToken")
+
+    def _http_object(self, url: str) -> ObjectInfo:
+        """Size and ETag of an HTTP object from a small range request"""
+        response = self.session.get(url, headers={"Range": "bytes=0-0"}, timeout=_TIMEOUT)
+        response.raise_for_status()
+        with self._lock:
+            self.requests += 1
+            self.bytes_fetched += len(response.content)
+        content_range = response.headers.get("Content-Range", "")
+        size = int(content_range.rpartition("/")[2]) if response.status_code == 206 else len(response.content)
+        return ObjectInfo(_path(url), url, size, response.headers.get("ETag", "").strip('"'))
+
+
+class _ObjectFile(io.RawIOBase):
+    """Read-only, seekable view of an object; footer reads and block reads go through the store"""
+
+    def __init__(self, store: ObjectStore, info: ObjectInfo):
+        self.store = store
+        self.info = info
+        self._position = 0
+        self._footer = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self.info.size}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        start, end = self._position, min(self.info.size, self._position + len(buffer))
+        if start >= end:
+            return 0
+        if self._footer is None and end > self.info.size - _TAIL_BYTES:
+            self._footer = self.store.footer(self.info)
+        footer_start = self.info.size - len(self._footer) if self._footer is not None else self.info.size
+        if start >= footer_start:
+            data = self._footer[start - footer_start:end - footer_start]
+        else:
+            data = self.store.read(self.info, start, end)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class _ObjectFileSystem(pafs.FileSystemHandler):
+    """Read-only pyarrow filesystem over a fixed set of objects"""
+
+    def __init__(self, store: ObjectStore, objects: List[ObjectInfo]):
+        self.store = store
+        self.objects = {info.path: info for info in objects}
+
+    def get_type_name(self) -> str:
+        return "object-store"
+
+    def equals(self, other) -> bool:
+        return other is self
+
+    def normalize_path(self, path: str) -> str:
+        return path
+
+    def get_file_info(self, paths):
+        infos = []
+        for path in paths:
+            if path in self.objects:
+                infos.append(pafs.FileInfo(path, pafs.FileType.File, size=self.objects[path].size))
+            elif any(name.startswith(path.rstrip("/") + "/") for name in self.objects):
+                infos.append(pafs.FileInfo(path, pafs.FileType.Directory))
+            else:
+                infos.append(pafs.FileInfo(path, pafs.FileType.NotFound))
+        return infos
+
+    def get_file_info_selector(self, selector):
+        prefix = selector.base_dir.rstrip("/") + "/"
+        return [
+            pafs.FileInfo(path, pafs.FileType.File, size=info.size)
+            for path, info in self.objects.items()
+            if path.startswith(prefix) and (selector.recursive or "/" not in path[len(prefix):])
+        ]
+
+    def open_input_file(self, path: str):
+        return pa.PythonFile(_ObjectFile(self.store, self.objects[path]), mode="r")
+
+    def open_input_stream(self, path: str):
+        return self.open_input_file(path)
+
+    def _read_only(self, *args, **kwargs):
+        raise NotImplementedError("Remote objects are read-only")
+
+    create_dir = delete_dir = delete_dir_contents = delete_root_dir_contents = _read_only
+    delete_file = move = copy_file = open_output_stream = open_append_stream = _read_only
+
+
+def _literal_prefix(pattern: str) -> str:
+    """The part of a glob before its first wildcard"""
+    match = re.search(r"[*?\[]", pattern)
+    return pattern[:match.start()] if match else pattern
+
+
+def _glob_regex(pattern: str) -> str:
+    regex = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**", index):
+            regex.append(".*")
+            index += 2
+        elif pattern[index] == "*":
+            regex.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            regex.append("[^/]")
+            index += 1
+        elif pattern[index] == "[" and "]" in pattern[index:]:
+            close = pattern.index("]", index)
+            regex.append("[" + pattern[index + 1:close].replace("!", "^", 1) + "]")
+            index = close + 1
+        else:
+            regex.append(re.escape(pattern[index]))
+            index += 1
+    return "".join(regex)
+
+
+def _path(url: str) -> str:
+    """Path of a URL inside the store's filesystem: bucket or host, then the object path"""
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+def _runs(indexes: List[int]) -> List[List[int]]:
+    runs = []
+    for index in indexes:
+        if runs and runs[-1][-1] == index - 1:
+            runs[-1].append(index)
+        else:
+            runs.append([index])
+    return runs
+
+
+def _children(element, name: str):
+    return [child for child in element if child.tag.rpartition("}")[2] == name]
+
+
+def _text(element, name: str) -> str:
+    children = _children(element, name)
+    return children[0].text or "" if children else ""
+
+
+def create_object_store() -> Optional[ObjectStore]:
+    """
+    Build the object store from environment variables, or None when it is
+    disabled or its cache file cannot be opened (e.g. on a read-only deploy)
+    """
+    if os.getenv("OBJECT_STORE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    path = os.getenv("OBJECT_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "data_analyst_agent", "object_cache.sqlite3")
+    try:
+        cache = ObjectCache(
+            path,
+            max_bytes=int(float(os.getenv("OBJECT_CACHE_MAX_MB", "1024")) * 1024 * 1024),
+            listing_ttl=float(os.getenv("OBJECT_CACHE_LISTING_TTL", "60"))
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Object store disabled, cannot open {path}: {e}")
+        return None
+    return ObjectStore(
+        cache,
+        block_size=int(float(os.getenv("OBJECT_CACHE_BLOCK_KB", "1024")) * 1024),
+        s3_endpoint=os.getenv("S3_ENDPOINT", ""),
+        s3_region=os.getenv("S3_REGION", "us-east-1")
+    )
@@ -0,0 +1,180 @@
+"""
+Streaming page reads for the scraping tools.
+
+A page is downloaded in chunks that are fed to the incremental table parser
+as they arrive. Reading stops at a byte cap, or as soon as the caller has
+what it asked for (the requested table, or enough text), so a large page
+costs neither its full download nor a full parse held in memory. Structured
+files are recognised from the first chunk and streamed to a temporary file.
+"""
+import asyncio
+import itertools
+import queue
+import time
+from typing import AsyncIterator, Callable, List, Optional
+
+import requests
+
+from agent.tools.async_http import AsyncHTTPClient
+from agent.tools.html_tables import STREAM_CHUNK_SIZE, PageTable, StreamParser
+from agent.tools.structured_files import FileDownload, sniff_format
+from agent.tools.table_catalog import CatalogEntry, CatalogPage
+
+# Tells a reader whether the tables and text read so far are enough
+Want = Callable[[List[CatalogEntry], str], bool]
+
+
+class PageReader:
+    """
+    Parses one page chunk by chunk into catalog entries until `want` is met or
+    `max_bytes` are read; without `want` the whole page is read
+    """
+
+    def __init__(self, want: Optional[Want], max_bytes: int, text_chars: int = 0):
+        self.want = want
+        self.max_bytes = max_bytes
+        self.text_chars = text_chars
+        self.parser = StreamParser(text_chars=text_chars)
+        self.entries: List[CatalogEntry] = []
+        self.bytes_read = 0
+        self.truncated = False  # stopped at the byte cap
+        self.satisfied = False  # stopped because the caller had what it needed
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse the next chunk; returns False once no more chunks are needed"""
+        room = self.max_bytes - self.bytes_read
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        self._add(self.parser.feed(chunk))
+        if self.want is not None and self.want(self.entries, self.parser.text):
+            self.satisfied = True
+            return False
+        return not self.truncated
+
+    def close(self):
+        """Parse what is left of the page, unless reading stopped because the caller was satisfied"""
+        if not self.satisfied:
+            self._add(self.parser.close())
+
+    def page(self) -> CatalogPage:
+        return CatalogPage(
+            self.entries,
+            complete=not self.satisfied,
+            truncated=self.truncated,
+            text=self.parser.text if self.text_chars else None
+        )
+
+    def _add(self, tables: List[PageTable]):
+        for table in tables:
+            self.entries.append(CatalogEntry(len(self.entries), table))
+
+
+def read_page(session: requests.Session, url: str, reader: PageReader,
+              timeout=None, total_timeout: Optional[float] = None,
+              max_file_bytes: Optional[int] = None) -> CatalogPage:
+    """
+    Stream a page through `reader` with a requests session, closing the
+    connection as soon as it is done. Structured files (CSV, JSON, Parquet,
+    Excel) are written to a temporary file and read as tables instead.
+    """
+    deadline = time.monotonic() + total_timeout if total_timeout else None
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        chunks = response.iter_content(STREAM_CHUNK_SIZE)
+        head = next(chunks, b"")
+        file_format = sniff_format(response.url, response.headers.get("Content-Type"), head)
+        if file_format is not None:
+            download = FileDownload(file_format, max_file_bytes or reader.max_bytes)
+            try:
+                for chunk in itertools.chain([head], chunks):
+                    if not download.write(chunk):
+                        break
+                    _check_deadline(deadline, url, total_timeout)
+            except BaseException:
+                download.discard()
+                raise
+        else:
+            download = None
+            for chunk in itertools.chain([head], chunks):
+                if not reader.feed(chunk):
+                    break
+                _check_deadline(deadline, url, total_timeout)
+    if download is not None:
+        return file_page(download)
+    reader.close()
+    return reader.page()
+
+
+async def aread_page(client: AsyncHTTPClient, url: str, reader: PageReader,
+                     max_file_bytes: Optional[int] = None) -> CatalogPage:
+    """
+    Stream a page through `reader` with the async client. Chunks are parsed in
+    one worker thread while the next ones download; the download stops once
+    the reader is done or the byte cap is queued. Structured files are read
+    as in read_page.
+    """
+    download = None
+    async with client.stream(url) as body:
+        chunks = body.__aiter__()
+        head = await anext(chunks, b"")
+        file_format = sniff_format(body.url, body.headers.get("Content-Type"), head)
+        if file_format is not None:
+            download = FileDownload(file_format, max_file_bytes or reader.max_bytes)
+            await _adownload(head, chunks, download)
+        else:
+            await _aparse(head, chunks, reader)
+    if download is not None:
+        return await asyncio.to_thread(file_page, download)
+    return reader.page()
+
+
+async def _aparse(head: bytes, chunks: AsyncIterator[bytes], reader: PageReader):
+    pending: "queue.Queue[Optional[bytes]]" = queue.Queue()
+    
+    def parse():
+        for chunk in iter(pending.get, None):
+            if not reader.feed(chunk):
+                break
+        reader.close()
+    
+    parsing = asyncio.ensure_future(asyncio.to_thread(parse))
+    pending.put(head)
+    queued = len(head)
+    try:
+        if queued < reader.max_bytes:
+            async for chunk in chunks:
+                pending.put(chunk)
+                queued += len(chunk)
+                if parsing.done() or queued >= reader.max_bytes:
+                    break
+    finally:
+        pending.put(None)
+        await parsing
+
+
+async def _adownload(head: bytes, chunks: AsyncIterator[bytes], download: FileDownload):
+    try:
+        if download.write(head):
+            async for chunk in chunks:
+                if not download.write(chunk):
+                    break
+    except BaseException:
+        download.discard()
+        raise
+
+
+def file_page(download: FileDownload) -> CatalogPage:
+    """Read a downloaded structured file into a catalog page, one entry per table"""
+    entries = [
+        CatalogEntry.from_frame(index, frame, caption=name)
+        for index, (name, frame) in enumerate(download.read())
+    ]
+    return CatalogPage(entries, complete=True, truncated=download.truncated, text=None,
+                       file_format=download.file_format)
+
+
+def _check_deadline(deadline: Optional[float], url: str, total_timeout: Optional[float]):
+    if deadline is not None and time.monotonic() > deadline:
+        raise requests.Timeout(f"Request to {url} exceeded {total_timeout}s")
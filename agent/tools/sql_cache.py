@@ -0,0 +1,386 @@
+"""
+Result cache for query_duckdb.
+
+Results are keyed on the normalized SQL text (comments dropped, whitespace
+collapsed and case folded outside quoted strings) plus a version fingerprint
+of every source the query reads: size and modification time of local files,
+size and ETag of remote objects, and a content hash of registered datasets.
+A changed file, object or dataset therefore misses the cache on its own.
+Sources are taken from DuckDB's parse tree of the query: the tables of its
+FROM clauses and the paths given to file reader table functions. Queries
+that may not be repeatable (writes, several statements, random() or now()
+and friends) are never cached, and neither are queries reading a source that
+cannot be versioned: another table function, a path that is not a constant,
+or a name that is neither a dataset, a file nor a table of the database.
+Queries over tables of the DuckDB database are only cached while the
+database is unchanged since the result was stored in this process.
+"""
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Single-quoted strings, double-quoted identifiers, comments, or anything else
+_TOKENS = re.compile(r"('(?:[^']|'')*')|(\"(?:[^\"]|\"\")*\")|(--[^\n]*|/\*.*?\*/)|([^'\"\-/]+|[\-/])", re.DOTALL)
+_READ_ONLY = ("select", "with", "from", "values", "(")
+_VOLATILE = re.compile(
+    r"\b(random|uuid|gen_random_uuid|now|today|current_date|current_time|current_timestamp|get_current_time|"
+    r"get_current_timestamp|transaction_timestamp|setseed|nextval|currval|current_setting)\b"
+)
+# Table functions reading the files or objects named by their first argument
+_FILE_READERS = {
+    "read_parquet", "parquet_scan", "read_csv", "read_csv_auto", "read_json", "read_json_auto", "read_json_objects",
+    "read_ndjson", "read_ndjson_auto", "read_ndjson_objects", "read_text", "read_blob", "read_xlsx",
+}
+# Table functions whose rows depend on their arguments only
+_PURE_FUNCTIONS = {"range", "generate_series", "unnest"}
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with comments removed, whitespace collapsed and case folded outside quoted strings"""
+    parts, text = [], []
+    for literal, identifier, comment, other in _TOKENS.findall(sql):
+        if literal or identifier:
+            parts.append(_fold("".join(text)))
+            parts.append(literal or identifier)
+            text = []
+        else:
+            text.append(other or " ")
+    parts.append(_fold("".join(text)))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _fold(text: str) -> str:
+    """Unquoted SQL with whitespace collapsed, dropped around operators, and lower-cased"""
+    text = re.sub(r"\s+", " ", text).lower()
+    return re.sub(r" ?([(),;=<>+*]) ?", r"\1", text)
+
+
+def is_read_only(normalized: str) -> bool:
+    return normalized.startswith(_READ_ONLY)
+
+
+def is_cacheable(normalized: str) -> bool:
+    """Whether a normalized query is a single read-only statement with repeatable results"""
+    unquoted = re.sub(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"", "''", normalized)
+    return is_read_only(unquoted) and ";" not in unquoted and not _VOLATILE.search(unquoted)
+
+
+def source_versions(normalized: str, tables: Dict[str, "pd.DataFrame"], engine) -> Optional[Dict[str, Any]]:
+    """
+    Version fingerprint of every source a query reads, plus the engine's
+    catalog version while its database has tables; None when any source
+    cannot be versioned (see table_sources), when a remote source has no
+    ETag or there is no object store, or when a name is neither a registered
+    dataset, an existing file nor possibly a table of the database
+    """
+    sources = table_sources(engine.parse(normalized))
+    if sources is None:
+        return None
+    catalog = engine.catalog_version()
+    versions: Dict[str, Any] = {}
+    for source in sources:
+        if source in tables:
+            continue
+        if re.match(r"(?:s3|https?)://", source, re.IGNORECASE):
+            if engine.object_store is None:
+                return None
+            objects = engine.object_store.resolve(source)
+            if not objects or not all(info.etag for info in objects):
+                return None
+            versions[source] = [[info.url, info.size, info.etag] for info in objects]
+        else:
+            files = file_versions(source)
+            if files:
+                versions[source] = files
+            elif catalog is None:
+                return None
+    for name, frame in tables.items():
+        versions[name] = frame_version(frame)
+    if catalog is not None:
+        versions["catalog"] = catalog
+    return versions
+
+
+def table_sources(tree: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    The sources of a query from its parse tree (json_serialize_sql): names of
+    base tables other than CTEs, which are datasets, database tables or files
+    DuckDB scans by name, and the paths passed to file reader table functions.
+    None when the query did not parse or reads a source that cannot be named:
+    another table function, or a reader whose path is not a constant.
+    """
+    if tree.get("error", True):
+        return None
+    sources, ctes = [], set()
+    stack: List[Any] = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        # Table references have a type and no class; expressions have both
+        kind = None if "class" in node else node.get("type")
+        if kind == "BASE_TABLE":
+            qualified = node.get("schema_name") or node.get("catalog_name")
+            sources.append((node["table_name"], bool(qualified)))
+        elif kind == "TABLE_FUNCTION":
+            function = node.get("function") or {}
+            name = str(function.get("function_name", "")).lower()
+            if name in _FILE_READERS and function.get("children"):
+                paths = _constant_strings(function["children"][0])
+                if paths is None:
+                    return None
+                sources.extend((path, False) for path in paths)
+            elif name not in _PURE_FUNCTIONS:
+                return None
+        if "cte_map" in node:
+            ctes.update(entry["key"] for entry in node["cte_map"].get("map", []))
+        stack.extend(node.values())
+    names = [name for name, qualified in sources if qualified or name not in ctes]
+    return list(dict.fromkeys(names))
+
+
+def _constant_strings(node: Dict[str, Any]) -> Optional[List[str]]:
+    """The strings of a constant or a list of constants, else None"""
+    if node.get("class") == "CONSTANT":
+        value = node.get("value") or {}
+        if value.get("is_null") or value.get("type", {}).get("id") != "VARCHAR":
+            return None
+        return [value["value"]]
+    if node.get("class") == "FUNCTION" and node.get("function_name") == "list_value":
+        strings = [_constant_strings(child) for child in node.get("children", [])]
+        if strings and all(item is not None for item in strings):
+            return [string for item in strings for string in item]
+    return None
+
+
+def file_versions(pattern: str) -> List[Tuple[str, int, int]]:
+    """(path, size, mtime_ns) of the local files a path or glob matches"""
+    versions = []
+    for path in sorted(glob.glob(os.path.expanduser(pattern), recursive=True)):
+        stat = os.stat(path)
+        versions.append((path, stat.st_size, stat.st_mtime_ns))
+    return versions
+
+
+def frame_version(frame: "pd.DataFrame") -> str:
+    """Content hash of a DataFrame, columns and dtypes included"""
+    import pandas as pd
+
+    digest = hashlib.sha256(json.dumps([[str(name), str(dtype)] for name, dtype in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class SQLResultCache:
+    """
+    Query results in an in-memory LRU tier (bounded by DataFrame memory) in
+    front of a SQLite tier storing them as compressed Arrow IPC, evicted least
+    recently used beyond `max_bytes`. Each entry records the sources it was
+    computed from so they can be invalidated explicitly.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, memory_bytes: int = 128 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        # Results larger than this are only kept in memory
+        self.max_entry_bytes = max_bytes // 4
+
+        self._memory: "OrderedDict[str, Tuple[pd.DataFrame, bool, int, List[str]]]" = OrderedDict()
+        self._memory_size = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0, "invalidations": 0}
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                sql TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                value BLOB NOT NULL,
+                truncated INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        # Bumped by invalidate(); a process whose memory tier is from an older epoch drops it
+        self._conn.execute("CREATE TABLE IF NOT EXISTS epoch (value INTEGER NOT NULL)")
+        if self._conn.execute("SELECT COUNT(*) FROM epoch").fetchone()[0] == 0:
+            self._conn.execute("INSERT INTO epoch (value) VALUES (0)")
+        self._epoch = self._conn.execute("SELECT value FROM epoch").fetchone()[0]
+
+    @staticmethod
+    def key(normalized: str, versions: Dict[str, Any]) -> str:
+        return hashlib.sha256(f"{normalized}\x00{json.dumps(versions, sort_keys=True)}".encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Tuple["pd.DataFrame", bool]]:
+        """The stored (frame, truncated) for a key, or None"""
+        with self._lock:
+            epoch = self._conn.execute("SELECT value FROM epoch").fetchone()[0]
+            if epoch != self._epoch:
+                self._epoch = epoch
+                self._memory.clear()
+                self._memory_size = 0
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                frame, truncated = self._memory[key][:2]
+                return frame, truncated
+
+            row = self._conn.execute("SELECT value, truncated, sources FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._stats["disk_hits"] += 1
+
+        frame = _read_frame(row[0])
+        self._remember(key, frame, bool(row[1]), json.loads(row[2]))
+        return frame, bool(row[1])
+
+    def store(self, key: str, normalized: str, sources: List[str], frame: "pd.DataFrame", truncated: bool):
+        value = _write_frame(frame)
+        if len(value) <= self.max_entry_bytes:
+            now = time.time()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, sql, sources, value, truncated, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, normalized, json.dumps(sources), value, int(truncated), len(value), now, now)
+                )
+                self._stats["writes"] += 1
+                self._evict()
+        self._remember(key, frame, truncated, sources)
+
+    def invalidate(self, source: Optional[str] = None) -> int:
+        """
+        Drop every result, or those computed from sources starting with
+        `source`; returns how many. Memory tiers of all processes sharing the
+        database are dropped on their next lookup.
+        """
+        with self._lock:
+            keys = {
+                key for key, sources in self._conn.execute("SELECT key, sources FROM results").fetchall()
+                if source is None or any(name.startswith(source) for name in json.loads(sources))
+            }
+            keys.update(
+                key for key, entry in self._memory.items()
+                if source is None or any(name.startswith(source) for name in entry[3])
+            )
+            self._conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in keys])
+            self._conn.execute("UPDATE epoch SET value = value + 1")
+            self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_size
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["disk_entries"] = entries
+        stats["disk_bytes"] = size
+        return stats
+
+    def _remember(self, key: str, frame: "pd.DataFrame", truncated: bool, sources: List[str]):
+        size = int(frame.memory_usage(index=False, deep=True).sum())
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            self._forget(key)
+            self._memory[key] = (frame, truncated, size, sources)
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                self._forget(next(iter(self._memory)))
+
+    def _forget(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_size -= entry[2]
+
+    def _evict(self):
+        """Drop least recently used results until under the size cap"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._stats["evictions"] += 1
+            total -= size
+
+
+def _write_frame(frame: "pd.DataFrame") -> bytes:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    options = pa.ipc.IpcWriteOptions(compression="zstd" if pa.Codec.is_available("zstd") else None)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _read_frame(value: bytes) -> "pd.DataFrame":
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(value).read_all().to_pandas()
+
+
+def create_sql_cache() -> Optional[SQLResultCache]:
+    """
+    Build the SQL result cache from environment variables, or None when it
+    is disabled or its file cannot be opened (e.g. on a read-only deploy)
+    """
+    if os.getenv("SQL_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    path = os.getenv("SQL_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "data_analyst_agent", "sql_cache.sqlite3")
+    try:
+        return SQLResultCache(
+            path,
+            max_bytes=int(float(os.getenv("SQL_CACHE_MAX_MB", "512")) * 1024 * 1024),
+            memory_bytes=int(float(os.getenv("SQL_CACHE_MEMORY_MB", "128")) * 1024 * 1024)
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"SQL result cache disabled, cannot open {path}: {e}")
+        return None
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_sql_cache() -> Optional[SQLResultCache]:
+    """Process-wide SQL result cache"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = create_sql_cache() or False
+    return _shared_cache or None
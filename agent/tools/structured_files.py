@@ -0,0 +1,194 @@
+"""
+Structured files (CSV, JSON, Parquet, Excel) fetched by the scraping tools.
+
+Responses are recognised by content type, URL extension or leading bytes,
+streamed to a temporary file and read with native readers (pyarrow's
+multithreaded CSV and JSON readers when pyarrow is installed), so their rows
+become typed DataFrame columns directly instead of page text.
+"""
+import json
+import os
+import tempfile
+from typing import Any, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+except ImportError:  # pragma: no cover - pyarrow is optional for pandas
+    pa = pa_json = None
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "text/tab-separated-values": "tsv",
+    "application/json": "json",
+    "text/json": "json",
+    "application/x-ndjson": "jsonl",
+    "application/ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "application/vnd.ms-excel": "xls",
+}
+_EXTENSIONS = {
+    ".csv": "csv", ".tsv": "tsv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl",
+    ".parquet": "parquet", ".pq": "parquet", ".xlsx": "xlsx", ".xls": "xls",
+}
+# Content types that say nothing about the payload, so the URL and leading bytes decide
+_GENERIC_TYPES = ("", "text/plain", "application/octet-stream", "binary/octet-stream", "application/x-download")
+# Formats that can be cut at the byte cap on a line boundary; the others must be read whole
+_LINE_FORMATS = ("csv", "tsv", "jsonl")
+_DELIMITERS = (",", ";", "\t", "|")
+# Rows per chunk when CSV falls back to pandas' own parser
+_CSV_CHUNK_ROWS = 100_000
+# Nesting levels searched for lists of records in a JSON document
+_JSON_DEPTH = 2
+
+
+def sniff_format(url: str, content_type: Optional[str], head: bytes = b"") -> Optional[str]:
+    """The structured format of a response, or None for pages (HTML and anything unrecognised)"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in _CONTENT_TYPES:
+        return _CONTENT_TYPES[media_type]
+    if media_type not in _GENERIC_TYPES:
+        return None
+    extension = os.path.splitext(urlsplit(url).path.lower())[1]
+    if extension in _EXTENSIONS:
+        return _EXTENSIONS[extension]
+    if head.startswith(b"PAR1"):
+        return "parquet"
+    return None
+
+
+class FileDownload:
+    """A structured response written chunk by chunk to a temporary file, up to `max_bytes`"""
+
+    def __init__(self, file_format: str, max_bytes: int):
+        self.file_format = file_format
+        self.max_bytes = max_bytes
+        self.bytes_written = 0
+        self.truncated = False
+        self._file = tempfile.NamedTemporaryFile(prefix="scrape-", suffix=f".{file_format}", delete=False)
+
+    def write(self, chunk: bytes) -> bool:
+        """Append a chunk; returns False once the cap is reached. Raises ValueError for formats that cannot be cut"""
+        room = self.max_bytes - self.bytes_written
+        if len(chunk) > room:
+            if self.file_format not in _LINE_FORMATS:
+                raise ValueError(f"{self.file_format} file is larger than {self.max_bytes / (1024 * 1024):g} MB")
+            chunk = chunk[:room]
+            self.truncated = True
+        self._file.write(chunk)
+        self.bytes_written += len(chunk)
+        return not self.truncated
+
+    def read(self) -> List[Tuple[Optional[str], pd.DataFrame]]:
+        """Read the downloaded tables as (name, frame) pairs and remove the file"""
+        self._file.close()
+        try:
+            if self.truncated:
+                _drop_partial_line(self._file.name)
+            return read_tables(self._file.name, self.file_format)
+        finally:
+            os.unlink(self._file.name)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self._file.name):
+            os.unlink(self._file.name)
+
+
+def read_tables(path: str, file_format: str) -> List[Tuple[Optional[str], pd.DataFrame]]:
+    """
+    The tables of a structured file as (name, frame) pairs: one for CSV, JSON
+    lines and Parquet, one per sheet for Excel and one per list of records for JSON
+    """
+    if file_format in ("csv", "tsv"):
+        return [(None, _read_csv(path, "\t" if file_format == "tsv" else None))]
+    if file_format == "jsonl":
+        return [(None, _read_json_lines(path))]
+    if file_format == "json":
+        return _read_json(path)
+    if file_format == "parquet":
+        return [(None, pd.read_parquet(path))]
+    try:
+        sheets = pd.read_excel(path, sheet_name=None)
+    except ImportError as e:
+        raise ImportError(f"Reading {file_format} files needs {'openpyxl' if file_format == 'xlsx' else 'xlrd'}: {e}")
+    return [(str(name), frame) for name, frame in sheets.items()]
+
+
+def _read_csv(path: str, delimiter: Optional[str]) -> pd.DataFrame:
+    delimiter = delimiter or _delimiter(path)
+    if pa is not None:
+        try:
+            return pd.read_csv(path, sep=delimiter, engine="pyarrow")
+        except Exception:
+            # Ragged rows and quoting pyarrow rejects; pandas' parser is more forgiving
+            pass
+    chunks = pd.read_csv(path, sep=delimiter, chunksize=_CSV_CHUNK_ROWS, on_bad_lines="skip")
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _delimiter(path: str) -> str:
+    """The most frequent candidate delimiter in the header line"""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        header = file.readline()
+    return max(_DELIMITERS, key=header.count)
+
+
+def _read_json_lines(path: str) -> pd.DataFrame:
+    if pa_json is not None:
+        try:
+            table = pa_json.read_json(path)
+            # Nested objects become dotted columns, as with pd.json_normalize
+            while any(pa.types.is_struct(field.type) for field in table.schema):
+                table = table.flatten()
+            return table.to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    with open(path, "rb") as file:
+        return pd.json_normalize([json.loads(line) for line in file if line.strip()])
+
+
+def _read_json(path: str) -> List[Tuple[Optional[str], pd.DataFrame]]:
+    with open(path, "rb") as file:
+        document = json.load(file)
+    tables = list(_record_lists(document, None, _JSON_DEPTH))
+    if tables:
+        return [(name, pd.json_normalize(records)) for name, records in tables]
+    if isinstance(document, dict) and document and all(isinstance(value, list) for value in document.values()) \
+            and len({len(value) for value in document.values()}) == 1:
+        # Column-oriented: {"year": [...], "gross": [...]}
+        return [(None, pd.DataFrame(document))]
+    if isinstance(document, list):
+        return [(None, pd.DataFrame({"value": document}))]
+    return [(None, pd.json_normalize(document) if isinstance(document, dict) else pd.DataFrame({"value": [document]}))]
+
+
+def _record_lists(value: Any, name: Optional[str], depth: int) -> Iterator[Tuple[Optional[str], list]]:
+    """Lists of objects in a JSON document, named by their key path"""
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        yield name, value
+    elif isinstance(value, dict) and depth > 0:
+        for key, item in value.items():
+            yield from _record_lists(item, f"{name}.{key}" if name else str(key), depth - 1)
+
+
+def _drop_partial_line(path: str):
+    """Cut a file cut short at the byte cap back to its last complete line"""
+    with open(path, "r+b") as file:
+        size = file.seek(0, os.SEEK_END)
+        position = size
+        while position > 0:
+            start = max(0, position - 64 * 1024)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                file.truncate(start + newline + 1)
+                return
+            position = start
@@ -0,0 +1,182 @@
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Union
+
+from agent.tools.html_tables import PageTable, table_frame
+
+if TYPE_CHECKING:
+    # Only for annotations: the agent imports the catalog scope at startup, before pandas is needed
+    import pandas as pd
+
+
+class CatalogEntry:
+    """One table of a page: where it sits, its header signature and its DataFrame"""
+
+    def __init__(self, index: int, table: PageTable):
+        self.index = index
+        self.caption = table.caption
+        self.section = table.section
+        self.classes = table.classes
+        # Rows as parsed, before empty rows and header rows are taken out
+        self.row_count = len(table.rows)
+        self.frame = table_frame(table.rows, clean=True)
+    
+    @classmethod
+    def from_frame(cls, index: int, frame: "pd.DataFrame", caption: Optional[str] = None) -> "CatalogEntry":
+        """An entry for a table read from a structured file (CSV, JSON, Parquet or an Excel sheet)"""
+        entry = cls(index, PageTable([], caption, None, []))
+        # Counted with the header row, like parsed tables
+        entry.row_count = len(frame) + 1
+        entry.frame = frame
+        return entry
+
+    @property
+    def columns(self) -> List[str]:
+        return [str(column) for column in self.frame.columns]
+
+    def summary(self) -> Dict[str, Any]:
+        """Short description of the table for the LLM"""
+        summary: Dict[str, Any] = {"index": self.index}
+        if self.caption:
+            summary["caption"] = self.caption
+        if self.section:
+            summary["section"] = self.section
+        summary["shape"] = list(self.frame.shape)
+        summary["columns"] = self.columns
+        if "wikitable" in self.classes:
+            summary["wikitable"] = True
+        return summary
+
+    def matches(self, terms: List[str]) -> bool:
+        """Whether every term appears in one of the column names (case-insensitive)"""
+        names = [column.lower() for column in self.columns]
+        return all(any(term.lower() in name for name in names) for term in terms)
+
+
+class CatalogPage(NamedTuple):
+    entries: List[CatalogEntry]
+    # Read to the end or the byte cap, rather than stopped once the request was satisfied
+    complete: bool
+    truncated: bool  # stopped at the byte cap
+    text: Optional[str]  # leading page text, when it was collected
+    file_format: Optional[str] = None  # csv, json, parquet... for structured files
+
+
+class TableCatalog:
+    """
+    Tables of recently scraped pages, keyed by URL, for one analysis run.
+
+    A page is parsed once into a catalog of its tables; later requests in the
+    run for another table of the same page are served from memory without
+    downloading or parsing it again. Each run starts with an empty catalog, so
+    a later run fetches the page again (through the HTTP cache, which
+    revalidates it). Pages whose download stopped early hold
+    the tables up to the one that was requested. The least recently used
+    pages are dropped past `max_pages`.
+    """
+
+    def __init__(self, max_pages: int = None):
+        self.max_pages = max_pages if max_pages is not None else int(os.getenv("TABLE_CATALOG_MAX_PAGES", "32"))
+        self._pages: "OrderedDict[str, CatalogPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CatalogPage]:
+        with self._lock:
+            page = self._pages.get(url)
+            if page is not None:
+                self._pages.move_to_end(url)
+            return page
+
+    def put(self, url: str, page: CatalogPage) -> CatalogPage:
+        if self.max_pages > 0:
+            with self._lock:
+                self._pages[url] = page
+                self._pages.move_to_end(url)
+                while len(self._pages) > self.max_pages:
+                    self._pages.popitem(last=False)
+        return page
+
+
+_current_catalog: contextvars.ContextVar = contextvars.ContextVar("table_catalog", default=None)
+_default_catalog = TableCatalog()
+
+
+def current_catalog() -> TableCatalog:
+    """Catalog of the running analysis, or a process-wide one when tools are called directly"""
+    return _current_catalog.get() or _default_catalog
+
+
+def start_catalog(catalog: Optional[TableCatalog] = None) -> contextvars.Token:
+    """Give the current context (one analysis run) its own catalog"""
+    return _current_catalog.set(catalog or TableCatalog())
+
+
+def end_catalog(token: contextvars.Token):
+    """Drop the run's catalog and the pages it holds"""
+    try:
+        _current_catalog.reset(token)
+    except ValueError:
+        # A streamed run closed from another context; that context already discarded the catalog
+        pass
+
+
+def select_table(entries: List[CatalogEntry], table: Optional[int] = None,
+                 match: Union[str, List[str], None] = None,
+                 class_name: Optional[str] = None) -> CatalogEntry:
+    """
+    Pick a table of a page by index, by terms its column names must contain,
+    or else the first table with data (among those with `class_name`).
+    Raises LookupError when no table fits.
+    """
+    if table is not None:
+        index = int(table)
+        if not 0 <= index < len(entries):
+            raise LookupError(f"Table {index} not found, the page has {len(entries)} tables")
+        return entries[index]
+
+    if match:
+        terms = [match] if isinstance(match, str) else list(match)
+        for entry in entries:
+            if len(entry.frame) and entry.matches(terms):
+                return entry
+        raise LookupError(f"No table has columns matching {terms}")
+
+    candidates = [entry for entry in entries if class_name is None or class_name in entry.classes]
+    for entry in candidates:
+        if len(entry.frame):
+            return entry
+    if not candidates:
+        raise LookupError(f"No {class_name or 'table'} found on the page")
+    raise LookupError("No data found in tables")
+
+
+def selection_satisfied(entries: List[CatalogEntry], table: Optional[int] = None,
+                        match: Union[str, List[str], None] = None,
+                        class_name: Optional[str] = None) -> bool:
+    """Whether select_table would find its table among `entries` (without a selection or class: any table)"""
+    if table is not None:
+        return len(entries) > int(table)
+    if match:
+        terms = [match] if isinstance(match, str) else list(match)
+        return any(len(entry.frame) and entry.matches(terms) for entry in entries)
+    if class_name is None:
+        return bool(entries)
+    return any(class_name in entry.classes and len(entry.frame) for entry in entries)
+
+
+def table_location(entry: CatalogEntry, page: CatalogPage) -> Dict[str, Any]:
+    """Which table of the page a result came from"""
+    location: Dict[str, Any] = {"table_index": entry.index}
+    if page.complete:
+        location["tables_on_page"] = len(page.entries)
+    if page.truncated:
+        location["truncated"] = True
+    if page.file_format:
+        location["format"] = page.file_format
+    if entry.caption:
+        location["caption"] = entry.caption
+    if entry.section:
+        location["section"] = entry.section
+    return location
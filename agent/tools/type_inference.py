@@ -0,0 +1,270 @@
+"""
+Column-level type inference for scraped tables.
+
+Scraped cells arrive as strings such as "$2,923,706,026", "1997", "T2",
+"24RK" or "$1.5 bn[a]". Each column is cleaned with vectorized pandas string
+operations (footnote markers, currency symbols, thousands separators and
+placeholder dashes are stripped) and converted when most of its values parse:
+numbers become nullable Int64/Float64 with magnitudes such as "million" or
+"bn" applied (single letters only in amounts like "$1.5m", since "8,848 m"
+is a length), and dates become datetime64. All-digit columns with leading
+zeros, such as ZIP codes, are identifiers and are not converted. Columns
+that do not parse keep their cleaned text. Every column gets a short report
+of what was inferred.
+
+Patterns are handed to pandas as strings rather than compiled objects, so
+string columns backed by pyarrow run them in its RE2 kernels instead of a
+Python loop; they stay within the syntax both regex engines accept.
+"""
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow is optional for pandas
+    pa = pc = None
+
+# Footnote and reference markers: [1], [a], [note 3], [citation needed]
+_FOOTNOTES = re.compile(r"\[[^\[\]]{0,30}\]")
+# Trailing markers Wikipedia uses for ties, re-releases and the like
+_MARKERS = re.compile(r"[†‡§¶*#]+$")
+_WHITESPACE = re.compile(r"\s+")
+_MISSING = re.compile(r"(?i)^(?:|-|—|–|\?|n/?a|none|null|unknown|tba|tbd)$")
+_NUMBER = re.compile(
+    r"(?i)^(?P<prefix>[A-Za-z=]{1,2})?"  # rank and tie codes: T2, =3
+    r"(?P<sign>[-−+])?"
+    r"(?P<currency>[$€£¥₹])?\s?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+)"
+    r"(?:(?P<gap>\s)?(?P<magnitude>thousand|million|billion|trillion|bn|mn|tn|k|m|b)\b)?"
+    r"(?P<percent>\s?%)?"
+    r"(?P<suffix>[A-Za-z]{1,3})?$"  # trailing codes: 24RK, 3F
+)
+_MAGNITUDES = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "mn": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9,
+    "tn": 1e12, "trillion": 1e12,
+}
+# Also units (8,848 m, 273 K, 5km), so only magnitudes when written like "$1.5m"
+_LETTER_MAGNITUDES = ("k", "m", "b")
+# All-digit values, and those of them with leading zeros that a number would drop
+_DIGITS = re.compile(r"^\d+$")
+_LEADING_ZERO = re.compile(r"^0\d")
+# Cheap check before trying date formats
+_DATE_HINT = re.compile(r"\b\d{4}\b|\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b")
+_PARENTHETICAL = re.compile(r"\s*\([^()]*\)$")
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%B %d, %Y", "%d %B %Y", "%b %d, %Y", "%d %b %Y",
+    "%B %Y", "%b %Y", "%m/%d/%Y", "%d/%m/%Y", "%d.%m.%Y",
+)
+# Values checked against each date format before converting the whole column
+_DATE_SAMPLE = 200
+# Values of long columns parsed as numbers before the whole column is; text columns stop there
+_NUMBER_SAMPLE = 1000
+# How far below the threshold a sample may fall and the column still be tried, as samples vary
+_SAMPLE_MARGIN = 0.1
+# Columns where most values carry a code (A4, Q7, 150km) are identifiers, not numbers
+_MAX_CODED_SHARE = 0.5
+# Float64 holds integers exactly up to here
+_MAX_EXACT_INT = 2 ** 53
+
+
+def inference_threshold() -> float:
+    """Share of non-missing values that must parse for a column to be converted"""
+    return float(os.getenv("TYPE_INFERENCE_THRESHOLD", "0.9"))
+
+
+def clean_text(series: pd.Series) -> pd.Series:
+    """Strip footnotes, markers and extra whitespace; placeholder values become missing"""
+    text = series.astype("str")
+    text = text.str.replace(_FOOTNOTES.pattern, "", regex=True)
+    text = text.str.replace(_WHITESPACE.pattern, " ", regex=True).str.strip()
+    text = text.str.replace(_MARKERS.pattern, "", regex=True).str.strip()
+    return text.mask(text.str.match(_MISSING.pattern, na=False))
+
+
+def parse_numbers(text: pd.Series) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Parse cleaned text into Float64, applying signs and magnitudes. Values
+    that do not look like numbers become missing. Returns the numbers and
+    the regex match parts (currency, magnitude, percent, codes) per value.
+    """
+    parts = _number_parts(text)
+    letter = parts["magnitude"].str.lower().isin(_LETTER_MAGNITUDES)
+    ambiguous = (letter & (parts["currency"].isna() | parts["gap"].notna())).to_numpy()
+    if ambiguous.any():
+        # A single letter without a currency symbol right before it may be a unit: leave the value unparsed
+        parts.loc[ambiguous] = None
+    values = pd.to_numeric(parts["number"].str.replace(",", "", regex=False)).astype("Float64")
+    values = values.where(~parts["sign"].isin(["-", "−"]), -values)
+    scale = parts["magnitude"].str.lower().map(_MAGNITUDES)
+    values = values * scale.fillna(1.0).to_numpy()
+    values.name = text.name
+    return values, parts
+
+
+def _number_parts(text: pd.Series) -> pd.DataFrame:
+    """The groups of _NUMBER for every value, missing where the value does not match or the group is empty"""
+    if pc is not None and getattr(text.dtype, "storage", None) == "pyarrow":
+        # One pass of pyarrow's RE2 kernel; pandas runs str.extract as a Python loop
+        groups = pc.extract_regex(pa.array(text.array), _NUMBER.pattern)
+        parts = pd.DataFrame({
+            field.name: pd.Series(values, index=text.index, dtype=text.dtype)
+            for field, values in zip(groups.type, groups.flatten())
+        })
+    else:
+        parts = text.str.extract(_NUMBER.pattern)
+    return parts.mask(parts == "")
+
+
+def parse_numeric(series: pd.Series) -> pd.Series:
+    """
+    Convert a column to Int64/Float64, parsing formatted numbers; unparseable
+    values become missing. Identifier columns (see is_identifier) are
+    returned unchanged.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series
+    text = clean_text(series)
+    if is_identifier(text):
+        return series
+    values, _ = parse_numbers(text)
+    return _narrow(values)
+
+
+def is_identifier(text: pd.Series) -> bool:
+    """Whether cleaned text is all digits with some leading zeros, like ZIP codes, which numbers would truncate"""
+    present = text.dropna()
+    return (len(present) > 0 and bool(present.str.match(_LEADING_ZERO.pattern).any())
+            and bool(present.str.match(_DIGITS.pattern).all()))
+
+
+def infer_column(series: pd.Series, threshold: Optional[float] = None) -> Tuple[pd.Series, Dict[str, Any]]:
+    """Infer the type of one column; returns the converted column and its report"""
+    threshold = inference_threshold() if threshold is None else threshold
+    report: Dict[str, Any] = {"column": str(series.name)}
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        report.update(kind=_kind(series), dtype=str(series.dtype), missing=int(series.isna().sum()))
+        return series, report
+
+    text = clean_text(series)
+    present = int(text.notna().sum())
+    if present == 0:
+        report.update(kind="empty", dtype=str(text.dtype), missing=len(text))
+        return text, report
+
+    if is_identifier(text):
+        report.update(kind="identifier", dtype=str(text.dtype), missing=len(text) - present)
+        return text, report
+
+    if _may_be_numeric(text, present, threshold):
+        values, parts = parse_numbers(text)
+        parsed = int(values.notna().sum())
+        coded = int((parts["prefix"].notna() | parts["suffix"].notna()).sum())
+        if parsed / present >= threshold and coded <= parsed * _MAX_CODED_SHARE:
+            result = _narrow(values)
+            report.update(kind=_kind(result), dtype=str(result.dtype), missing=int(result.isna().sum()))
+            _report_parts(report, parts, unparsed=present - parsed)
+            return result, report
+
+    dates, date_format = _parse_dates(text, present, threshold)
+    if dates is not None:
+        parsed = int(dates.notna().sum())
+        report.update(kind="date", dtype=str(dates.dtype), format=date_format, missing=int(dates.isna().sum()))
+        if present - parsed:
+            report["unparsed"] = present - parsed
+        return dates, report
+
+    report.update(kind="text", dtype=str(text.dtype), missing=len(text) - present)
+    return text, report
+
+
+def infer_types(df: pd.DataFrame, threshold: Optional[float] = None) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """Infer the type of every column of a scraped table; returns the new frame and per-column reports"""
+    columns = {}
+    reports = []
+    for index in range(df.shape[1]):
+        column, report = infer_column(df.iloc[:, index], threshold)
+        columns[index] = column
+        reports.append(report)
+    result = pd.DataFrame(columns)
+    # Column names may repeat, so they are restored positionally
+    result.columns = df.columns
+    return result, reports
+
+
+def numpy_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Nullable Int64/Float64 columns as float64 with NaN, for code that needs plain numpy values"""
+    nullable = {
+        name: "float64" for name, dtype in df.dtypes.items()
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(dtype)
+        and not pd.api.types.is_bool_dtype(dtype)
+    }
+    return df.astype(nullable) if nullable else df
+
+
+def _narrow(values: pd.Series) -> pd.Series:
+    """Float64 to Int64 when every value is a whole number that fits exactly"""
+    present = values.dropna()
+    if len(present) and ((present % 1) == 0).all() and present.abs().max() < _MAX_EXACT_INT:
+        return values.astype("Int64")
+    return values
+
+
+def _kind(values: pd.Series) -> str:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "date"
+    if not pd.api.types.is_numeric_dtype(values):
+        return "text"
+    if pd.api.types.is_integer_dtype(values):
+        present = values.dropna()
+        if len(present) and present.between(1000, 2100).all():
+            return "year"
+        return "integer"
+    return "float"
+
+
+def _report_parts(report: Dict[str, Any], parts: pd.DataFrame, unparsed: int):
+    """Add what was stripped from the values of a numeric column to its report"""
+    currency = parts["currency"].dropna()
+    if len(currency):
+        report["currency"] = str(currency.mode().iloc[0])
+    scaled = int(parts["magnitude"].notna().sum())
+    if scaled:
+        report["scaled"] = scaled
+    if parts["percent"].notna().any():
+        report["unit"] = "%"
+    codes = int((parts["prefix"].notna() | parts["suffix"].notna()).sum())
+    if codes:
+        report["codes_stripped"] = codes
+    if unparsed:
+        report["unparsed"] = unparsed
+
+
+def _may_be_numeric(text: pd.Series, present: int, threshold: float) -> bool:
+    """Whether an evenly spread sample of a long column parses well enough to try the whole column"""
+    if present <= _NUMBER_SAMPLE:
+        return True
+    values = text.dropna()
+    values, _ = parse_numbers(values.iloc[::present // _NUMBER_SAMPLE])
+    return values.notna().mean() >= threshold - _SAMPLE_MARGIN
+
+
+def _parse_dates(text: pd.Series, present: int, threshold: float) -> Tuple[Optional[pd.Series], Optional[str]]:
+    """Convert a column with the first date format most of its values match, or return (None, None)"""
+    if text.str.contains(_DATE_HINT.pattern, na=False).sum() / present < threshold:
+        return None, None
+    # Qualifiers such as "(United States)" after a date
+    text = text.str.replace(_PARENTHETICAL.pattern, "", regex=True)
+    sample = text.dropna().head(_DATE_SAMPLE)
+    for date_format in _DATE_FORMATS:
+        if pd.to_datetime(sample, format=date_format, errors="coerce").notna().mean() < threshold:
+            continue
+        dates = pd.to_datetime(text, format=date_format, errors="coerce")
+        if dates.notna().sum() / present >= threshold:
+            return dates, date_format
+    return None, None
@@ -1,11 +1,14 @@
-import matplotlib.pyplot as plt
 import matplotlib
+import matplotlib.style
+from matplotlib.figure import Figure
 import pandas as pd
 import numpy as np
 import io
 import base64
-import json
 from typing import Dict, List, Any, Union
+from agent.datasets import frame_from_input
+from agent.serialization import dumps, loads
+from agent.tools.type_inference import numpy_dtypes
 
 # Set matplotlib to use non-interactive backend
 matplotlib.use('Agg')
@@ -13,27 +16,54 @@ matplotlib.use('Agg')
 class VisualizationTools:
     def __init__(self):
         # Set default style without seaborn
-        plt.style.use('default')
+        matplotlib.style.use('default')
         print("VisualizationTools initialized (lightweight version for Vercel)")
     
+    def _new_figure(self):
+        """Create a standalone figure; unlike pyplot, it is safe to use from several threads"""
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        return fig, ax
+    
+    def _render_figure(self, fig: Figure) -> str:
+        """Render a figure to a base64 PNG data URI response"""
+        fig.tight_layout()
+        
+        # Convert to base64
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+        image_base64 = base64.b64encode(buffer.getvalue()).decode()
+        
+        data_uri = f"data:image/png;base64,{image_base64}"
+        
+        # Check size limit
+        if len(data_uri) > 100000:
+            return dumps({"error": "Image size exceeds 100,000 bytes limit"})
+        
+        return dumps({
+            "success": True,
+            "data_uri": data_uri,
+            "size": len(data_uri)
+        })
+    
     def create_plot(self, plot_input: str) -> str:
         """Create various types of plots based on input parameters"""
         try:
             # Parse input JSON
-            input_data = json.loads(plot_input)
+            input_data = loads(plot_input)
             plot_type = input_data.get("plot_type", "line")
-            data = input_data.get("data", [])
             title = input_data.get("title", "")
             x_label = input_data.get("x_label", "X")
             y_label = input_data.get("y_label", "Y")
             
-            if not data:
-                return json.dumps({"error": "No data provided for plotting"})
+            # Load the dataset by handle, or build it from inline rows
+            df = numpy_dtypes(frame_from_input(input_data))
             
-            df = pd.DataFrame(data)
+            if df.empty:
+                return dumps({"error": "No data provided for plotting"})
             
             # Create figure
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, ax = self._new_figure()
             
             if plot_type == "line":
                 x_col = input_data.get("x_column")
@@ -67,46 +97,37 @@ class VisualizationTools:
                     ax.set_ylabel(y_col)
             
             ax.set_title(title)
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            data_uri = f"data:image/png;base64,{image_base64}"
-            
-            # Check size limit
-            if len(data_uri) > 100000:
-                return json.dumps({"error": "Image size exceeds 100,000 bytes limit"})
-            
-            return json.dumps({
-                "success": True,
-                "data_uri": data_uri,
-                "size": len(data_uri)
-            })
+            return self._render_figure(fig)
             
         except Exception as e:
-            return json.dumps({"error": f"Plot creation failed: {str(e)}"})
+            return dumps({"error": f"Plot creation failed: {str(e)}"})
     
     def create_scatterplot(self, scatter_input: str) -> str:
         """Create scatterplot with regression line using numpy"""
         try:
             # Parse input JSON
-            input_data = json.loads(scatter_input)
+            input_data = loads(scatter_input)
             x_data = input_data.get("x_data", [])
             y_data = input_data.get("y_data", [])
+            
+            # Columns of a registered dataset can stand in for inline values
+            if input_data.get("dataset"):
+                x_col = input_data.get("x_column")
+                y_col = input_data.get("y_column")
+                if not x_col or not y_col:
+                    return dumps({"error": "x_column and y_column are required with a dataset"})
+                df = numpy_dtypes(frame_from_input({"dataset": input_data["dataset"], "columns": [x_col, y_col]}))
+                x_data = pd.to_numeric(df[x_col], errors="coerce").tolist()
+                y_data = pd.to_numeric(df[y_col], errors="coerce").tolist()
             title = input_data.get("title", "Scatterplot")
             x_label = input_data.get("x_label", "X")
             y_label = input_data.get("y_label", "Y")
             
             if not x_data or not y_data:
-                return json.dumps({"error": "Both x_data and y_data are required"})
+                return dumps({"error": "Both x_data and y_data are required"})
             
             if len(x_data) != len(y_data):
-                return json.dumps({"error": "x_data and y_data must have the same length"})
+                return dumps({"error": "x_data and y_data must have the same length"})
             
             # Convert to numpy arrays
             x = np.array(x_data)
@@ -118,10 +139,10 @@ class VisualizationTools:
             y_clean = y[mask]
             
             if len(x_clean) < 2:
-                return json.dumps({"error": "Not enough valid data points for scatterplot"})
+                return dumps({"error": "Not enough valid data points for scatterplot"})
             
             # Create figure
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, ax = self._new_figure()
             
             # Create scatter plot
             ax.scatter(x_clean, y_clean, alpha=0.6, s=50)
@@ -148,38 +169,19 @@ class VisualizationTools:
             ax.set_xlabel(x_label)
             ax.set_ylabel(y_label)
             ax.set_title(title)
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            data_uri = f"data:image/png;base64,{image_base64}"
-            
-            # Check size limit
-            if len(data_uri) > 100000:
-                return json.dumps({"error": "Image size exceeds 100,000 bytes limit"})
-            
-            return json.dumps({
-                "success": True,
-                "data_uri": data_uri,
-                "size": len(data_uri)
-            })
+            return self._render_figure(fig)
             
         except Exception as e:
-            return json.dumps({"error": f"Scatterplot creation failed: {str(e)}"})
+            return dumps({"error": f"Scatterplot creation failed: {str(e)}"})
     
     def create_from_dataframe(self, df: pd.DataFrame, plot_type: str, x_col: str, y_col: str = None, title: str = "") -> str:
         """Create plot directly from DataFrame"""
         try:
             if df.empty:
-                return json.dumps({"error": "DataFrame is empty"})
+                return dumps({"error": "DataFrame is empty"})
             
             # Create figure
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, ax = self._new_figure()
             
             if plot_type == "line" and y_col:
                 ax.plot(df[x_col], df[y_col], marker='o', linewidth=2)
@@ -202,26 +204,7 @@ class VisualizationTools:
                 ax.set_ylabel(y_col)
             
             ax.set_title(title)
-            plt.tight_layout()
-            
-            # Convert to base64
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            image_base64 = base64.b64encode(buffer.getvalue()).decode()
-            plt.close()
-            
-            data_uri = f"data:image/png;base64,{image_base64}"
-            
-            # Check size limit
-            if len(data_uri) > 100000:
-                return json.dumps({"error": "Image size exceeds 100,000 bytes limit"})
-            
-            return json.dumps({
-                "success": True,
-                "data_uri": data_uri,
-                "size": len(data_uri)
-            })
+            return self._render_figure(fig)
             
         except Exception as e:
-            return json.dumps({"error": f"Plot creation failed: {str(e)}"})
\ No newline at end of file
+            return dumps({"error": f"Plot creation failed: {str(e)}"})
\ No newline at end of file
@@ -1,131 +1,312 @@
+import asyncio
+import os
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlsplit
+from agent.datasets import current_registry
+from agent.serialization import dumps, loads
+from agent.tools import http_cache, http_fixtures
+from agent.tools.async_http import DEFAULT_HEADERS, create_async_client
+from agent.tools.page_stream import PageReader, Want, aread_page, read_page
+from agent.tools.table_catalog import CatalogPage, current_catalog, select_table, selection_satisfied, table_location
+from agent.tools.type_inference import infer_types
+
+# Characters of page text returned for pages without tables
+TEXT_CHARS = 5000
+
+
+def _is_wikipedia(url: str) -> bool:
+    return urlsplit(url).netloc.endswith("wikipedia.org")
+
 
 class WebScrapingTools:
     def __init__(self):
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
+        # Pages are cached on disk and revalidated instead of downloaded on every call,
+        # unless responses are recorded or replayed as fixtures (SCRAPE_HTTP_MODE)
+        if not http_fixtures.install(self.session):
+            http_cache.install(self.session)
+        # (connect, read) timeouts so a hanging site cannot hold a worker thread forever
+        self.timeout = (float(os.getenv("SCRAPE_CONNECT_TIMEOUT", "5")), float(os.getenv("SCRAPE_READ_TIMEOUT", "20")))
+        self.total_timeout = float(os.getenv("SCRAPE_TOTAL_TIMEOUT", "60"))
+        # Pages are streamed and parsed as they download; reading stops here (what was read is still used)
+        self.max_bytes = int(float(os.getenv("SCRAPE_MAX_MB", "20")) * 1024 * 1024)
+        # CSV, JSON, Parquet and Excel files are streamed to a temporary file up to this size
+        self.max_file_bytes = int(float(os.getenv("SCRAPE_MAX_FILE_MB", "200")) * 1024 * 1024)
+        # Pooled client for the awaitable variants
+        self.async_client = create_async_client()
+        # Convert scraped columns to numbers and dates before they are registered
+        self.infer_types = os.getenv("SCRAPE_INFER_TYPES", "true").lower() in ("1", "true", "yes")
+        # Pages one scrape_many call may request
+        self.max_pages_per_call = int(os.getenv("SCRAPE_MANY_MAX_PAGES", "20"))
     
     def scrape_wikipedia(self, url: str) -> str:
         """Scrape Wikipedia pages and extract tabular data"""
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            request = self._table_request(url)
+            page = self._page(request, self._table_wanted(request, 'wikitable'))
+            return self._select_table(page, request, class_name='wikitable')
             
-            # Find all tables on the page
-            tables = soup.find_all('table', {'class': 'wikitable'})
-            
-            if not tables:
-                return json.dumps({"error": "No wikitable found on the page"})
-            
-            # Process the first suitable table (usually the main data table)
-            table_data = []
-            for table in tables:
-                rows = table.find_all('tr')
-                if len(rows) < 2:  # Skip tables with no data rows
-                    continue
-                
-                # Extract headers
-                header_row = rows[0]
-                headers = []
-                for th in header_row.find_all(['th', 'td']):
-                    text = th.get_text(strip=True)
-                    headers.append(text)
-                
-                if not headers:
-                    continue
-                
-                # Extract data rows
-                for row in rows[1:]:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) < len(headers):
-                        continue
-                    
-                    row_data = {}
-                    for i, cell in enumerate(cells[:len(headers)]):
-                        cell_text = cell.get_text(strip=True)
-                        # Clean up common Wikipedia formatting
-                        cell_text = cell_text.replace('\n', ' ').replace('[edit]', '').strip()
-                        if i < len(headers):
-                            row_data[headers[i]] = cell_text
-                    
-                    if row_data:
-                        table_data.append(row_data)
-                
-                # If we found data, break (use first table with data)
-                if table_data:
-                    break
-            
-            if not table_data:
-                return json.dumps({"error": "No data found in tables"})
-            
-            return json.dumps({
-                "success": True,
-                "data": table_data,
-                "headers": headers,
-                "row_count": len(table_data)
-            })
+        except Exception as e:
+            return dumps({"error": f"Failed to scrape Wikipedia: {str(e)}"})
+    
+    async def ascrape_wikipedia(self, url: str) -> str:
+        """Awaitable scrape_wikipedia on the pooled async client; parsing runs in a thread"""
+        try:
+            request = self._table_request(url)
+            page = await self._apage(request, self._table_wanted(request, 'wikitable'))
+            return await asyncio.to_thread(self._select_table, page, request, 'wikitable')
             
         except Exception as e:
-            return json.dumps({"error": f"Failed to scrape Wikipedia: {str(e)}"})
+            return dumps({"error": f"Failed to scrape Wikipedia: {str(e)}"})
     
     def scrape_web(self, url: str) -> str:
         """General web scraping for other sites"""
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Try to find tables first
-            tables = soup.find_all('table')
-            if tables:
-                return self._extract_table_data(tables[0])
-            
-            # If no tables, return text content
-            text_content = soup.get_text(strip=True)
-            return json.dumps({
-                "success": True,
-                "content": text_content[:5000],  # Limit content size
-                "type": "text"
-            })
+            request = self._table_request(url)
+            page = self._page(request, self._web_wanted(request), text_chars=TEXT_CHARS)
+            return self._web_result(page, request)
             
         except Exception as e:
-            return json.dumps({"error": f"Failed to scrape web page: {str(e)}"})
+            return dumps({"error": f"Failed to scrape web page: {str(e)}"})
     
-    def _extract_table_data(self, table) -> str:
-        """Extract data from HTML table"""
+    async def ascrape_web(self, url: str) -> str:
+        """Awaitable scrape_web on the pooled async client; parsing runs in a thread"""
         try:
-            rows = table.find_all('tr')
-            if len(rows) < 2:
-                return json.dumps({"error": "Table has insufficient data"})
+            request = self._table_request(url)
+            page = await self._apage(request, self._web_wanted(request), text_chars=TEXT_CHARS)
+            return await asyncio.to_thread(self._web_result, page, request)
             
-            # Extract headers
-            header_row = rows[0]
-            headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
+        except Exception as e:
+            return dumps({"error": f"Failed to scrape web page: {str(e)}"})
+    
+    def _web_result(self, page: CatalogPage, request: Dict[str, Any]) -> str:
+        """Return the requested table of a page (the first by default), or its text when it has none"""
+        if page.entries and (not request.get("text") or page.file_format):
+            return self._select_table(page, request)
+        
+        # If no tables, return text content
+        result = {
+            "success": True,
+            "content": page.text or "",  # Limited to TEXT_CHARS while parsing
+            "type": "text"
+        }
+        if page.truncated:
+            result["truncated"] = True
+        return dumps(result)
+    
+    def list_tables(self, url: str) -> str:
+        """List every table of a page with its caption, section, shape and column names"""
+        try:
+            request = self._table_request(url)
+            page = self._page(request)
+            return self._table_list(page, request["url"])
             
-            # Extract data
-            table_data = []
-            for row in rows[1:]:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= len(headers):
-                    row_data = {}
-                    for i, cell in enumerate(cells[:len(headers)]):
-                        row_data[headers[i]] = cell.get_text(strip=True)
-                    table_data.append(row_data)
+        except Exception as e:
+            return dumps({"error": f"Failed to list tables: {str(e)}"})
+    
+    async def alist_tables(self, url: str) -> str:
+        """Awaitable list_tables on the pooled async client; parsing runs in a thread"""
+        try:
+            request = self._table_request(url)
+            page = await self._apage(request)
+            return self._table_list(page, request["url"])
             
-            return json.dumps({
-                "success": True,
-                "data": table_data,
-                "headers": headers,
-                "row_count": len(table_data)
-            })
         except Exception as e:
-            return json.dumps({"error": f"Failed to extract table data: {str(e)}"})
\ No newline at end of file
+            return dumps({"error": f"Failed to list tables: {str(e)}"})
+    
+    def scrape_many(self, tool_input: str) -> str:
+        """scrape_wikipedia/scrape_web for several pages in one call; the pages are fetched concurrently"""
+        return asyncio.run(self._scrape_many_closing(tool_input))
+    
+    async def _scrape_many_closing(self, tool_input: str) -> str:
+        try:
+            return await self.ascrape_many(tool_input)
+        finally:
+            # Connections of the async client belong to the event loop of this call
+            await self.async_client.aclose()
+    
+    async def ascrape_many(self, tool_input: str) -> str:
+        """Awaitable scrape_many; fetches share the async client's global and per-host limits"""
+        try:
+            page_requests = self._bulk_requests(tool_input)
+        except Exception as e:
+            return dumps({"error": f"Failed to scrape pages: {str(e)}"})
+        
+        # Several tables of one page are served from a single download
+        by_url: Dict[str, List[Dict[str, Any]]] = {}
+        for request in page_requests:
+            by_url.setdefault(request["url"], []).append(request)
+        outcomes = await asyncio.gather(*(self._ascrape_group(url, group) for url, group in by_url.items()))
+        
+        results = {}
+        for group, outcome in zip(by_url.values(), outcomes):
+            for request, result in zip(group, outcome):
+                results[id(request)] = {"url": request["url"], **result}
+        return dumps({
+            "success": True,
+            "results": [results[id(request)] for request in page_requests]
+        })
+    
+    async def _ascrape_group(self, url: str, group: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fetch one page once and scrape every request for it: as scrape_wikipedia
+        for Wikipedia pages (or with "wikitable": true), otherwise as scrape_web
+        """
+        wikitable = [bool(request.get("wikitable", _is_wikipedia(url))) for request in group]
+        wanted = [
+            self._table_wanted(request, 'wikitable') if only_wikitables else self._web_wanted(request)
+            for request, only_wikitables in zip(group, wikitable)
+        ]
+        
+        def want(entries, text):
+            return all(wants(entries, text) for wants in wanted)
+        
+        try:
+            page = await self._apage(group[0], want, text_chars=0 if all(wikitable) else TEXT_CHARS)
+        except Exception as e:
+            return [{"error": f"Failed to scrape page: {str(e)}"}] * len(group)
+        
+        def scrape():
+            results = []
+            for request, only_wikitables in zip(group, wikitable):
+                try:
+                    if only_wikitables:
+                        result = self._select_table(page, request, class_name='wikitable')
+                    else:
+                        result = self._web_result(page, request)
+                    results.append(loads(result))
+                except Exception as e:
+                    results.append({"error": f"Failed to scrape page: {str(e)}"})
+            return results
+        
+        return await asyncio.to_thread(scrape)
+    
+    def _bulk_requests(self, tool_input: str) -> List[Dict[str, Any]]:
+        """
+        Page requests from a JSON list (or {"pages": [...]}) of URLs or objects
+        with url and optionally table, match, text or wikitable, or from URLs
+        separated by whitespace or commas
+        """
+        tool_input = tool_input.strip()
+        if tool_input[:1] in ("[", "{"):
+            pages = loads(tool_input)
+            if isinstance(pages, dict):
+                pages = pages.get("pages") or pages.get("urls") or []
+        else:
+            pages = tool_input.replace(",", " ").split()
+        
+        page_requests = []
+        for page in pages:
+            request = {"url": page} if isinstance(page, str) else dict(page)
+            if not request.get("url"):
+                raise ValueError("Every page needs a url")
+            page_requests.append(request)
+        if not page_requests:
+            raise ValueError("No URLs provided")
+        if len(page_requests) > self.max_pages_per_call:
+            raise ValueError(f"At most {self.max_pages_per_call} pages per call, got {len(page_requests)}")
+        return page_requests
+    
+    def _page(self, request: Dict[str, Any], want: Optional[Want] = None, text_chars: int = 0) -> CatalogPage:
+        """
+        The catalogued page for a request, streaming it again when the catalog
+        lacks what `want` asks for; without `want` the whole page is needed
+        """
+        page = self._cached_page(request["url"], want, text_chars)
+        if page is None:
+            reader = PageReader(want, self.max_bytes, text_chars)
+            page = read_page(self.session, request["url"], reader, self.timeout, self.total_timeout, self.max_file_bytes)
+            current_catalog().put(request["url"], page)
+        return page
+    
+    async def _apage(self, request: Dict[str, Any], want: Optional[Want] = None, text_chars: int = 0) -> CatalogPage:
+        """Awaitable _page on the pooled async client"""
+        page = self._cached_page(request["url"], want, text_chars)
+        if page is None:
+            reader = PageReader(want, self.max_bytes, text_chars)
+            page = await aread_page(self.async_client, request["url"], reader, self.max_file_bytes)
+            current_catalog().put(request["url"], page)
+        return page
+    
+    def _cached_page(self, url: str, want: Optional[Want], text_chars: int) -> Optional[CatalogPage]:
+        # Pages scraped earlier in this run, so another table of a page needs no refetch
+        page = current_catalog().get(url)
+        if page is None:
+            return None
+        if want is not None and want(page.entries, page.text or ""):
+            return page
+        # Everything the page has was read, and its text too when that may be needed (files have none)
+        if page.complete and (not text_chars or page.text is not None or page.file_format):
+            return page
+        return None
+    
+    @staticmethod
+    def _table_wanted(request: Dict[str, Any], class_name: str = None) -> Want:
+        """Reading a page can stop once the table a request selects has been parsed"""
+        return lambda entries, text: selection_satisfied(entries, request.get("table"), request.get("match"), class_name)
+    
+    def _web_wanted(self, request: Dict[str, Any]) -> Want:
+        if request.get("text"):
+            return lambda entries, text: len(text) >= TEXT_CHARS
+        return self._table_wanted(request)
+    
+    @staticmethod
+    def _table_request(tool_input: str) -> Dict[str, Any]:
+        """A plain URL, or JSON with url and optionally table (index), match (column name terms) or text"""
+        tool_input = tool_input.strip()
+        if not tool_input.startswith("{"):
+            return {"url": tool_input}
+        request = loads(tool_input)
+        if not request.get("url"):
+            raise ValueError("No url provided")
+        return request
+    
+    @staticmethod
+    def _table_list(page: CatalogPage, url: str) -> str:
+        result = {
+            "success": True,
+            "url": url,
+            "tables": [entry.summary() for entry in page.entries]
+        }
+        if page.truncated:
+            result["truncated"] = True
+        return dumps(result)
+    
+    def _select_table(self, page: CatalogPage, request: Dict[str, Any], class_name: str = None) -> str:
+        """Register the table a request asks for, or return an error listing the page's tables"""
+        entries = page.entries
+        try:
+            if request.get("table") is None and not request.get("match") and class_name is None:
+                # Without a selection, general pages use their first table
+                entry = entries[0]
+                if entry.row_count < 2:
+                    return dumps({"error": "Table has insufficient data"})
+            else:
+                entry = select_table(entries, request.get("table"), request.get("match"), class_name)
+        except LookupError as e:
+            return dumps({"error": str(e), "tables": [other.summary() for other in entries]})
+        
+        return self._register_table(entry.frame, request["url"], table_location(entry, page))
+    
+    def _register_table(self, df: pd.DataFrame, source: str = None, location: Dict[str, Any] = None) -> str:
+        """Store a scraped table as a dataset and return its handle, schema and a preview"""
+        report = None
+        if self.infer_types:
+            df, report = infer_types(df)
+        
+        registry = current_registry()
+        handle = registry.add(df)
+        result = {"success": True, **registry.describe(handle)}
+        if report:
+            # What was parsed per column, so the model knows the values are already clean
+            result["type_inference"] = [
+                {key: value for key, value in entry.items() if key != "dtype"} for entry in report
+            ]
+        if source:
+            result["source"] = source
+        if location:
+            result.update(location)
+        return dumps(result)
\ No newline at end of file
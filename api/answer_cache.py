@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache status values reported to clients
+HIT = "HIT"
+MISS = "MISS"
+COALESCED = "COALESCED"
+
+
+class AnswerCache:
+    """
+    TTL-bounded LRU cache of final answers keyed on a hash of the question text.
+
+    Identical questions that arrive while the first one is still running wait on
+    the same task instead of starting another agent run.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    @staticmethod
+    def key(question: str) -> str:
+        return hashlib.sha256(question.strip().encode("utf-8")).hexdigest()
+
+    async def get_or_compute(self, question: str,
+                             compute: Callable[[str], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Return (answer, cache status), running compute only if no answer is cached or in flight"""
+        key = self.key(question)
+
+        answer = self._lookup(key)
+        if answer is not None:
+            self._stats["hits"] += 1
+            return answer, HIT
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+            logger.info(f"Coalescing duplicate question {key[:12]} onto the running analysis")
+            return await asyncio.shield(task), COALESCED
+
+        self._stats["misses"] += 1
+        task = asyncio.ensure_future(compute(question))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        # Shielded so a disconnecting client does not cancel the run other callers wait on
+        return await asyncio.shield(task), MISS
+
+    def get(self, question: str) -> Optional[Any]:
+        """Return a cached answer without computing one, counting the lookup"""
+        answer = self._lookup(self.key(question))
+        self._stats["hits" if answer is not None else "misses"] += 1
+        return answer
+
+    def put(self, question: str, answer: Any):
+        self._store(self.key(question), answer)
+
+    async def analyze(self, question: str, compute: Callable[[str], Awaitable[Any]]) -> Any:
+        answer, _ = await self.get_or_compute(question, compute)
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "hit_rate": (self._stats["hits"] + self._stats["coalesced"]) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, answer = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return answer
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._store(key, task.result())
+
+    def _store(self, key: str, answer: Any):
+        # Failed analyses come back as {"error": ...}; only successful answers are reused
+        if isinstance(answer, dict) and "error" in answer:
+            return
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.time(), answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def create_answer_cache() -> AnswerCache:
+    """Build an AnswerCache configured from environment variables"""
+    return AnswerCache(
+        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+        max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+    )
@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agent.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# Job lifecycle states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobStore:
+    """
+    SQLite-backed store for analysis jobs and their results.
+
+    Several processes may share one database: a job is claimed atomically by
+    the store that runs it, which records itself as the owner and sends
+    heartbeats while it works, so only jobs of an owner that stopped sending
+    them are requeued.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # One shared connection guarded by a lock; every statement is short
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                question TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                heartbeat_at REAL
+            )
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                # Databases created before jobs had owners
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def create(self, question: str) -> Dict[str, Any]:
+        """Insert a new queued job and return it"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, question, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, question, time.time())
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a queued job as running and owned by this store; False when it is not queued (e.g. claimed elsewhere)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, owner = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, now, self.owner, now, job_id, QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self) -> int:
+        """Record that this store's running jobs are still alive; returns how many"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?",
+                (time.time(), self.owner, RUNNING)
+            )
+        return cursor.rowcount
+
+    def complete(self, job_id: str, result: Any):
+        self._finish(job_id, COMPLETED, result=dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, FAILED, error=error)
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None):
+        # Only the owner finishes a job; one requeued from under a stalled owner belongs to its new runner
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND owner = ? "
+                "AND status = ?",
+                (status, result, error, time.time(), job_id, self.owner, RUNNING)
+            )
+
+    def requeue_stale(self, stale_seconds: float) -> List[str]:
+        """Reset running jobs whose owner sent no heartbeat for `stale_seconds` and return their IDs"""
+        cutoff = time.time() - stale_seconds
+        with self._lock:
+            # One write transaction, so two stores cannot both requeue the same job
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND COALESCE(heartbeat_at, started_at, 0) < ? "
+                    "ORDER BY created_at",
+                    (RUNNING, cutoff)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL WHERE id = ?",
+                    [(QUEUED, row["id"]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [row["id"] for row in rows]
+
+    def requeue_unfinished(self, stale_seconds: float) -> List[str]:
+        """Reset jobs of owners that stopped (see requeue_stale) and return all queued job IDs in submission order"""
+        self.requeue_stale(stale_seconds)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at",
+                (QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def purge_expired(self, retention_seconds: float) -> int:
+        """Delete finished jobs older than the retention window"""
+        cutoff = time.time() - retention_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (COMPLETED, FAILED, cutoff)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["result"] = loads(job["result"]) if job["result"] is not None else None
+        return job
+
+
+class JobManager:
+    """
+    Runs queued jobs on a bounded pool of asyncio workers. Every
+    `heartbeat_interval` it renews the heartbeats of its running jobs and
+    requeues those of other processes that missed them for `stale_seconds`.
+    """
+
+    def __init__(self, analyze: Callable[[str], Awaitable[Any]], store: JobStore,
+                 workers: int = 2, retention_seconds: float = 86400,
+                 cleanup_interval: float = 300, heartbeat_interval: float = 30,
+                 stale_seconds: float = 120):
+        self.analyze = analyze
+        self.store = store
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self.cleanup_interval = cleanup_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_seconds = stale_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Queue pending jobs, requeuing those of stopped owners, and start the worker, heartbeat and cleanup tasks"""
+        self._queue = asyncio.Queue()
+        pending = self.store.requeue_unfinished(self.stale_seconds)
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        if pending:
+            logger.info(f"Queued {len(pending)} pending jobs")
+
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        self._tasks.append(asyncio.create_task(self._cleanup()))
+        logger.info(f"Job manager started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, question: str) -> Dict[str, Any]:
+        """Persist a new job and queue it for the workers"""
+        job = self.store.create(question)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(worker_id, job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, worker_id: int, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or not self.store.claim(job_id):
+            # Finished, or claimed by another worker or process sharing the database
+            return
+
+        logger.info(f"[job_{job_id}] Worker {worker_id} starting analysis")
+        start_time = time.time()
+        try:
+            result = await self.analyze(job["question"])
+            if isinstance(result, dict) and "error" in result:
+                # The agent reports a failed analysis as {"error": ...} rather than raising
+                logger.error(f"[job_{job_id}] Failed after {time.time() - start_time:.2f}s: {result['error']}")
+                self.store.fail(job_id, str(result["error"]))
+                return
+            self.store.complete(job_id, result)
+            logger.info(f"[job_{job_id}] Completed in {time.time() - start_time:.2f}s")
+        except asyncio.CancelledError:
+            # Leave the job as running; it is requeued once its heartbeats stop
+            raise
+        except Exception as e:
+            logger.exception(f"[job_{job_id}] Failed after {time.time() - start_time:.2f}s")
+            self.store.fail(job_id, str(e))
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                self.store.heartbeat()
+                for job_id in self.store.requeue_stale(self.stale_seconds):
+                    logger.info(f"[job_{job_id}] Requeued after its owner stopped sending heartbeats")
+                    self._queue.put_nowait(job_id)
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+
+    async def _cleanup(self):
+        while True:
+            try:
+                purged = self.store.purge_expired(self.retention_seconds)
+                if purged:
+                    logger.info(f"Purged {purged} expired jobs")
+            except Exception as e:
+                logger.error(f"Job cleanup failed: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+
+def create_job_manager(analyze: Callable[[str], Awaitable[Any]]) -> JobManager:
+    """Build a JobManager configured from environment variables"""
+    store = JobStore(os.getenv("JOB_DB_PATH") or os.path.join(tempfile.gettempdir(), "data_analyst_agent", "jobs.sqlite3"))
+    return JobManager(
+        analyze,
+        store,
+        workers=int(os.getenv("JOB_WORKERS", "2")),
+        retention_seconds=float(os.getenv("JOB_RETENTION_SECONDS", "86400")),
+        heartbeat_interval=float(os.getenv("JOB_HEARTBEAT_SECONDS", "30")),
+        stale_seconds=float(os.getenv("JOB_STALE_SECONDS", "120"))
+    )
@@ -7,6 +7,8 @@ import sys
 from pathlib import Path
 import asyncio
 
+from agent.serialization import dumps_bytes, loads
+
 # Configure logging for Vercel
 logging.basicConfig(
     level=logging.INFO,
@@ -58,7 +60,7 @@ class VercelHandler(BaseHTTPRequestHandler):
                 "environment": "vercel",
                 "agent_status": agent_status
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(dumps_bytes(response))
             
         elif path == "/" or path == "":
             self.send_response(200)
@@ -79,14 +81,14 @@ class VercelHandler(BaseHTTPRequestHandler):
                     "Basic visualizations"
                 ]
             }
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(dumps_bytes(response))
             
         else:
             self.send_response(404)
             self.send_header('Content-type', 'application/json')
             self.end_headers()
             response = {"error": "Not found"}
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(dumps_bytes(response))
     
     def do_POST(self):
         """Handle POST requests"""
@@ -104,7 +106,7 @@ class VercelHandler(BaseHTTPRequestHandler):
                     self.send_header('Access-Control-Allow-Origin', '*')
                     self.end_headers()
                     response = {"error": "No content provided"}
-                    self.wfile.write(json.dumps(response).encode())
+                    self.wfile.write(dumps_bytes(response))
                     return
                 
                 # Read the request body
@@ -112,7 +114,7 @@ class VercelHandler(BaseHTTPRequestHandler):
                 
                 # Parse JSON request
                 try:
-                    request_data = json.loads(post_data.decode('utf-8'))
+                    request_data = loads(post_data.decode('utf-8'))
                     question = request_data.get('question', '')
                     
                     if not question:
@@ -121,7 +123,7 @@ class VercelHandler(BaseHTTPRequestHandler):
                         self.send_header('Access-Control-Allow-Origin', '*')
                         self.end_headers()
                         response = {"error": "No question provided"}
-                        self.wfile.write(json.dumps(response).encode())
+                        self.wfile.write(dumps_bytes(response))
                         return
                     
                     # Get the agent
@@ -135,7 +137,7 @@ class VercelHandler(BaseHTTPRequestHandler):
                             "error": "Data analysis agent not available",
                             "message": "Please check environment variables and try again"
                         }
-                        self.wfile.write(json.dumps(response).encode())
+                        self.wfile.write(dumps_bytes(response))
                         return
                     
                     # Process the question with the actual agent
@@ -188,7 +190,7 @@ class VercelHandler(BaseHTTPRequestHandler):
                     self.end_headers()
                     response = {"error": "Invalid JSON in request body"}
                 
-                self.wfile.write(json.dumps(response).encode())
+                self.wfile.write(dumps_bytes(response))
                 
             except Exception as e:
                 logger.error(f"Error processing POST request: {str(e)}")
@@ -197,14 +199,14 @@ class VercelHandler(BaseHTTPRequestHandler):
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
                 response = {"error": f"Internal server error: {str(e)}"}
-                self.wfile.write(json.dumps(response).encode())
+                self.wfile.write(dumps_bytes(response))
         else:
             self.send_response(404)
             self.send_header('Content-type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             response = {"error": "Not found"}
-            self.wfile.write(json.dumps(response).encode())
+            self.wfile.write(dumps_bytes(response))
     
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS"""
@@ -238,7 +240,7 @@ def handler(request, context):
                 self.body = data
         
         def get_json(self):
-            return json.loads(self.body.decode('utf-8'))
+            return loads(self.body.decode('utf-8'))
     
     # Parse the request
     if hasattr(request, 'method'):
@@ -270,7 +272,7 @@ def handler(request, context):
         handler_instance.send_header('Content-type', 'application/json')
         handler_instance.end_headers()
         response = {"error": "Method not allowed"}
-        handler_instance.wfile.write(json.dumps(response).encode())
+        handler_instance.wfile.write(dumps_bytes(response))
     
     return {
         'statusCode': handler_instance.wfile.status_code,
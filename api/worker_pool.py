@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Spawned (not forked) workers start from a clean interpreter: no inherited
+# threads, locks or pyplot state from the API process
+_mp_context = multiprocessing.get_context("spawn")
+
+
+def _current_rss_mb() -> float:
+    """Resident set size of the current process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the best we can do without /proc (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+def _worker_main(conn):
+    """Worker process entry point: build the agent once, then serve questions until told to stop"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - [worker %(process)d] %(message)s'
+    )
+
+    # Pay the heavy imports and agent construction up front, before taking work
+    from agent.data_analyst_agent import DataAnalystAgent
+    agent = DataAnalystAgent()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    conn.send(("ready", os.getpid()))
+
+    async def stream(question: str):
+        async for event in agent.astream_analyze(question):
+            conn.send(("event", event, None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        mode, question = message
+        try:
+            if mode == "stream":
+                loop.run_until_complete(stream(question))
+                conn.send(("done", None, _current_rss_mb()))
+            else:
+                result = loop.run_until_complete(agent.analyze(question))
+                conn.send(("ok", result, _current_rss_mb()))
+        except Exception as e:
+            conn.send(("error", str(e), _current_rss_mb()))
+
+    loop.close()
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class _Worker:
+    """Handle for one agent worker process and its pipe"""
+
+    def __init__(self, start_timeout: float):
+        self.conn, child_conn = _mp_context.Pipe()
+        self.process = _mp_context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss_mb = 0.0
+
+        if not self.conn.poll(start_timeout):
+            self.process.kill()
+            raise WorkerCrashed(f"Worker did not become ready within {start_timeout}s")
+        try:
+            _, self.pid = self.conn.recv()
+        except EOFError:
+            raise WorkerCrashed(f"Worker exited during startup with code {self.process.exitcode}")
+
+    def run(self, question: str) -> Any:
+        """Send a question to the worker and block until it answers"""
+        try:
+            self.conn.send(("analyze", question))
+            status, payload, self.rss_mb = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerCrashed(f"Worker {self.pid} died: {e}")
+        self.jobs += 1
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def stream(self, question: str, emit: Callable[[Dict[str, Any]], None]):
+        """Send a question to the worker and pass each progress event to emit until it finishes"""
+        try:
+            self.conn.send(("stream", question))
+            while True:
+                status, payload, rss_mb = self.conn.recv()
+                if status == "event":
+                    emit(payload)
+                    continue
+                self.rss_mb = rss_mb
+                break
+        except (EOFError, OSError) as e:
+            raise WorkerCrashed(f"Worker {self.pid} died: {e}")
+        self.jobs += 1
+        if status == "error":
+            raise RuntimeError(payload)
+
+    def stop(self, timeout: float = 10):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class AgentWorkerPool:
+    """Pool of pre-warmed worker processes, each with its own DataAnalystAgent"""
+
+    def __init__(self, size: int, max_jobs: int = 0, max_rss_mb: float = 0, start_timeout: float = 120):
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.start_timeout = start_timeout
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: Set[_Worker] = set()
+        # Pipe round trips block, so each in-flight job gets a thread to wait on
+        self._threads = ThreadPoolExecutor(max_workers=self.size * 2, thread_name_prefix="agent-worker")
+        self._replacements: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Spawn all workers and wait until each has built its agent"""
+        self._idle = asyncio.Queue()
+        start_time = time.time()
+        workers = await asyncio.gather(*[self._spawn() for _ in range(self.size)])
+        for worker in workers:
+            self._idle.put_nowait(worker)
+        logger.info(f"Started {self.size} agent workers in {time.time() - start_time:.2f}s")
+
+    async def stop(self):
+        for task in self._replacements:
+            task.cancel()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._threads, worker.stop) for worker in list(self._workers)
+        ])
+        self._workers.clear()
+        self._threads.shutdown(wait=False)
+
+    async def analyze(self, question: str) -> Any:
+        """Run an analysis on the next idle worker"""
+        worker = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._threads, worker.run, question)
+        # Hand the worker back only once it has answered, even if the caller gives up
+        future.add_done_callback(lambda f: self._release(worker, f))
+        return await asyncio.shield(future)
+
+    async def astream(self, question: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream progress events for an analysis from the next idle worker"""
+        worker = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def emit(event: Dict[str, Any]):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        future = loop.run_in_executor(self._threads, worker.stream, question, emit)
+        future.add_done_callback(lambda f: self._release(worker, f))
+        # Events are scheduled on the loop before the future resolves, so the sentinel comes last
+        future.add_done_callback(lambda f: events.put_nowait(None))
+
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield event
+
+        if not future.cancelled() and future.exception() is not None:
+            yield {"type": "error", "error": f"Analysis failed: {future.exception()}"}
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "idle": self._idle.qsize() if self._idle else 0,
+            "rss_mb": {worker.pid: round(worker.rss_mb, 1) for worker in self._workers},
+        }
+
+    def _release(self, worker: _Worker, future: asyncio.Future):
+        if not future.cancelled() and isinstance(future.exception(), WorkerCrashed):
+            logger.error(f"Agent worker {worker.pid} crashed; starting a replacement")
+            self._replace(worker)
+        elif self._should_recycle(worker):
+            logger.info(f"Recycling agent worker {worker.pid} after {worker.jobs} jobs "
+                        f"({worker.rss_mb:.0f} MB RSS)")
+            self._replace(worker)
+        else:
+            self._idle.put_nowait(worker)
+
+    def _should_recycle(self, worker: _Worker) -> bool:
+        if self.max_jobs and worker.jobs >= self.max_jobs:
+            return True
+        return bool(self.max_rss_mb and worker.rss_mb > self.max_rss_mb)
+
+    async def _spawn(self) -> _Worker:
+        loop = asyncio.get_running_loop()
+        worker = await loop.run_in_executor(self._threads, _Worker, self.start_timeout)
+        self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker):
+        """Retire a worker and add a fresh one to the idle queue once it is ready"""
+        self._workers.discard(worker)
+
+        async def replace():
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._threads, worker.stop)
+            while True:
+                try:
+                    self._idle.put_nowait(await self._spawn())
+                    return
+                except WorkerCrashed as e:
+                    logger.error(f"Failed to start replacement worker: {e}")
+                    await asyncio.sleep(5)
+
+        task = asyncio.create_task(replace())
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+
+def create_worker_pool(size: int) -> AgentWorkerPool:
+    """Build an AgentWorkerPool configured from environment variables"""
+    return AgentWorkerPool(
+        size,
+        max_jobs=int(os.getenv("AGENT_WORKER_MAX_JOBS", "0")),
+        max_rss_mb=float(os.getenv("AGENT_WORKER_MAX_RSS_MB", "0")),
+        start_timeout=float(os.getenv("AGENT_WORKER_START_TIMEOUT", "120"))
+    )
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Scraping throughput benchmark: blocking requests on a thread pool versus the
+pooled async client.
+
+A local server serves large fixture pages with artificial latency under two
+host names (127.0.0.1 and localhost), and each mode fetches the same set of
+URLs concurrently:
+
+  threads  - requests.Session.get on a pool sized like TOOL_IO_WORKERS
+             (how the synchronous scrape tools run)
+  async    - AsyncHTTPClient.stream with keep-alive, a global cap and a per-host limit
+
+The HTTP cache is bypassed so every fetch reaches the server.
+
+Usage: python benchmarks/bench_async_scraping.py [--fetches 64] [--rows 5000] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import LocalHTTPServer, make_wikitable_page
+
+
+def run_threads(urls, workers: int) -> tuple:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+    session.mount("http://", adapter)
+
+    def fetch(url):
+        response = session.get(url, timeout=(5, 30))
+        response.raise_for_status()
+        return len(response.content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        total = sum(pool.map(fetch, urls))
+    return time.perf_counter() - start, total
+
+
+def run_async(urls, max_connections: int, max_per_host: int) -> tuple:
+    from agent.tools.async_http import AsyncHTTPClient
+
+    client = AsyncHTTPClient(read_timeout=30, max_connections=max_connections, max_per_host=max_per_host)
+
+    async def fetch_all():
+        async def fetch(url):
+            async with client.stream(url) as body:
+                return sum([len(chunk) async for chunk in body])
+
+        try:
+            return sum(await asyncio.gather(*[fetch(url) for url in urls]))
+        finally:
+            await client.aclose()
+
+    start = time.perf_counter()
+    total = asyncio.run(fetch_all())
+    return time.perf_counter() - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fetches", type=int, default=64, help="pages fetched per mode")
+    parser.add_argument("--rows", type=int, default=5000, help="rows in the fixture table (sets page size)")
+    parser.add_argument("--latency", type=float, default=0.2, help="server latency per request in seconds")
+    parser.add_argument("--threads", type=int, default=8, help="thread pool size for the threads mode")
+    parser.add_argument("--max-connections", type=int, default=32)
+    parser.add_argument("--max-per-host", type=int, default=16)
+    args = parser.parse_args()
+
+    page = make_wikitable_page(rows=args.rows)
+    routes = {f"/wiki/Page_{i}": ("text/html", page) for i in range(args.fetches)}
+
+    with LocalHTTPServer(routes, latency=args.latency) as server:
+        port = server.base_url.rsplit(":", 1)[1]
+        hosts = [f"http://127.0.0.1:{port}", f"http://localhost:{port}"]
+        urls = [hosts[i % len(hosts)] + path for i, path in enumerate(routes)]
+
+        print(f"{args.fetches} pages of {len(page) / 1024:.0f} KB, {args.latency * 1000:.0f} ms server latency")
+        print(f"{'mode':<34}{'seconds':>9}{'pages/s':>9}{'MB/s':>8}")
+        results = [
+            (f"threads ({args.threads} workers)", run_threads(urls, args.threads)),
+            (f"async ({args.max_connections} total, {args.max_per_host}/host)",
+             run_async(urls, args.max_connections, args.max_per_host)),
+        ]
+        for mode, (elapsed, total) in results:
+            print(f"{mode:<34}{elapsed:>9.2f}{args.fetches / elapsed:>9.1f}{total / elapsed / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+analyze_data input format benchmark: the same table handed to analyze_data
+in each input format it accepts, at several sizes.
+
+  records   - inline JSON rows, {"data": [{"court": ..., ...}, ...]}
+  columns   - inline JSON columns, {"data": {"court": [...], ...}}
+  arrow     - a base64 Arrow IPC stream, {"arrow": "..."}
+  feather   - an Arrow IPC file on disk (memory-mapped), {"path": "....arrow"}
+  parquet   - a Parquet file, {"path": "....parquet"}
+  csv       - a CSV file, {"path": "....csv"}
+
+"parse" is json.loads plus building the DataFrame; "total" is the whole
+analyze_data call (parse plus the "summary" analysis).
+
+Usage: python benchmarks/bench_data_inputs.py [--rows 10000 100000 1000000] [--runs 3]
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    generator = np.random.default_rng(0)
+    return pd.DataFrame({
+        "court": [f"{number % 25 + 1}_{number % 40 + 1}" for number in range(rows)],
+        "year": generator.integers(2011, 2025, rows),
+        "delay_days": generator.gamma(2.0, 200.0, rows).round(1),
+        "disposal": np.array(["DISMISSED", "ALLOWED", "DISPOSED OFF"])[generator.integers(0, 3, rows)],
+    })
+
+
+def payloads(frame: pd.DataFrame, directory: str) -> dict:
+    """The analyze_data JSON input for every format"""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    paths = {name: os.path.join(directory, f"data.{name}") for name in ("arrow", "parquet", "csv")}
+    feather.write_feather(table, paths["arrow"], compression="uncompressed")
+    frame.to_parquet(paths["parquet"], index=False)
+    frame.to_csv(paths["csv"], index=False)
+    return {
+        "records": {"data": frame.to_dict("records")},
+        "columns": {"data": frame.to_dict("list")},
+        "arrow": {"arrow": base64.b64encode(sink.getvalue().to_pybytes()).decode()},
+        "feather": {"path": paths["arrow"]},
+        "parquet": {"path": paths["parquet"]},
+        "csv": {"path": paths["csv"]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    from agent.datasets import frame_from_input
+    from agent.tools.data_tools import DataTools
+
+    tools = DataTools()
+    print(f"{'rows':>9}  {'format':<9}{'input MB':>9}{'parse ms':>10}{'total ms':>10}")
+    for rows in args.rows:
+        directory = tempfile.mkdtemp(prefix="data-inputs-")
+        for name, payload in payloads(make_frame(rows), directory).items():
+            text = json.dumps({**payload, "analysis_type": "summary"})
+            size = os.path.getsize(payload["path"]) if "path" in payload else len(text)
+            parse, total = [], []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                frame = frame_from_input(json.loads(text))
+                parse.append((time.perf_counter() - start) * 1000)
+                if len(frame) != rows:
+                    raise SystemExit(f"{name}: {len(frame)} rows, expected {rows}")
+                start = time.perf_counter()
+                result = json.loads(tools.analyze_data(text))
+                total.append((time.perf_counter() - start) * 1000)
+                if "error" in result:
+                    raise SystemExit(f"{name}: {result['error']}")
+            print(f"{rows:>9}  {name:<9}{size / 1024 / 1024:>9.1f}{statistics.median(parse):>10.1f}"
+                  f"{statistics.median(total):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
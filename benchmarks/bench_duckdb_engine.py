@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+DuckDB engine benchmark: SQL over local Parquet files shaped like the court
+judgement dataset (one file per year), run two ways.
+
+  fresh    - a new duckdb.connect() per query and fetchall(), with the rows
+             turned into a DataFrame in Python, as a naive tool would
+  engine   - the query_duckdb engine: one long-lived database, a cursor per
+             query and the result fetched as Arrow batches
+
+Fixtures are generated with DuckDB itself into --fixtures (kept, and reused
+when the directory already holds them) or a temporary directory. The default
+size is about 2.5 GB; --rows scales it.
+
+Usage: python benchmarks/bench_duckdb_engine.py [--rows 60000000] [--files 12] [--fixtures DIR] [--runs 3]
+"""
+import argparse
+import glob
+import os
+import statistics
+import tempfile
+import time
+
+import duckdb
+import pandas as pd
+
+QUERIES = {
+    "count": "SELECT COUNT(*) FROM read_parquet('{files}')",
+    "group by": "SELECT court, year, COUNT(*) AS decisions, AVG(delay_days) AS delay FROM read_parquet('{files}') "
+                "GROUP BY court, year ORDER BY decisions DESC",
+    "top court": "SELECT court, COUNT(*) AS decisions FROM read_parquet('{files}') "
+                 "WHERE disposal = 'DISMISSED' GROUP BY court ORDER BY decisions DESC LIMIT 1",
+    "500k rows": "SELECT court, title, decision_date, disposal, delay_days FROM read_parquet('{files}') "
+                 "WHERE disposal = 'ALLOWED' LIMIT 500000",
+}
+
+
+def make_fixtures(directory: str, rows: int, files: int):
+    connection = duckdb.connect()
+    per_file = rows // files
+    for number in range(files):
+        year = 2011 + number
+        connection.execute(f"""
+            COPY (
+                SELECT
+                    (i % 25 + 1) || '~' || (i % 40 + 1) AS court,
+                    'Case ' || i || ' of ' || {year} || ' v. State of ' || (i % 29) AS title,
+                    DATE '{year}-01-01' + CAST(i % 365 AS INTEGER) AS decision_date,
+                    ['DISMISSED', 'ALLOWED', 'DISPOSED OFF', 'WITHDRAWN'][i % 4 + 1] AS disposal,
+                    CAST(hash(i) % 2000 AS INTEGER) AS delay_days,
+                    md5(CAST(i AS VARCHAR)) || md5(CAST(i + 1 AS VARCHAR)) AS description,
+                    {year} AS year
+                FROM range({per_file}) t(i)
+            ) TO '{directory}/judgements_{year}.parquet' (FORMAT parquet)
+        """)
+    connection.close()
+
+
+def fresh(sql: str) -> pd.DataFrame:
+    connection = duckdb.connect()
+    try:
+        cursor = connection.execute(sql)
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=60_000_000)
+    parser.add_argument("--files", type=int, default=12)
+    parser.add_argument("--fixtures", help="directory for the Parquet fixtures (reused if present)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    from agent.tools.duckdb_engine import DuckDBEngine
+
+    directory = args.fixtures or tempfile.mkdtemp(prefix="duckdb-fixtures-")
+    os.makedirs(directory, exist_ok=True)
+    if not glob.glob(os.path.join(directory, "*.parquet")):
+        start = time.perf_counter()
+        make_fixtures(directory, args.rows, args.files)
+        print(f"Generated fixtures in {time.perf_counter() - start:.1f} s")
+    paths = glob.glob(os.path.join(directory, "*.parquet"))
+    size = sum(os.path.getsize(path) for path in paths) / 1024 ** 3
+    pattern = os.path.join(directory, "*.parquet")
+
+    engine = DuckDBEngine(database=":memory:", max_rows=10_000_000)
+    print(f"{len(paths)} Parquet files, {size:.2f} GB in {directory}; engine threads={engine.threads}")
+    print(f"{'query':<11}{'rows':>8}  {'fresh s':>8}{'engine s':>9}")
+    for name, template in QUERIES.items():
+        sql = template.format(files=pattern)
+        timings = {"fresh": [], "engine": []}
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            expected = fresh(sql)
+            timings["fresh"].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            frame = engine.query(sql).frame
+            timings["engine"].append(time.perf_counter() - start)
+            if frame.shape != expected.shape:
+                raise SystemExit(f"{name}: engine returned {frame.shape}, fresh {expected.shape}")
+        print(f"{name:<11}{len(frame):>8}  {statistics.median(timings['fresh']):>8.2f}"
+              f"{statistics.median(timings['engine']):>9.2f}")
+    engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Event-loop responsiveness benchmark for the FastAPI app.
+
+Runs concurrent POST /api/ requests through the real agent (driven by a scripted
+chat model and a local fixture server) while polling GET /health, and reports
+/health latency and /api/ throughput for each tool execution mode:
+
+  blocking  - tools run inline on the event loop (worst case)
+  default   - no async variant; LangChain falls back to the loop's default executor
+  pooled    - async variants on the bounded per-category pools (current behaviour)
+
+Usage: python benchmarks/bench_event_loop.py [--requests 8] [--rows 2000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from common import LocalHTTPServer, make_wikitable_page, percentile, scripted_chat_model, use_dummy_azure_env
+
+
+def configure_tools(agent, mode: str):
+    for tool in agent.agent_executor.tools:
+        if mode == "blocking":
+            async def run_inline(*args, _func=tool.func, **kwargs):
+                return _func(*args, **kwargs)
+            tool.coroutine = run_inline
+        elif mode == "default":
+            tool.coroutine = None
+
+
+async def run_mode(app, mode: str, requests: int, question: bytes) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        health_latencies = []
+        done = asyncio.Event()
+
+        async def poll_health():
+            # Time the full poll cycle minus the sleep, so loop stalls anywhere in it count
+            interval = 0.01
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(interval)
+                await client.get("/health")
+                health_latencies.append(time.perf_counter() - start - interval)
+
+        async def submit():
+            response = await client.post("/api/", files={"file": ("question.txt", question, "text/plain")})
+            response.raise_for_status()
+
+        poller = asyncio.create_task(poll_health())
+        start = time.perf_counter()
+        await asyncio.gather(*[submit() for _ in range(requests)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await poller
+
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed,
+        "health_p50_ms": percentile(health_latencies, 50) * 1000,
+        "health_p95_ms": percentile(health_latencies, 95) * 1000,
+        "health_max_ms": max(health_latencies) * 1000 if health_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=8, help="concurrent /api/ requests per mode")
+    parser.add_argument("--rows", type=int, default=2000, help="rows in the scraped fixture table")
+    parser.add_argument("--server-latency", type=float, default=0.2, help="fixture server latency in seconds")
+    parser.add_argument("--modes", default="blocking,default,pooled")
+    args = parser.parse_args()
+
+    # Configure logging before importing the app so it does not write its log file
+    logging.basicConfig(level=logging.WARNING)
+    use_dummy_azure_env()
+    import local_main
+
+    page = make_wikitable_page(rows=args.rows)
+    scatter = json.dumps({"x_data": list(range(500)), "y_data": [i * 1.5 for i in range(500)]})
+
+    with LocalHTTPServer({"/wiki/Fixture": ("text/html", page)}, latency=args.server_latency) as server:
+        steps = [
+            [("scrape_wikipedia", server.url("/wiki/Fixture"))],
+            [("create_scatterplot", scatter)],
+        ]
+        agent = local_main.get_agent()
+        agent.llm = scripted_chat_model(steps, latency=0.05)
+
+        results = []
+        for mode in args.modes.split(","):
+            agent.agent_executor = agent._setup_agent()
+            agent.agent_executor.verbose = False
+            configure_tools(agent, mode)
+            results.append(asyncio.run(run_mode(local_main.app, mode, args.requests, b"benchmark question")))
+
+    print(f"{'mode':<10}{'elapsed s':>11}{'req/s':>9}{'health p50 ms':>15}{'p95 ms':>10}{'max ms':>10}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['elapsed_s']:>11.2f}{r['throughput_rps']:>9.2f}"
+              f"{r['health_p50_ms']:>15.1f}{r['health_p95_ms']:>10.1f}{r['health_max_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
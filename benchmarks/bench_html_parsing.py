@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+HTML table parsing benchmark: the lxml table-only engine versus BeautifulSoup's
+html.parser (the previous implementation, still used as the fallback).
+
+Each engine parses each fixture in a fresh interpreter, extracting the first
+wikitable into a DataFrame the way scrape_wikipedia does; the script reports
+parse time and the peak RSS growth caused by parsing.
+
+Fixtures are saved Wikipedia pages passed with --html (e.g. a saved copy of
+List_of_highest-grossing_films). Without --html, Wikipedia-shaped pages of a
+few sizes are generated into .cache/bench-fixtures and reused.
+
+Usage: python benchmarks/bench_html_parsing.py [--html page.html ...] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from common import make_wikipedia_article
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+FIXTURE_DIR = REPO_ROOT / ".cache" / "bench-fixtures"
+GENERATED = {
+    "article-200rows.html": dict(rows=200, paragraphs=300, references=500),
+    "article-2000rows.html": dict(rows=2000, paragraphs=1500, references=3000),
+    "article-10000rows.html": dict(rows=10000, paragraphs=3000, references=6000),
+}
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {repo!r})
+import pandas
+from agent.tools.html_tables import iter_tables, table_frame
+content = open({path!r}, "rb").read()
+# Warm up imports and XPath compilation on a tiny page
+table_frame(next(iter_tables(b"<table class='wikitable'><tr><td>x</td></tr></table>", "wikitable", engine={engine!r})))
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+frame = pandas.DataFrame()
+for rows in iter_tables(content, "wikitable", engine={engine!r}):
+    frame = table_frame(rows, clean=True)
+    if len(frame):
+        break
+elapsed = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_growth_kb": after - before, "records": len(frame)}}))
+"""
+
+
+def fixtures(paths) -> list:
+    if paths:
+        return [Path(path) for path in paths]
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    generated = []
+    for name, shape in GENERATED.items():
+        path = FIXTURE_DIR / name
+        if not path.exists():
+            path.write_bytes(make_wikipedia_article(**shape))
+        generated.append(path)
+    return generated
+
+
+def measure(path: Path, engine: str) -> dict:
+    code = CHILD.format(repo=str(REPO_ROOT), path=str(path), engine=engine)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          env={**os.environ, "PYTHONPATH": str(REPO_ROOT)})
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--html", action="append", help="saved HTML page to parse (repeatable)")
+    parser.add_argument("--engines", default="bs4,lxml")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine and page; the median is reported")
+    args = parser.parse_args()
+
+    print(f"{'page':<28}{'KB':>8}{'engine':>8}{'rows':>7}{'parse ms':>10}{'peak RSS +MB':>14}")
+    for path in fixtures(args.html):
+        size_kb = path.stat().st_size / 1024
+        for engine in args.engines.split(","):
+            runs = [measure(path, engine) for _ in range(args.repeat)]
+            seconds = statistics.median(run["seconds"] for run in runs)
+            rss_mb = statistics.median(run["rss_growth_kb"] for run in runs) / 1024
+            print(f"{path.name[:27]:<28}{size_kb:>8.0f}{engine:>8}{runs[0]['records']:>7}"
+                  f"{seconds * 1000:>10.1f}{rss_mb:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+HTTP cache benchmark for the scraping session.
+
+Serves a Wikipedia-sized fixture page from a local server under three caching
+policies and fetches it repeatedly through a cached requests session:
+
+  revalidate  - `Cache-Control: max-age=0, must-revalidate` with an ETag, like
+                Wikipedia; repeat fetches should be 304s with no body
+  max-age     - `Cache-Control: max-age=300`; repeat fetches never reach the server
+  no-store    - never cached; every fetch downloads the page
+
+and once more for the revalidate policy with a forced-freshness window.
+Reports server requests, body bytes sent by the server, and fetch latency.
+
+Usage: python benchmarks/bench_http_cache.py [--fetches 20] [--rows 3000]
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+
+import requests
+
+from common import LocalHTTPServer, make_wikitable_page
+
+
+def make_routes(page: bytes, sent: dict):
+    etag = '"' + hashlib.sha1(page).hexdigest() + '"'
+
+    def route(cache_control):
+        def handler(request):
+            if cache_control != "no-store" and request.headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag, "Cache-Control": cache_control}, b""
+            sent["bytes"] += len(page)
+            return 200, {"Content-Type": "text/html", "ETag": etag, "Cache-Control": cache_control}, page
+        return handler
+
+    return {
+        "/revalidate": route("max-age=0, must-revalidate"),
+        "/max-age": route("max-age=300"),
+        "/no-store": route("no-store"),
+    }
+
+
+def run(server, sent: dict, path: str, fetches: int, force_fresh: float, cache_dir: str) -> dict:
+    from agent.tools.http_cache import HTTPCache, install
+
+    cache = HTTPCache(os.path.join(cache_dir, f"{path.strip('/')}-{force_fresh}.sqlite3"),
+                      force_fresh_seconds=force_fresh)
+    session = install(requests.Session(), cache)
+    requests_before, bytes_before = server.request_count, sent["bytes"]
+    latencies = []
+    for _ in range(fetches):
+        start = time.perf_counter()
+        response = session.get(server.url(path))
+        response.raise_for_status()
+        assert len(response.content) > 0
+        latencies.append(time.perf_counter() - start)
+    return {
+        "server_requests": server.request_count - requests_before,
+        "body_bytes": sent["bytes"] - bytes_before,
+        "first_ms": latencies[0] * 1000,
+        "repeat_ms": statistics.median(latencies[1:]) * 1000 if fetches > 1 else 0.0,
+        "stats": cache.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fetches", type=int, default=20, help="fetches of the same URL per scenario")
+    parser.add_argument("--rows", type=int, default=3000, help="rows in the fixture table")
+    parser.add_argument("--server-latency", type=float, default=0.05, help="fixture server latency in seconds")
+    args = parser.parse_args()
+
+    page = make_wikitable_page(rows=args.rows)
+    sent = {"bytes": 0}
+    scenarios = [
+        ("revalidate", "/revalidate", 0),
+        ("max-age", "/max-age", 0),
+        ("no-store", "/no-store", 0),
+        ("revalidate+force 60s", "/revalidate", 60),
+    ]
+
+    print(f"page size {len(page) / 1024:.0f} KB, {args.fetches} fetches per scenario")
+    print(f"{'scenario':<22}{'requests':>10}{'body KB':>10}{'first ms':>10}{'repeat ms':>11}"
+          f"{'hits':>6}{'304s':>6}")
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            LocalHTTPServer(make_routes(page, sent), latency=args.server_latency) as server:
+        for name, path, force_fresh in scenarios:
+            r = run(server, sent, path, args.fetches, force_fresh, cache_dir)
+            print(f"{name:<22}{r['server_requests']:>10}{r['body_bytes'] / 1024:>10.0f}{r['first_ms']:>10.1f}"
+                  f"{r['repeat_ms']:>11.1f}{r['stats']['hits']:>6}{r['stats']['revalidated']:>6}")
+
+
+if __name__ == "__main__":
+    main()
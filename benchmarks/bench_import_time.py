@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: import time and peak RSS of the API entry points.
+
+Each scenario runs in a fresh interpreter under `python -X importtime` and
+reports wall time, peak RSS and the packages that dominate import time.
+
+Compare dependency sets by passing one interpreter per virtualenv, or let the
+script build them from requirements.txt and requirements-vercel.txt:
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --create-venvs
+    python benchmarks/bench_import_time.py --python .venv/bin/python --python /path/to/other/python
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+VENV_ROOT = REPO_ROOT / ".cache" / "bench-venvs"
+REQUIREMENT_SETS = {
+    "full": REPO_ROOT / "requirements.txt",
+    "vercel": REPO_ROOT / "requirements-vercel.txt",
+}
+
+SCENARIOS = {
+    "import local_main": "import local_main",
+    "import api.main": "import api.main",
+    "build agent": "from agent.data_analyst_agent import DataAnalystAgent; DataAnalystAgent()",
+}
+
+CHILD_TEMPLATE = """
+import time, resource
+_start = time.perf_counter()
+{statement}
+_elapsed = time.perf_counter() - _start
+import json
+print("@@RESULT@@" + json.dumps({{"seconds": _elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def create_venvs() -> list:
+    interpreters = []
+    for name, requirements in REQUIREMENT_SETS.items():
+        venv = VENV_ROOT / name
+        python = venv / "bin" / "python"
+        if not python.exists():
+            print(f"Creating {name} virtualenv in {venv}...")
+            subprocess.run([sys.executable, "-m", "venv", str(venv)], check=True)
+            subprocess.run([str(python), "-m", "pip", "install", "-q", "-r", str(requirements)], check=True)
+        interpreters.append((name, str(python)))
+    return interpreters
+
+
+def run_scenario(python: str, statement: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(REPO_ROOT)
+    env.setdefault("AZURE_OPENAI_API_KEY", "benchmark")
+    env.setdefault("AZURE_OPENAI_ENDPOINT", "https://benchmark.openai.azure.com/")
+    env.setdefault("AZURE_OPENAI_DEPLOYMENT_NAME", "benchmark")
+
+    # Run from a scratch directory so the API's log file is not written into the repo
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run(
+            [python, "-X", "importtime", "-c", CHILD_TEMPLATE.format(statement=statement)],
+            cwd=cwd, env=env, capture_output=True, text=True
+        )
+
+    result_lines = [line for line in proc.stdout.splitlines() if line.startswith("@@RESULT@@")]
+    if proc.returncode != 0 or not result_lines:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    result = json.loads(result_lines[-1][len("@@RESULT@@"):])
+
+    # Aggregate self time (microseconds) by top-level package
+    by_package = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if self_us.isdigit():
+            by_package[name.split(".")[0]] += int(self_us)
+    result["top_packages"] = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:5]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--python", action="append", help="interpreter to measure (repeatable)")
+    parser.add_argument("--create-venvs", action="store_true",
+                        help="build and measure virtualenvs for requirements.txt and requirements-vercel.txt")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the median is reported")
+    args = parser.parse_args()
+
+    if args.create_venvs:
+        interpreters = create_venvs()
+    elif args.python:
+        interpreters = [(python, python) for python in args.python]
+    else:
+        interpreters = [("current", sys.executable)]
+
+    for label, python in interpreters:
+        print(f"\n== {label} ({python})")
+        print(f"{'scenario':<20}{'seconds':>10}{'peak RSS MB':>14}  top packages by import time")
+        for scenario, statement in SCENARIOS.items():
+            runs = [run_scenario(python, statement) for _ in range(args.repeat)]
+            failures = [run for run in runs if "error" in run]
+            if failures:
+                print(f"{scenario:<20}{'error':>10}{'':>14}  {failures[0]['error']}")
+                continue
+            seconds = statistics.median(run["seconds"] for run in runs)
+            rss_mb = statistics.median(run["max_rss_kb"] for run in runs) / 1024
+            top = ", ".join(f"{name} {us / 1e6:.2f}s" for name, us in runs[-1]["top_packages"])
+            print(f"{scenario:<20}{seconds:>10.3f}{rss_mb:>14.1f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Parallel tool call benchmark for the agent executor.
+
+Drives the agent with a scripted chat model that asks for several scrapes in
+its first turn and several scatterplots in its second (like a multi-part
+question), against a local fixture server with per-request latency, and reports
+wall time per run and per agent iteration for each tool call concurrency limit.
+
+Usage: python benchmarks/bench_parallel_tools.py [--calls 4] [--concurrency 1,2,4]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+
+from common import LocalHTTPServer, make_wikitable_page, scripted_chat_model, use_dummy_azure_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=4, help="tool calls per agent turn")
+    parser.add_argument("--rows", type=int, default=500, help="rows in each fixture table")
+    parser.add_argument("--server-latency", type=float, default=0.3, help="fixture server latency in seconds")
+    parser.add_argument("--concurrency", default="1,2,4", help="tool call limits to compare")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per limit; the median is reported")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    use_dummy_azure_env()
+    from agent.data_analyst_agent import DataAnalystAgent
+
+    page = make_wikitable_page(rows=args.rows, columns=4)
+    routes = {f"/wiki/Table_{i}": ("text/html", page) for i in range(args.calls)}
+
+    with LocalHTTPServer(routes, latency=args.server_latency) as server:
+        plot = {"x_column": "Column 0", "y_column": "Column 0"}
+        steps = [
+            [("scrape_wikipedia", server.url(path)) for path in routes],
+            [("create_scatterplot", json.dumps({**plot, "dataset": f"ds_{i + 1}"})) for i in range(args.calls)],
+        ]
+        agent = DataAnalystAgent()
+        agent.llm = scripted_chat_model(steps)
+        agent.agent_executor = agent._setup_agent()
+        agent.agent_executor.verbose = False
+        # Warm up: tool class imports and the first matplotlib figure are not what is measured
+        asyncio.run(agent.analyze("warm-up"))
+
+        print(f"{'limit':<8}{'run s':>9}{'s/iteration':>13}")
+        for limit in [int(value) for value in args.concurrency.split(",")]:
+            agent.agent_executor = agent._setup_agent()
+            agent.agent_executor.verbose = False
+            agent.agent_executor.max_concurrency = limit
+
+            runs = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = asyncio.run(agent.analyze("benchmark question"))
+                runs.append(time.perf_counter() - start)
+                if isinstance(result, dict) and "error" in result:
+                    raise SystemExit(f"Run failed: {result['error']}")
+            elapsed = statistics.median(runs)
+            print(f"{limit:<8}{elapsed:>9.2f}{elapsed / (len(steps) + 1):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Remote Parquet benchmark: query_duckdb SQL over a hive-partitioned bucket
+(year=*/court=*/metadata.parquet, shaped like the court judgement dataset)
+served by a local S3-compatible stand-in with per-request latency.
+
+  download - list the bucket and download every matching file on each query,
+             then run the SQL on the local copies (re-listing and re-reading
+             everything, as each run did before)
+  cold     - the object store with an empty cache: partitions the filter
+             rules out and unused columns are never fetched
+  warm     - a new engine and store over the cache the cold run filled, as
+             after a restart: listings, footers and blocks come from disk
+
+Usage: python benchmarks/bench_remote_parquet.py [--years 8] [--courts 25] [--rows 20000] [--latency 0.03]
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+from urllib.parse import quote
+
+import duckdb
+import requests
+
+from common import LocalHTTPServer, s3_routes
+
+BUCKET = "judgments"
+URL = f"s3://{BUCKET}/metadata/parquet/year=*/court=*/metadata.parquet?s3_region=ap-south-1"
+QUERIES = {
+    "top court 2019-22": "SELECT court, COUNT(*) AS decisions FROM read_parquet('{url}') "
+                         "WHERE year BETWEEN 2019 AND 2022 GROUP BY court ORDER BY decisions DESC LIMIT 1",
+    "delay by year": "SELECT year, AVG(date_diff('day', date_of_registration, decision_date)) AS delay "
+                     "FROM read_parquet('{url}') WHERE court = '33_10' GROUP BY year ORDER BY year",
+}
+
+
+def make_objects(years: int, courts: int, rows: int):
+    """Generate the partitioned files with DuckDB and return them as {key: bytes}"""
+    directory = tempfile.mkdtemp(prefix="remote-parquet-")
+    connection = duckdb.connect()
+    connection.execute(f"""
+        COPY (
+            SELECT
+                (2024 - i % {years}) AS year,
+                (33 - (i // {years}) % {courts}) || '_10' AS court,
+                'Case ' || i || ' v. State' AS title,
+                DATE '2010-01-01' + CAST(i % 4000 AS INTEGER) AS date_of_registration,
+                DATE '2010-01-01' + CAST(i % 4000 + hash(i) % 900 AS INTEGER) AS decision_date,
+                ['DISMISSED', 'ALLOWED', 'DISPOSED OFF'][i % 3 + 1] AS disposal_nature,
+                md5(CAST(i AS VARCHAR)) || md5(CAST(-i AS VARCHAR)) || md5(CAST(i * 7 AS VARCHAR)) AS description
+            FROM range({years * courts * rows}) t(i)
+        ) TO '{directory}' (FORMAT parquet, PARTITION_BY (year, court))
+    """)
+    connection.close()
+    objects = {}
+    for path in glob.glob(os.path.join(directory, "**", "*.parquet"), recursive=True):
+        partition = os.path.relpath(os.path.dirname(path), directory)
+        with open(path, "rb") as file:
+            objects[f"metadata/parquet/{partition}/metadata.parquet"] = file.read()
+    shutil.rmtree(directory)
+    return objects
+
+
+def download(server, objects, sql: str):
+    """Fetch every object of the bucket, then query local copies; returns (rows, requests, bytes)"""
+    directory = tempfile.mkdtemp(prefix="remote-download-")
+    fetched = 0
+    try:
+        requests.get(f"{server.base_url}/{BUCKET}/", params={"list-type": "2"}, timeout=60)
+        for key in objects:
+            response = requests.get(f"{server.base_url}/{BUCKET}/{quote(key)}", timeout=60)
+            response.raise_for_status()
+            body = response.content
+            fetched += len(body)
+            path = os.path.join(directory, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(body)
+        local = sql.replace(URL, os.path.join(directory, "metadata/parquet/*/*/metadata.parquet"))
+        rows = duckdb.connect().execute(local).fetchall()
+    finally:
+        shutil.rmtree(directory)
+    return rows, len(objects) + 1, fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--courts", type=int, default=25)
+    parser.add_argument("--rows", type=int, default=20_000, help="rows per partition file")
+    parser.add_argument("--latency", type=float, default=0.03, help="server latency per request in seconds")
+    args = parser.parse_args()
+
+    from agent.tools.duckdb_engine import DuckDBEngine
+    from agent.tools.object_store import ObjectCache, ObjectStore
+
+    objects = make_objects(args.years, args.courts, args.rows)
+    size = sum(len(body) for body in objects.values()) / 1024 / 1024
+    with LocalHTTPServer(s3_routes(BUCKET, objects), latency=args.latency) as server:
+
+        def engine(cache_path: str):
+            store = ObjectStore(ObjectCache(cache_path), s3_endpoint=server.base_url)
+            return store, DuckDBEngine(database=":memory:", object_store=store)
+
+        print(f"{len(objects)} files, {size:.0f} MB, {args.latency * 1000:.0f} ms per request")
+        print(f"{'query':<19}{'mode':<10}{'seconds':>8}{'requests':>10}{'MB fetched':>12}")
+        for name, template in QUERIES.items():
+            sql = template.format(url=URL)
+            start = time.perf_counter()
+            expected, requests_made, fetched = download(server, objects, sql)
+            print(f"{name:<19}{'download':<10}{time.perf_counter() - start:>8.2f}{requests_made:>10}"
+                  f"{fetched / 1024 / 1024:>12.1f}")
+            cache_path = os.path.join(tempfile.mkdtemp(prefix="object-cache-"), "object_cache.sqlite3")
+            for mode in ("cold", "warm"):
+                store, duckdb_engine = engine(cache_path)
+                start = time.perf_counter()
+                frame = duckdb_engine.query(sql).frame
+                elapsed = time.perf_counter() - start
+                if [tuple(row) for row in frame.itertuples(index=False)] != [tuple(row) for row in expected]:
+                    raise SystemExit(f"{name} ({mode}): results differ from the downloaded files")
+                stats = store.stats()
+                print(f"{name:<19}{mode:<10}{elapsed:>8.2f}{stats['requests']:>10}"
+                      f"{stats['bytes_fetched'] / 1024 / 1024:>12.1f}")
+                duckdb_engine.close()
+
+
+if __name__ == "__main__":
+    main()
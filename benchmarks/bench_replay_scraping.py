@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Replay scraping benchmark: the scrape pipeline (download, table parsing, type
+inference and dataset registration) run against recorded HTTP fixtures, so
+its timings do not depend on the network.
+
+Without --fixtures, Wikipedia-shaped fixture pages are served locally once
+and recorded through the scraping tools (SCRAPE_HTTP_MODE=record); the server
+is then stopped and every run replays the recordings with the given latency
+and bandwidth. With --fixtures, an existing recording is replayed instead,
+e.g. one made by running the API with SCRAPE_HTTP_MODE=record against real
+sites. Each run lists the tables of every recorded page with a fresh tool
+instance.
+
+Usage: python benchmarks/bench_replay_scraping.py [--fixtures DIR] [--runs 5] [--latency 0.1] [--bandwidth-mb 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from common import LocalHTTPServer, make_wikipedia_article
+
+
+def scraping_tools(fixtures):
+    from agent.tools import http_fixtures
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    tools = WebScrapingTools()
+    http_fixtures.install(tools.session, fixtures)
+    return tools
+
+
+def record(directory: str, pages: int, rows: int):
+    from agent.tools.http_fixtures import FixtureStore, HTTPFixtures
+
+    page = make_wikipedia_article(rows=rows, paragraphs=300, references=500)
+    routes = {f"/wiki/Article_{n}": ("text/html", page) for n in range(pages)}
+    with LocalHTTPServer(routes) as server:
+        tools = scraping_tools(HTTPFixtures("record", FixtureStore(directory)))
+        for path in routes:
+            json.loads(tools.list_tables(server.url(path)))
+
+
+def run(fixtures, urls) -> float:
+    tools = scraping_tools(fixtures)
+    start = time.perf_counter()
+    for url in urls:
+        result = json.loads(tools.list_tables(url))
+        if "error" in result:
+            raise SystemExit(f"{url}: {result['error']}")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory of recorded responses to replay")
+    parser.add_argument("--pages", type=int, default=10, help="fixture pages to record without --fixtures")
+    parser.add_argument("--rows", type=int, default=2000, help="rows in each fixture page's main table")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated seconds before each response")
+    parser.add_argument("--bandwidth-mb", type=float, default=10, help="simulated MB/s per response (0: unlimited)")
+    args = parser.parse_args()
+    os.environ["HTTP_CACHE_ENABLED"] = "false"
+
+    from agent.tools.http_fixtures import FixtureStore, HTTPFixtures
+
+    directory = args.fixtures
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="replay-fixtures-")
+        record(directory, args.pages, args.rows)
+    store = FixtureStore(directory)
+    urls = [url for method, url, status in store.recordings() if method == "GET" and status == 200]
+    if not urls:
+        raise SystemExit(f"No recorded pages in {directory}")
+    fixtures = HTTPFixtures("replay", store, latency=args.latency, bandwidth=args.bandwidth_mb * 1024 * 1024 or None)
+
+    print(f"{len(urls)} recorded pages from {directory}, {args.latency * 1000:.0f} ms latency, "
+          f"{args.bandwidth_mb or 'unlimited'} MB/s")
+    timings = [run(fixtures, urls) for _ in range(args.runs)]
+    print(f"{'run':<6}{'seconds':>9}")
+    for number, seconds in enumerate(timings, 1):
+        print(f"{number:<6}{seconds:>9.3f}")
+    spread = statistics.stdev(timings) if len(timings) > 1 else 0.0
+    print(f"median {statistics.median(timings):.3f} s, stdev {spread:.3f} s "
+          f"({spread / statistics.mean(timings):.1%} of the mean)")
+
+
+if __name__ == "__main__":
+    main()
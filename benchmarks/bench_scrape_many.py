@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Bulk scrape benchmark: N pages scraped with one tool call per page, as the
+agent does across LLM iterations, versus a single scrape_many call.
+
+A local server serves Wikipedia-shaped articles with latency. Each tool call
+in the per-page mode also waits --llm-latency seconds, standing in for the
+LLM round trip that decides the next call; scrape_many costs one. The HTTP
+cache is disabled so every page is downloaded.
+
+Usage: python benchmarks/bench_scrape_many.py [--pages 12] [--latency 0.3] [--llm-latency 1.0]
+"""
+import argparse
+import json
+import os
+import time
+
+from common import LocalHTTPServer, make_wikipedia_article
+
+
+def per_page(urls, llm_latency: float) -> float:
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    tools = WebScrapingTools()
+    start = time.perf_counter()
+    for url in urls:
+        time.sleep(llm_latency)
+        result = json.loads(tools.scrape_wikipedia(url))
+        if "error" in result:
+            raise SystemExit(result["error"])
+    return time.perf_counter() - start
+
+
+def bulk(urls, llm_latency: float) -> float:
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    tools = WebScrapingTools()
+    start = time.perf_counter()
+    time.sleep(llm_latency)
+    results = json.loads(tools.scrape_many(json.dumps([{"url": url, "wikitable": True} for url in urls])))["results"]
+    errors = [result["error"] for result in results if "error" in result]
+    if errors:
+        raise SystemExit(errors[0])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=500, help="rows in each article's main table")
+    parser.add_argument("--latency", type=float, default=0.3, help="server latency per request in seconds")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per LLM round trip")
+    args = parser.parse_args()
+    os.environ["HTTP_CACHE_ENABLED"] = "false"
+
+    page = make_wikipedia_article(rows=args.rows, paragraphs=200, references=200)
+    routes = {f"/wiki/Article_{n}": ("text/html", page) for n in range(args.pages)}
+    with LocalHTTPServer(routes, latency=args.latency) as server:
+        urls = [server.url(path) for path in routes]
+        print(f"{args.pages} pages of {len(page) / 1024:.0f} KB, {args.latency * 1000:.0f} ms server latency, "
+              f"{args.llm_latency:.1f} s per LLM round trip")
+        print(f"{'mode':<12}{'tool calls':>11}{'seconds':>9}")
+        print(f"{'per page':<12}{args.pages:>11}{per_page(urls, args.llm_latency):>9.2f}")
+        print(f"{'scrape_many':<12}{1:>11}{bulk(urls, args.llm_latency):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
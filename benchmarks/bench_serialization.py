@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark for tool outputs.
+
+  correlation  - a 100x100 correlation matrix as analyze_data returns it:
+                 before, built into nested dicts cell by cell with .loc and
+                 encoded with json.dumps; now the DataFrame handed to the
+                 serializer as is
+  100k rows    - a 100k-row result (ints, floats with NaN, strings,
+                 timestamps) as records, and as a DataFrame
+
+Each case is timed with the serializer's orjson backend and with its
+standard library fallback.
+
+Usage: python benchmarks/bench_serialization.py [--rows 100000] [--size 100] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def timed(function, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def correlation_loops(corr_matrix: pd.DataFrame) -> str:
+    """The former analyze_data correlation output"""
+    matrix = {}
+    for col1 in corr_matrix.columns:
+        matrix[col1] = {}
+        for col2 in corr_matrix.columns:
+            value = corr_matrix.loc[col1, col2]
+            matrix[col1][col2] = float(value) if not pd.isna(value) else None
+    return json.dumps({"success": True, "results": {"correlation_matrix": matrix}})
+
+
+def make_rows(rows: int) -> pd.DataFrame:
+    generator = np.random.default_rng(0)
+    delay = generator.gamma(2.0, 200.0, rows)
+    delay[::17] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "court": [f"{number % 25 + 1}_{number % 40 + 1}" for number in range(rows)],
+        "decision_date": pd.Timestamp("2011-01-01") + pd.to_timedelta(generator.integers(0, 5000, rows), unit="D"),
+        "delay_days": delay,
+        "disposal": np.array(["DISMISSED", "ALLOWED", "DISPOSED OFF"])[generator.integers(0, 3, rows)],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--size", type=int, default=100, help="columns of the correlation matrix")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    from agent import serialization
+
+    orjson = serialization.orjson
+    generator = np.random.default_rng(0)
+    corr_matrix = pd.DataFrame(generator.normal(size=(1000, args.size)),
+                               columns=[f"c{number}" for number in range(args.size)]).corr()
+    frame = make_rows(args.rows)
+    # Records as a tool builds them (numpy-typed cells, NaN and timestamps untouched)
+    records = frame.to_dict("records")
+
+    def correlation():
+        return serialization.dumps({"success": True, "results": {"correlation_matrix": corr_matrix}})
+
+    cases = [
+        (f"correlation {args.size}x{args.size}", "loops + json", lambda: correlation_loops(corr_matrix)),
+        (f"correlation {args.size}x{args.size}", "serializer", correlation),
+        (f"{args.rows} rows records", "json", lambda: json.dumps(records, default=str)),
+        (f"{args.rows} rows records", "serializer", lambda: serialization.dumps({"rows": records})),
+        (f"{args.rows} rows frame", "serializer", lambda: serialization.dumps({"rows": frame})),
+    ]
+    print(f"{'case':<26}{'encoder':<14}{'backend':<10}{'ms':>9}{'KB':>9}")
+    for name, encoder, function in cases:
+        backends = ("orjson", "stdlib") if encoder == "serializer" and orjson else ("stdlib",)
+        for backend in backends:
+            serialization.orjson = orjson if backend == "orjson" else None
+            size = len(function()) / 1024
+            print(f"{name:<26}{encoder:<14}{backend:<10}{timed(function, args.runs):>9.1f}{size:>9.0f}")
+        serialization.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+SQL result cache benchmark: aggregate queries repeated the way the agent
+repeats them across iterations and requests, through query_duckdb.
+
+For each query the steps are: the first run (miss), the same query again
+(memory tier), a variant differing only in case and whitespace (memory tier),
+the query in a new process sharing the cache file (disk tier, simulated with
+a fresh cache instance), and the query after one source file was touched
+(miss, since the file's version changed).
+
+Usage: python benchmarks/bench_sql_cache.py [--rows 12000000] [--files 6]
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+import duckdb
+
+QUERIES = {
+    "count": "SELECT COUNT(*) AS decisions FROM read_parquet('{files}')",
+    "by court": "SELECT court, COUNT(*) AS decisions FROM read_parquet('{files}') "
+                "GROUP BY court ORDER BY decisions DESC LIMIT 5",
+    "delay by year": "SELECT year, AVG(delay_days) AS delay FROM read_parquet('{files}') "
+                     "WHERE disposal = 'DISMISSED' GROUP BY year ORDER BY year",
+}
+
+
+def make_fixtures(directory: str, rows: int, files: int):
+    connection = duckdb.connect()
+    for number in range(files):
+        connection.execute(f"""
+            COPY (
+                SELECT (i % 25 + 1) || '_' || (i % 40 + 1) AS court, {2015 + number} AS year,
+                       ['DISMISSED', 'ALLOWED', 'DISPOSED OFF'][i % 3 + 1] AS disposal,
+                       CAST(hash(i) % 2000 AS INTEGER) AS delay_days
+                FROM range({rows // files}) t(i)
+            ) TO '{directory}/judgements_{2015 + number}.parquet' (FORMAT parquet)
+        """)
+    connection.close()
+
+
+def variant(sql: str) -> str:
+    """The same query as the model might re-type it"""
+    return "  " + sql.replace("SELECT", "select\n  ").replace("FROM", "from").replace(" BY ", "  by ") + " ;"
+
+
+def timed(tools, sql: str) -> float:
+    start = time.perf_counter()
+    result = json.loads(tools.query_duckdb(sql))
+    if "error" in result:
+        raise SystemExit(result["error"])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=12_000_000)
+    parser.add_argument("--files", type=int, default=6)
+    args = parser.parse_args()
+
+    from agent.tools.data_tools import DataTools
+    from agent.tools.duckdb_engine import DuckDBEngine
+    from agent.tools.sql_cache import SQLResultCache
+
+    directory = tempfile.mkdtemp(prefix="sql-cache-")
+    make_fixtures(directory, args.rows, args.files)
+    pattern = os.path.join(directory, "*.parquet")
+    cache_path = os.path.join(directory, "sql_cache.sqlite3")
+    engine = DuckDBEngine(database=":memory:", object_store=False)
+
+    def tools():
+        data_tools = DataTools()
+        data_tools.engine = engine
+        data_tools.sql_cache = SQLResultCache(cache_path)
+        return data_tools
+
+    first = tools()
+    # One fresh instance per query stands in for another process: empty memory tier, same cache file
+    others = [tools() for _ in QUERIES]
+    print(f"{args.rows} rows in {args.files} Parquet files; times in ms")
+    print(f"{'query':<15}{'first':>9}{'repeat':>9}{'variant':>9}{'new proc':>10}{'touched':>9}")
+    for (name, template), other in zip(QUERIES.items(), others):
+        sql = template.format(files=pattern)
+        timings = [timed(first, sql), timed(first, sql), timed(first, variant(sql)), timed(other, sql)]
+        os.utime(sorted(glob.glob(pattern))[0])
+        timings.append(timed(first, sql))
+        print(f"{name:<15}" + "".join(f"{value:>{width}.1f}" for value, width in zip(timings, (9, 9, 9, 10, 9))))
+    print(json.dumps(first.sql_cache.stats()))
+
+
+if __name__ == "__main__":
+    main()
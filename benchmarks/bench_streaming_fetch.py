@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Streaming fetch benchmark: latency and peak memory of scraping large pages by
+downloading the whole body and parsing it afterwards, versus streaming it
+through the incremental parser with a byte cap.
+
+A local server serves, at a fixed bandwidth:
+
+  early-table  - a large Wikipedia-shaped article whose requested table comes
+                 first, followed by a long reference list
+  oversized    - an article larger than the byte cap (SCRAPE_MAX_MB)
+  text         - a long page without tables, scraped for its text
+
+Each case runs in a fresh subprocess so its peak RSS is its own.
+
+  buffered   - the page is downloaded in full, then every table is parsed
+               (and the text extracted for the text page)
+  streaming  - the scraping tools, which parse chunks as they arrive and stop
+               once the request is satisfied or the cap is reached
+
+Usage: python benchmarks/bench_streaming_fetch.py [--rows 20000] [--max-mb 4] [--bandwidth-mb 50]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import LocalHTTPServer, make_wikipedia_article, peak_rss_mb
+
+CASES = ("early-table", "oversized", "text")
+
+
+def make_text_page(paragraphs: int) -> bytes:
+    body = "".join(f"<p>Paragraph {n}: " + "lorem ipsum dolor sit amet " * 40 + "</p>" for n in range(paragraphs))
+    return f"<html><head><title>Essay</title></head><body><h1>Essay</h1>{body}</body></html>".encode("utf-8")
+
+
+def buffered(case: str, url: str):
+    import requests
+    from bs4 import BeautifulSoup
+    from agent.tools.html_tables import iter_page_tables
+    from agent.tools.table_catalog import CatalogEntry
+
+    content = requests.get(url, timeout=60).content
+    entries = [CatalogEntry(index, table) for index, table in enumerate(iter_page_tables(content))]
+    if case == "text":
+        BeautifulSoup(content, "lxml").get_text(strip=True)[:5000]
+    return len(entries)
+
+
+def streaming(case: str, url: str):
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    tools = WebScrapingTools()
+    if case == "early-table":
+        result = tools.scrape_wikipedia(url)
+    elif case == "oversized":
+        result = tools.list_tables(url)
+    else:
+        result = tools.scrape_web(url)
+    result = json.loads(result)
+    if "error" in result:
+        raise SystemExit(result["error"])
+    return len(result.get("tables", [])) or 1
+
+
+def child(case: str, mode: str, url: str):
+    start = time.perf_counter()
+    (buffered if mode == "buffered" else streaming)(case, url)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="rows in the oversized article's main table")
+    parser.add_argument("--max-mb", type=float, default=4, help="byte cap for streamed pages (SCRAPE_MAX_MB)")
+    parser.add_argument("--bandwidth-mb", type=float, default=50, help="server bandwidth in MB/s")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "MODE", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    pages = {
+        "early-table": make_wikipedia_article(rows=500, paragraphs=10, references=80000),
+        "oversized": make_wikipedia_article(rows=args.rows, paragraphs=2000, references=2000),
+        "text": make_text_page(paragraphs=20000),
+    }
+    routes = {f"/{case}": ("text/html", page) for case, page in pages.items()}
+    env = dict(os.environ, HTTP_CACHE_ENABLED="false", SCRAPE_MAX_MB=str(args.max_mb),
+               PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with LocalHTTPServer(routes, bandwidth=args.bandwidth_mb * 1024 * 1024) as server:
+        print(f"{args.bandwidth_mb:.0f} MB/s server, {args.max_mb:.0f} MB cap")
+        print(f"{'case':<13}{'page MB':>8}  {'mode':<11}{'seconds':>8}{'peak MB':>9}")
+        for case in CASES:
+            for mode in ("buffered", "streaming"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", case, mode, server.url(f"/{case}")],
+                    env=env, capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                size = len(pages[case]) / 1024 / 1024
+                print(f"{case:<13}{size:>8.1f}  {mode:<11}{result['seconds']:>8.2f}{result['peak_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Structured ingestion benchmark: CSV, JSON lines and Parquet URLs scraped
+through scrape_web, versus downloading the body into memory and reading it
+with pandas' default readers.
+
+  buffered   - requests.get(...).content, then pd.read_csv / pd.read_json
+               (lines=True) / pd.read_parquet on the bytes
+  scrape_web - the scraping tool: the format is sniffed from the response,
+               the body is streamed to a temporary file and read with the
+               native (pyarrow) readers, then column types are inferred
+
+Each case runs in a fresh subprocess so its peak RSS is its own.
+
+Usage: python benchmarks/bench_structured_ingestion.py [--rows 500000]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from common import LocalHTTPServer, peak_rss_mb
+
+FORMATS = {
+    "csv": ("text/csv", "/data.csv"),
+    "jsonl": ("application/x-ndjson", "/data.jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "/data.parquet"),
+}
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": range(rows),
+        "year": [1950 + n % 75 for n in range(rows)],
+        "gross": [n * 1.5 for n in range(rows)],
+        "title": [f"Film {n}" for n in range(rows)],
+        "country": [("US", "UK", "FR", "IN", "JP")[n % 5] for n in range(rows)],
+    })
+
+
+def encode(df: pd.DataFrame, file_format: str) -> bytes:
+    if file_format == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if file_format == "jsonl":
+        return df.to_json(orient="records", lines=True).encode("utf-8")
+    buffer = io.BytesIO()
+    df.to_parquet(buffer)
+    return buffer.getvalue()
+
+
+def buffered(file_format: str, url: str) -> int:
+    import requests
+
+    content = io.BytesIO(requests.get(url, timeout=60).content)
+    if file_format == "csv":
+        df = pd.read_csv(content)
+    elif file_format == "jsonl":
+        df = pd.read_json(content, lines=True)
+    else:
+        df = pd.read_parquet(content)
+    return len(df)
+
+
+def scrape_web(file_format: str, url: str) -> int:
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    result = json.loads(WebScrapingTools().scrape_web(url))
+    if "error" in result:
+        raise SystemExit(result["error"])
+    return result["row_count"]
+
+
+def child(file_format: str, mode: str, url: str):
+    start = time.perf_counter()
+    rows = (buffered if mode == "buffered" else scrape_web)(file_format, url)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"rows": rows, "seconds": elapsed, "peak_mb": peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--child", nargs=3, metavar=("FORMAT", "MODE", "URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    df = make_frame(args.rows)
+    payloads = {file_format: encode(df, file_format) for file_format in FORMATS}
+    routes = {path: (content_type, payloads[file_format]) for file_format, (content_type, path) in FORMATS.items()}
+    env = dict(os.environ, HTTP_CACHE_ENABLED="false",
+               PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    with LocalHTTPServer(routes) as server:
+        print(f"{args.rows} rows x {df.shape[1]} columns")
+        print(f"{'format':<9}{'MB':>6}  {'mode':<12}{'seconds':>8}{'peak MB':>9}")
+        for file_format, (_, path) in FORMATS.items():
+            for mode in ("buffered", "scrape_web"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", file_format, mode, server.url(path)],
+                    env=env, capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                if result["rows"] != args.rows:
+                    raise SystemExit(f"{file_format} {mode}: read {result['rows']} rows")
+                size = len(payloads[file_format]) / 1024 / 1024
+                print(f"{file_format:<9}{size:>6.1f}  {mode:<12}{result['seconds']:>8.2f}{result['peak_mb']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Table catalog benchmark: several tables requested from the same page, with the
+per-URL catalog and without it (every request downloads and parses the page).
+
+A local server serves a Wikipedia-shaped article with latency, and the
+scraping tools run the sequence an agent typically needs for a multi-table
+question: the default table, the table list, the second table by column match
+and a table by index. The HTTP cache is disabled so downloads are counted.
+
+Usage: python benchmarks/bench_table_catalog.py [--rows 5000] [--latency 0.2]
+"""
+import argparse
+import json
+import os
+import time
+
+from common import LocalHTTPServer, make_wikipedia_article
+
+
+def run(url: str, catalog_pages: int) -> float:
+    from agent.tools.table_catalog import TableCatalog, start_catalog
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    tools = WebScrapingTools()
+    # One analysis run with its own catalog
+    start_catalog(TableCatalog(max_pages=catalog_pages))
+    calls = [
+        (tools.scrape_wikipedia, url),
+        (tools.list_tables, url),
+        (tools.scrape_wikipedia, json.dumps({"url": url, "match": ["Year", "Title"]})),
+        (tools.scrape_wikipedia, json.dumps({"url": url, "table": 1})),
+    ]
+    start = time.perf_counter()
+    for tool, tool_input in calls:
+        result = json.loads(tool(tool_input))
+        if "error" in result:
+            raise SystemExit(result["error"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="rows in the article's main table")
+    parser.add_argument("--latency", type=float, default=0.2, help="server latency per request in seconds")
+    args = parser.parse_args()
+    os.environ["HTTP_CACHE_ENABLED"] = "false"
+
+    page = make_wikipedia_article(rows=args.rows, paragraphs=1000, references=2000)
+    with LocalHTTPServer({"/wiki/Article": ("text/html", page)}, latency=args.latency) as server:
+        url = server.url("/wiki/Article")
+        print(f"page {len(page) / 1024:.0f} KB, {args.latency * 1000:.0f} ms server latency, 4 table requests")
+        print(f"{'mode':<12}{'downloads':>10}{'seconds':>9}")
+        for mode, pages in (("no catalog", 0), ("catalog", 32)):
+            before = server.request_count
+            elapsed = run(url, pages)
+            print(f"{mode:<12}{server.request_count - before:>10}{elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
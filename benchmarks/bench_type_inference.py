@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Type inference benchmark: the vectorized column engine versus cleaning the same
+table cell by cell in Python.
+
+Builds a synthetic scraped table of string cells shaped like a Wikipedia
+"highest-grossing films" list (ranks with tie codes, currency amounts with
+footnotes and magnitudes, years, percentages, release dates and titles) and
+converts it with:
+
+  per-cell    - each value cleaned and parsed with the same regexes in a Python
+                function applied to every cell
+  vectorized  - infer_types, which works on whole columns with pandas string
+                operations and converts them to nullable dtypes
+
+Usage: python benchmarks/bench_type_inference.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import common  # noqa: F401  (puts the repository on sys.path)
+
+
+def make_table(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    months = ["January", "February", "March", "April", "May", "June", "July",
+              "August", "September", "October", "November", "December"]
+
+    def gross():
+        if rng.random() < 0.05:
+            return f"${rng.randint(10, 29) / 10} bn[{rng.choice('abc')}]"
+        value = f"${rng.randint(100_000_000, 2_999_999_999):,}"
+        return value + (f"[{rng.randint(1, 99)}]" if rng.random() < 0.1 else "")
+
+    def released():
+        day = date(1950, 1, 1) + timedelta(days=rng.randint(0, 27000))
+        return f"{months[day.month - 1]} {day.day}, {day.year}"
+
+    return pd.DataFrame({
+        "Rank": [f"T{i}" if rng.random() < 0.02 else str(i) for i in range(1, rows + 1)],
+        "Peak": [rng.choice(["1", "2", "3", "4", "5", "24RK", "—"]) for _ in range(rows)],
+        "Title": [f"Film {i}" + ("†" if rng.random() < 0.05 else "") for i in range(rows)],
+        "Worldwide gross": [gross() for _ in range(rows)],
+        "Year": [str(rng.randint(1950, 2024)) for _ in range(rows)],
+        "Share": [f"{rng.randint(0, 1000) / 10}%" for _ in range(rows)],
+        "Released": [released() for _ in range(rows)],
+    })
+
+
+def per_cell(df: pd.DataFrame) -> pd.DataFrame:
+    """The same cleaning done one value at a time, as a baseline"""
+    from agent.tools import type_inference as ti
+
+    def clean(value):
+        if value is None:
+            return None
+        value = ti._WHITESPACE.sub(" ", ti._FOOTNOTES.sub("", value)).strip()
+        value = ti._MARKERS.sub("", value).strip()
+        return None if ti._MISSING.match(value) else value
+
+    def number(value):
+        match = ti._NUMBER.match(value) if value is not None else None
+        if match is None:
+            return None
+        result = float(match["number"].replace(",", ""))
+        if match["sign"] in ("-", "−"):
+            result = -result
+        if match["magnitude"]:
+            result *= ti._MAGNITUDES[match["magnitude"].lower()]
+        return result
+
+    def parse_date(value):
+        if value is None:
+            return None
+        value = ti._PARENTHETICAL.sub("", value)
+        for date_format in ti._DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+        return None
+
+    result = {}
+    for name in df.columns:
+        values = [clean(value) for value in df[name]]
+        numbers = [number(value) for value in values]
+        present = sum(value is not None for value in values)
+        if present and sum(n is not None for n in numbers) / present >= 0.9:
+            result[name] = pd.Series(numbers, dtype="Float64")
+        else:
+            dates = [parse_date(value) for value in values]
+            if present and sum(d is not None for d in dates) / present >= 0.9:
+                result[name] = pd.Series(dates, dtype="datetime64[us]")
+            else:
+                result[name] = pd.Series(values)
+    return pd.DataFrame(result)
+
+
+def vectorized(df: pd.DataFrame) -> pd.DataFrame:
+    from agent.tools.type_inference import infer_types
+    return infer_types(df)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine; the median is reported")
+    args = parser.parse_args()
+
+    df = make_table(args.rows)
+    print(f"{args.rows} rows x {df.shape[1]} string columns")
+    print(f"{'engine':<12}{'seconds':>9}{'rows/s':>12}")
+    for name, engine in (("per-cell", per_cell), ("vectorized", vectorized)):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            engine(df)
+            timings.append(time.perf_counter() - start)
+        seconds = statistics.median(timings)
+        print(f"{name:<12}{seconds:>9.2f}{args.rows / seconds:>12,.0f}")
+
+    from agent.tools.type_inference import infer_types
+    _, report = infer_types(df)
+    print()
+    for entry in report:
+        details = {key: value for key, value in entry.items() if key not in ("column", "kind", "dtype")}
+        print(f"{entry['column']:<18}{entry['kind']:<9}{entry['dtype']:<16}{details}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Shared helpers for the benchmark scripts: a scripted chat model that drives the
+agent without Azure OpenAI, a local HTTP server that serves fixture pages, and
+S3-compatible routes for it that stand in for object storage.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, urlsplit
+from xml.sax.saxutils import escape
+
+# Allow running the scripts directly from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def use_dummy_azure_env():
+    """Set placeholder Azure OpenAI settings so the agent can be constructed offline"""
+    os.environ.setdefault("AZURE_OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://benchmark.openai.azure.com/")
+    os.environ.setdefault("AZURE_OPENAI_DEPLOYMENT_NAME", "benchmark")
+
+
+def scripted_chat_model(steps: List[List[Tuple[str, str]]], final_answer: str = '{"result": "done"}',
+                        latency: float = 0.0):
+    """
+    Build a chat model that replays `steps` (one list of (tool_name, tool_input)
+    calls per agent turn) and then returns `final_answer`.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class ScriptedChatModel(BaseChatModel):
+        script: List[List[Tuple[str, str]]]
+        answer: str
+        delay: float
+
+        @property
+        def _llm_type(self) -> str:
+            return "scripted"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _respond(self, messages) -> ChatResult:
+            turn = sum(1 for message in messages if isinstance(message, AIMessage))
+            if turn < len(self.script):
+                tool_calls = [
+                    {"name": name, "args": {"__arg1": tool_input}, "id": f"call_{turn}_{i}"}
+                    for i, (name, tool_input) in enumerate(self.script[turn])
+                ]
+                message = AIMessage(content="", tool_calls=tool_calls)
+            else:
+                message = AIMessage(content=self.answer)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.delay)
+            return self._respond(messages)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            await asyncio.sleep(self.delay)
+            return self._respond(messages)
+
+    return ScriptedChatModel(script=steps, answer=final_answer, delay=latency)
+
+
+def make_wikitable_page(rows: int = 200, columns: int = 6, title: str = "Fixture table") -> bytes:
+    """Generate an HTML page with a Wikipedia-style `wikitable`"""
+    headers = "".join(f"<th>Column {c}</th>" for c in range(columns))
+    body = []
+    for r in range(rows):
+        cells = [f"<td>{r + 1}</td>"] + [f"<td>${(r + 1) * (c + 7) * 1000:,}</td>" for c in range(1, columns)]
+        body.append("<tr>" + "".join(cells) + "</tr>")
+    html = (
+        f"<html><head><title>{title}</title></head><body><h1>{title}</h1>"
+        f"<table class=\"wikitable\"><tr>{headers}</tr>{''.join(body)}</table></body></html>"
+    )
+    return html.encode("utf-8")
+
+
+def make_wikipedia_article(rows: int = 200, paragraphs: int = 300, references: int = 500,
+                           title: str = "List of fixture films") -> bytes:
+    """
+    Generate a page shaped like a large Wikipedia list article: lead paragraphs,
+    an infobox-style table, a main `wikitable` with links, sort keys, footnote
+    markers and TemplateStyles, a second wikitable, and a long reference list.
+    """
+    style = '<style data-mw-deduplicate="TemplateStyles:r1">.mw-parser-output .tooltip{border-bottom:1px dotted}</style>'
+    lead = "".join(
+        f'<p>Paragraph {p} about <a href="/wiki/Film_{p}" title="Film {p}">film {p}</a>, grossing '
+        f'<b>${p * 1000:,}</b> worldwide.<sup id="cite_ref-{p}" class="reference"><a href="#cite_note-{p}">[{p}]</a></sup>\n</p>'
+        for p in range(paragraphs)
+    )
+    infobox = '<table class="infobox"><tr><th>Genre</th><td>Various</td></tr></table>'
+    header = (
+        '<tr><th scope="col">Rank</th><th scope="col">Peak</th><th scope="col">Title</th>'
+        '<th scope="col">Worldwide gross</th><th scope="col">Year</th><th scope="col">Ref</th></tr>'
+    )
+    body = "".join(
+        f'<tr><th scope="row">{r + 1}</th><td>{(r % 7) + 1}</td>'
+        f'<td><i><a href="/wiki/Film_{r}" title="Film {r}">Film {r}: The Sequel</a></i>{style if r % 50 == 0 else ""}</td>'
+        f'<td><span data-sort-value="{3_000_000_000 - r * 1000}" style="display:none"></span>'
+        f'${3_000_000_000 - r * 1000:,}<sup class="reference"><a href="#cite_note-{r}">[# {r % 9}]</a></sup></td>'
+        f'<td>{1990 + r % 34}\n</td><td><sup class="reference"><a href="#cite_note-x{r}">[{r}]</a></sup></td></tr>'
+        for r in range(rows)
+    )
+    second = '<table class="wikitable sortable"><tr><th>Year</th><th>Title</th></tr>' + "".join(
+        f'<tr><td>{1990 + y}</td><td><a href="/wiki/Top_{y}">Top film {y}</a></td></tr>' for y in range(34)
+    ) + '</table>'
+    refs = '<ol class="references">' + "".join(
+        f'<li id="cite_note-{n}"><span class="reference-text"><cite>"Box office report {n}". <i>Box Office Mojo</i>. '
+        f'Retrieved January 1, 2024.</cite></span></li>'
+        for n in range(references)
+    ) + '</ol>'
+    html = (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="UTF-8"><title>{title} - Wikipedia</title>'
+        f'<script>var wgPageName="{title}";</script></head><body><div id="content"><h1>{title}</h1>'
+        f'<div class="mw-parser-output">{infobox}{lead}<h2><span class="mw-headline">Highest-grossing films</span>'
+        f'<span class="mw-editsection">[edit]</span></h2>'
+        f'<table class="wikitable sortable plainrowheaders">{header}{body}</table>'
+        f'<h2>By year</h2>{second}<h2>References</h2>{refs}</div></div></body></html>'
+    )
+    return html.encode("utf-8")
+
+
+# A route is either static content or a callable producing (status, headers, body)
+Route = Union[Tuple[str, bytes], Callable[[BaseHTTPRequestHandler], Tuple[int, Dict[str, str], bytes]]]
+
+
+class _FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes bursts of concurrent connections wait on SYN retransmits
+    request_queue_size = 128
+
+
+class LocalHTTPServer:
+    """
+    Threaded HTTP server on localhost serving fixture routes, with optional
+    latency and bandwidth (bytes per second) to simulate a remote site
+    """
+
+    def __init__(self, routes: Dict[str, Route], latency: float = 0.0, bandwidth: Optional[float] = None):
+        self.routes = routes
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.request_count = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def __enter__(self) -> "LocalHTTPServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                route = server.routes.get(self.path.split("?")[0])
+                if route is None:
+                    status, headers, body = 404, {"Content-Type": "text/plain"}, b"not found"
+                elif callable(route):
+                    status, headers, body = route(self)
+                else:
+                    content_type, body = route
+                    status, headers = 200, {"Content-Type": content_type}
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    if not server.bandwidth:
+                        self.wfile.write(body)
+                        return
+                    chunk_size = 16 * 1024
+                    for start in range(0, len(body), chunk_size):
+                        self.wfile.write(body[start:start + chunk_size])
+                        time.sleep(chunk_size / server.bandwidth)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Clients that stop reading a body early drop the connection
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _FixtureServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def range_route(body: bytes, content_type: str = "application/octet-stream") -> Route:
+    """A route that honours single Range requests (bytes=a-b, bytes=a-, bytes=-n) with 206 responses"""
+    etag = '"%08x"' % (hash(body) & 0xFFFFFFFF)
+
+    def serve(handler):
+        headers = {"Content-Type": content_type, "ETag": etag, "Accept-Ranges": "bytes"}
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", handler.headers.get("Range", ""))
+        if match is None:
+            return 200, headers, body
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(len(body), int(last) + 1 if last else len(body))
+        else:
+            start, end = max(0, len(body) - int(last)), len(body)
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(body)}"
+        return 206, headers, body[start:end]
+
+    return serve
+
+
+def s3_routes(bucket: str, objects: Dict[str, bytes], page_size: int = 1000) -> Dict[str, Route]:
+    """
+    Routes for a path-style, S3-compatible stand-in: ListObjectsV2 on /<bucket>
+    (prefix and continuation tokens, `page_size` keys per page) and ranged GETs
+    of /<bucket>/<key>. Serve with LocalHTTPServer and use its base_url as the endpoint.
+    """
+    keys = sorted(objects)
+
+    def list_objects(handler):
+        query = parse_qs(urlsplit(handler.path).query)
+        prefix = query.get("prefix", [""])[0]
+        start = int(query.get("continuation-token", ["0"])[0])
+        matching = [key for key in keys if key.startswith(prefix)]
+        page = matching[start:start + page_size]
+        truncated = start + page_size < len(matching)
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{len(objects[key])}</Size>"
+            f"<ETag>&quot;{hash(objects[key]) & 0xFFFFFFFF:08x}&quot;</ETag></Contents>"
+            for key in page
+        )
+        token = f"<NextContinuationToken>{start + page_size}</NextContinuationToken>" if truncated else ""
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            f"<Name>{bucket}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>"
+            f"<IsTruncated>{'true' if truncated else 'false'}</IsTruncated>{token}{contents}</ListBucketResult>"
+        )
+        return 200, {"Content-Type": "application/xml"}, xml.encode("utf-8")
+
+    routes = {f"/{bucket}": list_objects, f"/{bucket}/": list_objects}
+    for key, body in objects.items():
+        routes[f"/{bucket}/{quote(key)}"] = range_route(body)
+    return routes
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process in MB. Read from /proc where possible:
+    ru_maxrss survives exec, so a child started from a large parent reports the parent's peak.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -1,12 +1,16 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import os
 import logging
+import threading
 import time
 from pathlib import Path
 from dotenv import load_dotenv
-from agent.data_analyst_agent import DataAnalystAgent
+from api.answer_cache import HIT, MISS, create_answer_cache
+from api.jobs import COMPLETED, FAILED, create_job_manager
+from api.worker_pool import create_worker_pool
+from agent.serialization import dumps, dumps_bytes
 
 # Load environment variables
 load_dotenv()
@@ -22,12 +26,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Data Analyst Agent API", version="1.0.0")
 
-# Initialize the agent
-logger.info("Initializing Data Analyst Agent...")
-agent = DataAnalystAgent()
-logger.info("Data Analyst Agent initialized successfully")
+class AnswerJSONResponse(JSONResponse):
+    """JSON response encoded by the shared serializer (orjson when installed; numpy and NaN safe)"""
+
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
+
+
+app = FastAPI(title="Data Analyst Agent API", version="1.0.0", default_response_class=AnswerJSONResponse)
+
+# The in-process agent (and LangChain with it) is built on first use, not at import
+agent = None
+_agent_lock = threading.Lock()
+
+def get_agent():
+    """Get or create the in-process DataAnalystAgent"""
+    global agent
+    with _agent_lock:
+        if agent is None:
+            from agent.data_analyst_agent import DataAnalystAgent
+            logger.info("Initializing Data Analyst Agent...")
+            agent = DataAnalystAgent()
+            logger.info("Data Analyst Agent initialized successfully")
+    return agent
+
+async def get_agent_async():
+    """Get the in-process agent, building it off the event loop if needed"""
+    return agent if agent is not None else await asyncio.to_thread(get_agent)
+
+async def analyze_in_process(question: str):
+    return await (await get_agent_async()).analyze(question)
+
+# With AGENT_WORKERS > 0, analyses run on a pool of pre-warmed worker processes,
+# each with its own agent; otherwise a single in-process agent serves every request
+agent_workers = int(os.getenv("AGENT_WORKERS", "0"))
+if agent_workers > 0:
+    worker_pool = create_worker_pool(agent_workers)
+    analyze = worker_pool.analyze
+else:
+    worker_pool = None
+    analyze = analyze_in_process
+
+# Final answers keyed on the question text; duplicate in-flight questions share one run
+answer_cache = create_answer_cache()
+
+async def cached_analyze(question: str):
+    return await answer_cache.analyze(question, analyze)
+
+# Background job queue for analyses that outlive a single HTTP request
+job_manager = create_job_manager(cached_analyze)
+
+@app.on_event("startup")
+async def start_background_services():
+    if worker_pool is not None:
+        logger.info(f"Starting {agent_workers} agent worker processes...")
+        await worker_pool.start()
+    elif os.getenv("AGENT_PREWARM", "false").lower() in ("1", "true", "yes"):
+        # Build the agent in the background so startup is not delayed
+        asyncio.get_running_loop().run_in_executor(None, get_agent)
+    await job_manager.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await job_manager.stop()
+    if worker_pool is not None:
+        await worker_pool.stop()
+
+async def read_question(file: UploadFile, request_id: str) -> str:
+    """Read and validate the question text from an uploaded file"""
+    logger.info(f"[{request_id}] File details - name: {file.filename}, content_type: {file.content_type}")
+    logger.info(f"[{request_id}] Reading uploaded file content...")
+    content = await file.read()
+    question = content.decode('utf-8').strip()
+    
+    logger.info(f"[{request_id}] File content length: {len(content)} bytes")
+    logger.info(f"[{request_id}] Question preview: {question[:200]}...")
+    
+    if not question:
+        logger.warning(f"[{request_id}] Empty question file received")
+        raise HTTPException(status_code=400, detail="Empty question file")
+    
+    return question
 
 @app.post("/api/")
 async def analyze_data(file: UploadFile = File(...)):
@@ -39,30 +119,19 @@ async def analyze_data(file: UploadFile = File(...)):
     request_id = f"req_{int(start_time)}"
     
     logger.info(f"[{request_id}] New API request received")
-    logger.info(f"[{request_id}] File details - name: {file.filename}, content_type: {file.content_type}")
     
     try:
-        # Read the uploaded file content
-        logger.info(f"[{request_id}] Reading uploaded file content...")
-        content = await file.read()
-        question = content.decode('utf-8').strip()
-        
-        logger.info(f"[{request_id}] File content length: {len(content)} bytes")
-        logger.info(f"[{request_id}] Question preview: {question[:200]}...")
-        
-        if not question:
-            logger.warning(f"[{request_id}] Empty question file received")
-            raise HTTPException(status_code=400, detail="Empty question file")
+        question = await read_question(file, request_id)
         
         # Process the question using the data analyst agent
         logger.info(f"[{request_id}] Starting analysis with Data Analyst Agent...")
-        result = await agent.analyze(question)
+        result, cache_status = await answer_cache.get_or_compute(question, analyze)
         
         processing_time = time.time() - start_time
-        logger.info(f"[{request_id}] Analysis completed successfully in {processing_time:.2f}s")
+        logger.info(f"[{request_id}] Analysis completed successfully in {processing_time:.2f}s (cache: {cache_status})")
         logger.info(f"[{request_id}] Result type: {type(result)}, length: {len(str(result))}")
         
-        return JSONResponse(content=result)
+        return AnswerJSONResponse(content=result, headers={"X-Answer-Cache": cache_status})
         
     except HTTPException as he:
         logger.error(f"[{request_id}] HTTP Exception: {he.detail}")
@@ -73,12 +142,130 @@ async def analyze_data(file: UploadFile = File(...)):
         logger.exception(f"[{request_id}] Full exception details:")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+def format_sse(event: dict) -> str:
+    """Encode a progress event as a Server-Sent Events message"""
+    return f"event: {event['type']}\ndata: {dumps(event)}\n\n"
+
+@app.post("/api/stream")
+async def stream_analysis(file: UploadFile = File(...)):
+    """
+    Streaming variant of /api/ that sends Server-Sent Events as the agent works:
+    start, llm_start/llm_end, tool_start/tool_end with timings, token, and final or error.
+    """
+    request_id = f"req_{int(time.time())}"
+    logger.info(f"[{request_id}] New streaming API request received")
+    
+    question = await read_question(file, request_id)
+    cached = answer_cache.get(question)
+    
+    async def events():
+        yield format_sse({"type": "start", "request_id": request_id})
+        if cached is not None:
+            yield format_sse({"type": "final", "result": cached, "cache": HIT})
+            return
+        
+        if worker_pool is not None:
+            source = worker_pool.astream(question)
+        else:
+            source = (await get_agent_async()).astream_analyze(question)
+        async for event in source:
+            if event["type"] == "final":
+                answer_cache.put(question, event["result"])
+                event["cache"] = MISS
+            yield format_sse(event)
+        logger.info(f"[{request_id}] Streaming analysis finished")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(file: UploadFile = File(...)):
+    """
+    Queue a data analysis task and return its job ID immediately.
+    Poll /api/jobs/{job_id} for status and /api/jobs/{job_id}/result for the answer.
+    """
+    request_id = f"req_{int(time.time())}"
+    logger.info(f"[{request_id}] New job submission received")
+    
+    question = await read_question(file, request_id)
+    job = job_manager.submit(question)
+    logger.info(f"[{request_id}] Queued job {job['id']}")
+    
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "result_url": f"/api/jobs/{job['id']}/result"
+    }
+
+def get_job_or_404(job_id: str) -> dict:
+    job = job_manager.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Return the status and timings of a submitted job"""
+    job = get_job_or_404(job_id)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"]
+    }
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Return the analysis result once the job has completed"""
+    job = get_job_or_404(job_id)
+    if job["status"] == COMPLETED:
+        return AnswerJSONResponse(content=job["result"])
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {job['error']}")
+    return AnswerJSONResponse(status_code=202, content={"job_id": job["id"], "status": job["status"]})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     logger.info("Health check endpoint called")
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Counters for the caches and worker pool of this API process"""
+    result = {"answer_cache": answer_cache.stats()}
+    if agent is not None and agent.llm_cache is not None:
+        result["llm_cache"] = agent.llm_cache.stats()
+    if agent is not None:
+        from agent.tools.http_cache import shared_http_cache
+        http_cache = shared_http_cache()
+        if http_cache is not None:
+            result["http_cache"] = http_cache.stats()
+        from agent.tools.sql_cache import shared_sql_cache
+        sql_cache = shared_sql_cache()
+        if sql_cache is not None:
+            result["sql_cache"] = sql_cache.stats()
+    if worker_pool is not None:
+        result["worker_pool"] = worker_pool.stats()
+    return result
+
+@app.post("/sql_cache/invalidate")
+async def invalidate_sql_cache(source: str = None):
+    """Drop cached query_duckdb results, all of them or those computed from sources starting with `source`"""
+    from agent.tools.sql_cache import shared_sql_cache
+    sql_cache = shared_sql_cache()
+    if sql_cache is None:
+        raise HTTPException(status_code=404, detail="SQL result cache is disabled")
+    invalidated = await asyncio.to_thread(sql_cache.invalidate, source)
+    logger.info(f"Invalidated {invalidated} cached SQL results" + (f" for {source}" if source else ""))
+    return {"invalidated": invalidated}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from api import answer_cache
+from api.answer_cache import COALESCED, HIT, MISS, AnswerCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_hits_after_the_first_answer():
+    cache = AnswerCache()
+    calls = []
+
+    async def compute(question):
+        calls.append(question)
+        return {"answer": question}
+
+    async def run():
+        return [await cache.get_or_compute(question, compute) for question in ("q", " q\n", "other")]
+
+    results = asyncio.run(run())
+    assert [status for _, status in results] == [MISS, HIT, MISS]
+    assert calls == ["q", "other"]
+
+
+def test_duplicate_questions_in_flight_are_coalesced():
+    cache = AnswerCache()
+    calls = []
+
+    async def compute(question):
+        calls.append(question)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("q", compute) for _ in range(3)))
+
+    statuses = [status for _, status in asyncio.run(run())]
+    assert sorted(statuses) == [COALESCED, COALESCED, MISS]
+    assert calls == ["q"]
+
+
+def test_entries_expire(clock):
+    cache = AnswerCache(ttl_seconds=60)
+    cache.put("q", "answer")
+    clock[0] += 59
+    assert cache.get("q") == "answer"
+    clock[0] += 2
+    assert cache.get("q") is None
+
+
+def test_errors_and_exceptions_are_not_cached():
+    cache = AnswerCache()
+
+    async def failing(question):
+        raise RuntimeError("boom")
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("q", failing)
+
+    asyncio.run(run())
+    cache.put("other", {"error": "no data"})
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["inflight"] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
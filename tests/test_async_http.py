@@ -0,0 +1,64 @@
+import asyncio
+import threading
+
+from agent.tools.async_http import AsyncHTTPClient
+from agent.tools.http_cache import HTTPCache
+
+
+async def fetch(client, url):
+    async with client.stream(url) as body:
+        return b"".join([chunk async for chunk in body])
+
+
+def test_fresh_entry_is_replayed_without_a_request(page_server, tmp_path):
+    page_server.pages["/page"] = (b"<p>hello</p>", {"Cache-Control": "max-age=60"})
+    client = AsyncHTTPClient(cache=HTTPCache(str(tmp_path / "http_cache.sqlite3")))
+
+    async def run():
+        try:
+            return [await fetch(client, f"{page_server.url}/page") for _ in range(2)]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == [b"<p>hello</p>"] * 2
+    assert len(page_server.requests) == 1
+    assert client.cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_revalidated(page_server, tmp_path):
+    page_server.pages["/page"] = (b"<p>hello</p>", {"Cache-Control": "no-cache", "ETag": '"v1"'})
+    client = AsyncHTTPClient(cache=HTTPCache(str(tmp_path / "http_cache.sqlite3")))
+
+    async def run():
+        try:
+            return [await fetch(client, f"{page_server.url}/page") for _ in range(2)]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == [b"<p>hello</p>"] * 2
+    assert page_server.requests[1][1].get("If-None-Match") == '"v1"'
+    assert client.cache.stats()["revalidated"] == 1
+
+
+def test_cache_lookup_runs_off_the_event_loop(page_server, tmp_path):
+    page_server.pages["/page"] = (b"<p>hello</p>", {"Cache-Control": "max-age=60"})
+    cache = HTTPCache(str(tmp_path / "http_cache.sqlite3"))
+    lookup_threads = []
+    original_lookup = cache.lookup
+
+    def lookup(request):
+        lookup_threads.append(threading.current_thread())
+        return original_lookup(request)
+
+    cache.lookup = lookup
+    client = AsyncHTTPClient(cache=cache)
+
+    async def run():
+        try:
+            await fetch(client, f"{page_server.url}/page")
+            await fetch(client, f"{page_server.url}/page")
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+    assert lookup_threads and threading.main_thread() not in lookup_threads
@@ -0,0 +1,109 @@
+import pytest
+
+from agent.tools.html_tables import StreamParser, iter_page_tables, iter_tables, table_frame
+
+PAGE = b"""<html><head><style>td { color: red }</style></head><body>
+<h2>Highest-grossing films<span class="mw-editsection">[edit]</span></h2>
+<p>Intro text</p>
+<table class="wikitable sortable"><caption>Top films</caption>
+<tr><th>Rank</th><th>Title</th></tr>
+<tr><td>1</td><td>Avatar<sup>[a]</sup></td></tr>
+<tr><td>2</td><td>Avengers<table><tr><td>nested</td></tr></table></td></tr>
+</table>
+<h2>Other</h2>
+<table class="infobox"><tr><th>Key</th></tr><tr><td>value</td></tr></table>
+</body></html>"""
+
+
+@pytest.fixture(params=["lxml", "bs4"])
+def engine(request):
+    return request.param
+
+
+def test_tables_with_caption_section_and_classes(engine):
+    tables = list(iter_page_tables(PAGE, engine=engine))
+    assert len(tables) == 2
+    films = tables[0]
+    assert (films.caption, films.section, films.classes) == ("Top films", "Highest-grossing films", ["wikitable", "sortable"])
+    assert [[cell.text for cell in row] for row in films.rows] == [["Rank", "Title"], ["1", "Avatar[a]"], ["2", "Avengersnested"]]
+    assert tables[1].section == "Other"
+
+
+def test_class_filter(engine):
+    tables = list(iter_tables(PAGE, class_name="infobox", engine=engine))
+    assert [[cell.text for cell in row] for row in tables[0]] == [["Key"], ["value"]]
+
+
+def test_stream_parser_yields_tables_as_chunks_complete():
+    parser = StreamParser()
+    end = PAGE.index(b"</table>\n<h2>Other") + len(b"</table>")
+    assert parser.feed(PAGE[:end - 20]) == []
+    assert [table.caption for table in parser.feed(PAGE[end - 20:end + 5])] == ["Top films"]
+    assert len(parser.feed(PAGE[end + 5:]) + parser.close()) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_stream_parser_text_matches_in_any_chunking(engine, chunk_size):
+    parser = StreamParser(text_chars=1000, engine=engine)
+    for start in range(0, len(PAGE), chunk_size):
+        parser.feed(PAGE[start:start + chunk_size])
+    parser.close()
+    assert "color" not in parser.text
+    assert "Intro text" in parser.text
+
+
+def test_text_is_limited_to_text_chars(engine):
+    parser = StreamParser(text_chars=10, engine=engine)
+    parser.feed(PAGE)
+    parser.close()
+    assert len(parser.text) == 10
+
+
+def test_table_frame_keeps_strings(engine):
+    rows = next(iter_tables(PAGE, class_name="wikitable", engine=engine))
+    frame = table_frame(rows)
+    assert list(frame.columns) == ["Rank", "Title"]
+    assert frame["Rank"].tolist() == ["1", "2"]
+
+
+def rows_of(html: bytes):
+    return next(iter_tables(html))
+
+
+def test_rowspan_and_colspan_are_expanded(engine):
+    html = b"""<table>
+    <tr><th>Year</th><th>Team</th><th>Score</th></tr>
+    <tr><td rowspan="2">2020</td><td colspan="2">Cancelled</td></tr>
+    <tr><td>B</td><td>3</td></tr>
+    </table>"""
+    frame = table_frame(next(iter_tables(html, engine=engine)))
+    assert frame.values.tolist() == [["2020", "Cancelled", "Cancelled"], ["2020", "B", "3"]]
+
+
+def test_multi_row_headers_are_joined():
+    html = b"""<table>
+    <tr><th rowspan="2">Film</th><th colspan="2">Gross</th></tr>
+    <tr><th>Domestic</th><th>Worldwide</th></tr>
+    <tr><td>Avatar</td><td>1</td><td>2</td></tr>
+    </table>"""
+    assert list(table_frame(rows_of(html)).columns) == ["Film", "Gross Domestic", "Gross Worldwide"]
+
+
+def test_repeated_and_missing_header_names():
+    html = b"""<table><tr><th>A</th><th>A</th><th></th></tr><tr><td>1</td><td>2</td><td>3</td></tr></table>"""
+    assert list(table_frame(rows_of(html)).columns) == ["A", "A.1", "Unnamed: 2"]
+
+
+def test_ragged_rows_and_malformed_spans():
+    html = b"""<table><tr><th>A</th><th>B</th></tr>
+    <tr><td rowspan="x">1</td></tr>
+    <tr><td colspan="99999">2</td></tr></table>"""
+    frame = table_frame(rows_of(html))
+    assert frame.shape == (2, 1000)
+    assert frame.iloc[0, 0] == "1"
+    assert frame.iloc[0, 1:].isna().all()
+
+
+def test_empty_rows_are_dropped():
+    html = b"""<table><tr><th>A</th></tr><tr><td></td></tr><tr><td>1</td></tr></table>"""
+    assert table_frame(rows_of(html))["A"].tolist() == ["1"]
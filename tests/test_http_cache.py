@@ -0,0 +1,110 @@
+import pytest
+import requests
+
+from agent.tools import http_cache
+from agent.tools.http_cache import HTTPCache, install, parse_cache_control
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HTTPCache(str(tmp_path / "http_cache.sqlite3"))
+
+
+@pytest.fixture
+def session(cache):
+    return install(requests.Session(), cache)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('max-age=60, no-cache, private="x"') == {"max-age": "60", "no-cache": None, "private": "x"}
+
+
+def test_fresh_responses_are_served_from_the_cache(session, cache, page_server):
+    page_server.pages["/page"] = (b"hello", {"Cache-Control": "max-age=60"})
+    assert session.get(f"{page_server.url}/page").content == b"hello"
+
+    response = session.get(f"{page_server.url}/page")
+    assert response.content == b"hello"
+    assert response.from_cache
+    assert len(page_server.requests) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_responses_are_revalidated(session, cache, page_server, clock):
+    page_server.pages["/page"] = (b"hello", {"Cache-Control": "max-age=60", "ETag": '"v1"'})
+    session.get(f"{page_server.url}/page")
+    clock[0] += 61
+
+    assert session.get(f"{page_server.url}/page").content == b"hello"
+    assert page_server.requests[1][1]["If-None-Match"] == '"v1"'
+    assert cache.stats()["revalidated"] == 1
+
+    # The 304 restarted the entry's freshness
+    session.get(f"{page_server.url}/page")
+    assert len(page_server.requests) == 2
+
+
+def test_changed_responses_replace_the_entry(session, cache, page_server, clock):
+    page_server.pages["/page"] = (b"old", {"Cache-Control": "max-age=60", "ETag": '"v1"'})
+    session.get(f"{page_server.url}/page")
+    page_server.pages["/page"] = (b"new", {"Cache-Control": "max-age=60", "ETag": '"v2"'})
+    clock[0] += 61
+
+    assert session.get(f"{page_server.url}/page").content == b"new"
+    assert session.get(f"{page_server.url}/page").content == b"new"
+    assert cache.stats()["changed"] == 1
+
+
+@pytest.mark.parametrize("headers", [{"Cache-Control": "no-store"}, {"Cache-Control": "max-age=60", "Vary": "*"}])
+def test_uncacheable_responses_are_not_stored(session, cache, page_server, headers):
+    page_server.pages["/page"] = (b"hello", headers)
+    session.get(f"{page_server.url}/page")
+    session.get(f"{page_server.url}/page")
+    assert len(page_server.requests) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_errors_are_not_stored(session, cache, page_server):
+    session.get(f"{page_server.url}/missing")
+    assert cache.stats()["entries"] == 0
+
+
+def test_streamed_responses_are_stored_once_read(session, cache, page_server):
+    page_server.pages["/page"] = (b"x" * 100_000, {"Cache-Control": "max-age=60"})
+    with session.get(f"{page_server.url}/page", stream=True) as response:
+        assert sum(len(chunk) for chunk in response.iter_content(8192)) == 100_000
+    assert cache.stats()["entries"] == 1
+    assert session.get(f"{page_server.url}/page").from_cache
+
+
+def test_force_fresh_ignores_expiry(tmp_path, page_server, clock):
+    cache = HTTPCache(str(tmp_path / "http_cache.sqlite3"), force_fresh_seconds=3600)
+    session = install(requests.Session(), cache)
+    page_server.pages["/page"] = (b"hello", {"Cache-Control": "no-cache"})
+    session.get(f"{page_server.url}/page")
+    clock[0] += 600
+    assert session.get(f"{page_server.url}/page").from_cache
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, page_server, clock):
+    cache = HTTPCache(str(tmp_path / "http_cache.sqlite3"), max_bytes=250)
+    session = install(requests.Session(), cache)
+    for name in ("a", "b", "c"):
+        page_server.pages[f"/{name}"] = (name.encode() * 100, {"Cache-Control": "max-age=60"})
+        session.get(f"{page_server.url}/{name}")
+        clock[0] += 1
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_unwritable_path_disables_the_cache(monkeypatch):
+    monkeypatch.setenv("HTTP_CACHE_ENABLED", "true")
+    monkeypatch.setenv("HTTP_CACHE_PATH", "/proc/http_cache/http_cache.sqlite3")
+    assert http_cache.create_http_cache() is None
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+
+from api import jobs
+from api.jobs import COMPLETED, FAILED, QUEUED, RUNNING, JobManager, JobStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def test_claim_is_atomic_across_stores(path):
+    first, second = JobStore(path), JobStore(path)
+    job = first.create("question")
+
+    assert first.claim(job["id"])
+    assert not second.claim(job["id"])
+    assert first.get(job["id"])["owner"] == first.owner
+
+
+def test_running_jobs_of_a_live_owner_are_not_requeued(path):
+    running, starting = JobStore(path), JobStore(path)
+    job = running.create("question")
+    running.claim(job["id"])
+
+    assert starting.requeue_unfinished(stale_seconds=60) == []
+    assert starting.get(job["id"])["status"] == RUNNING
+
+
+def test_running_jobs_of_a_stopped_owner_are_requeued(path):
+    stopped, starting = JobStore(path), JobStore(path)
+    job = stopped.create("question")
+    stopped.claim(job["id"])
+    stopped._conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 600,))
+
+    assert starting.requeue_unfinished(stale_seconds=60) == [job["id"]]
+    assert starting.get(job["id"])["status"] == QUEUED
+    assert starting.claim(job["id"])
+
+
+def test_heartbeat_keeps_jobs_alive(path):
+    store = JobStore(path)
+    job = store.create("question")
+    store.claim(job["id"])
+    store._conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 600,))
+
+    assert store.heartbeat() == 1
+    assert store.requeue_stale(stale_seconds=60) == []
+
+
+def test_only_the_owner_finishes_a_job(path):
+    stalled, other = JobStore(path), JobStore(path)
+    job = stalled.create("question")
+    stalled.claim(job["id"])
+    stalled._conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 600,))
+    other.requeue_stale(stale_seconds=60)
+    other.claim(job["id"])
+
+    stalled.complete(job["id"], {"answer": "stale"})
+    other.complete(job["id"], {"answer": "fresh"})
+    assert other.get(job["id"])["result"] == {"answer": "fresh"}
+
+
+def test_purge_expired_keeps_recent_jobs(path):
+    store = JobStore(path)
+    old, recent = store.create("old"), store.create("recent")
+    for job in (old, recent):
+        store.claim(job["id"])
+        store.complete(job["id"], "done")
+    store._conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (time.time() - 7200, old["id"]))
+
+    assert store.purge_expired(3600) == 1
+    assert store.get(old["id"]) is None
+    assert store.get(recent["id"])["status"] == COMPLETED
+
+
+def test_old_databases_are_migrated(path):
+    import sqlite3
+
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, question TEXT NOT NULL, result TEXT, "
+        "error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+    )
+    connection.execute("INSERT INTO jobs (id, status, question, created_at) VALUES ('a', 'queued', 'q', 0)")
+    connection.commit()
+    connection.close()
+
+    store = JobStore(path)
+    assert store.requeue_unfinished(stale_seconds=60) == ["a"]
+    assert store.claim("a")
+
+
+def run_jobs(manager, questions):
+    async def run():
+        await manager.start()
+        try:
+            submitted = [manager.submit(question) for question in questions]
+            await manager._queue.join()
+            return [manager.store.get(job["id"]) for job in submitted]
+        finally:
+            await manager.stop()
+
+    return asyncio.run(run())
+
+
+def test_manager_records_results_and_errors(path):
+    async def analyze(question):
+        if question == "raise":
+            raise ValueError("boom")
+        if question == "error":
+            return {"error": "no data"}
+        return {"answer": question}
+
+    done, raised, errored = run_jobs(JobManager(analyze, JobStore(path)), ["ok", "raise", "error"])
+    assert (done["status"], done["result"]) == (COMPLETED, {"answer": "ok"})
+    assert (raised["status"], raised["error"]) == (FAILED, "boom")
+    assert (errored["status"], errored["error"]) == (FAILED, "no data")
+
+
+def test_two_managers_run_each_job_once(path):
+    calls = []
+
+    async def analyze(question):
+        calls.append(question)
+        await asyncio.sleep(0.01)
+        return question
+
+    first, second = JobManager(analyze, JobStore(path)), JobManager(analyze, JobStore(path))
+
+    async def run():
+        await first.start()
+        await second.start()
+        try:
+            submitted = [first.submit(f"q{number}") for number in range(5)]
+            # The second manager also sees the queued jobs, as after a restart of another process
+            for job in submitted:
+                second._queue.put_nowait(job["id"])
+            await first._queue.join()
+            await second._queue.join()
+        finally:
+            await first.stop()
+            await second.stop()
+
+    asyncio.run(run())
+    assert sorted(calls) == [f"q{number}" for number in range(5)]
+
+
+def test_default_path_is_in_the_temp_directory(monkeypatch, tmp_path):
+    monkeypatch.delenv("JOB_DB_PATH", raising=False)
+    monkeypatch.setattr(jobs.tempfile, "gettempdir", lambda: str(tmp_path))
+    manager = jobs.create_job_manager(None)
+    assert manager.store.path == str(tmp_path / "data_analyst_agent" / "jobs.sqlite3")
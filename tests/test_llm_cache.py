@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from langchain_core.outputs import Generation
+
+from agent import llm_cache
+from agent.llm_cache import TieredLLMCache
+
+LLM = "deployment=d temperature=0.1"
+
+
+def prompt(text, message_id="run-1"):
+    return json.dumps([{"kwargs": {"content": text, "id": message_id}}])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_memory_and_disk_hits(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = TieredLLMCache(path)
+    cache.update(prompt("q"), LLM, [Generation(text="a")])
+
+    assert cache.lookup(prompt("q"), LLM)[0].text == "a"
+    assert TieredLLMCache(path).lookup(prompt("q"), LLM)[0].text == "a"
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_message_ids_do_not_change_the_key(tmp_path):
+    cache = TieredLLMCache(str(tmp_path / "llm_cache.sqlite3"))
+    cache.update(prompt("q", "run-1"), LLM, [Generation(text="a")])
+    assert cache.lookup(prompt("q", "run-2"), LLM)[0].text == "a"
+    assert cache.lookup(prompt("q"), "deployment=other") is None
+
+
+def test_memory_entries_expire_with_the_ttl(tmp_path, clock):
+    cache = TieredLLMCache(str(tmp_path / "llm_cache.sqlite3"), ttl_seconds=60)
+    cache.update(prompt("q"), LLM, [Generation(text="a")])
+    clock[0] += 30
+    assert cache.lookup(prompt("q"), LLM) is not None
+
+    clock[0] += 31
+    assert cache.lookup(prompt("q"), LLM) is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_disk_hits_keep_their_original_expiry(tmp_path, clock):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    TieredLLMCache(path, ttl_seconds=60).update(prompt("q"), LLM, [Generation(text="a")])
+    cache = TieredLLMCache(path, ttl_seconds=60)
+    clock[0] += 50
+    assert cache.lookup(prompt("q"), LLM) is not None
+
+    clock[0] += 20
+    assert cache.lookup(prompt("q"), LLM) is None
+
+
+def test_unwritable_path_disables_the_cache(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setenv("LLM_CACHE_PATH", "/proc/llm_cache/llm_cache.sqlite3")
+    assert llm_cache.create_llm_cache() is None
+
+
+def test_default_path_is_in_the_temp_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    monkeypatch.setattr(llm_cache.tempfile, "gettempdir", lambda: str(tmp_path))
+    assert llm_cache.create_llm_cache().path == str(tmp_path / "data_analyst_agent" / "llm_cache.sqlite3")
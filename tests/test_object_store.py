@@ -0,0 +1,118 @@
+import io
+from urllib.parse import unquote, urlsplit
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from agent.tools import object_store
+from agent.tools.object_store import ObjectCache, ObjectStore
+
+
+class FakeResponse:
+    def __init__(self, content: bytes, status_code: int = 200, headers: dict = None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+
+class FakeS3:
+    """requests.Session stand-in serving one bucket of an S3-compatible endpoint"""
+
+    def __init__(self):
+        self.objects = {}
+        self.listings = 0
+
+    def put(self, key: str, table: pa.Table):
+        sink = io.BytesIO()
+        pq.write_table(table, sink)
+        self.objects[key] = sink.getvalue()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        path = unquote(urlsplit(url).path).lstrip("/")
+        bucket, _, key = path.partition("/")
+        if params and params.get("list-type") == "2":
+            self.listings += 1
+            contents = "".join(
+                f"<Contents><Key>{name}</Key><Size>{len(data)}</Size><ETag>\"{hash(data)}\"</ETag></Contents>"
+                for name, data in sorted(self.objects.items()) if name.startswith(params["prefix"])
+            )
+            return FakeResponse(f"<ListBucketResult>{contents}<IsTruncated>false</IsTruncated></ListBucketResult>".encode())
+        data = self.objects[key]
+        start, end = headers["Range"].removeprefix("bytes=").split("-")
+        return FakeResponse(data[int(start):int(end) + 1], 206, {"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(object_store.time, "time", lambda: now[0])
+    return now
+
+
+def store(s3, tmp_path, **kwargs):
+    cache = ObjectCache(str(tmp_path / "object_cache.sqlite3"), **kwargs)
+    return ObjectStore(cache, block_size=1024, s3_endpoint="http://s3.test", session=s3)
+
+
+def test_listing_is_reused_within_the_ttl(s3, tmp_path, clock):
+    s3.put("data/year=2020/part.parquet", pa.table({"a": [1]}))
+    objects = store(s3, tmp_path)
+    objects.resolve("s3://bucket/data/*/*.parquet")
+
+    s3.put("data/year=2021/part.parquet", pa.table({"a": [2]}))
+    clock[0] += 30
+    assert len(objects.resolve("s3://bucket/data/*/*.parquet")) == 1
+
+    clock[0] += 31
+    assert len(objects.resolve("s3://bucket/data/*/*.parquet")) == 2
+    assert s3.listings == 2
+
+
+def test_default_listing_ttl_is_short(s3, tmp_path):
+    assert store(s3, tmp_path).cache.listing_ttl <= 60
+
+
+def test_glob_matches_within_a_segment(s3, tmp_path):
+    for key in ("data/year=2020/part.parquet", "data/year=2020/part.csv", "data/year=2020/nested/part.parquet"):
+        s3.put(key, pa.table({"a": [1]}))
+    paths = [info.path for info in store(s3, tmp_path).resolve("s3://bucket/data/*/*.parquet")]
+    assert paths == ["bucket/data/year=2020/part.parquet"]
+
+
+def test_rewrite_reads_hive_partitions_unless_disabled(s3, tmp_path):
+    s3.put("data/year=2020/part.parquet", pa.table({"a": [1]}))
+    s3.put("data/year=2021/part.parquet", pa.table({"a": [2]}))
+    objects = store(s3, tmp_path)
+
+    sql, tables = objects.rewrite("SELECT * FROM read_parquet('s3://bucket/data/*/*.parquet')")
+    assert sql == "SELECT * FROM remote_parquet_1"
+    assert sorted(tables["remote_parquet_1"].to_table().column("year").to_pylist()) == [2020, 2021]
+
+    _, tables = objects.rewrite("SELECT * FROM read_parquet('s3://bucket/data/*/*.parquet', hive_partitioning=false)")
+    assert tables["remote_parquet_1"].schema.names == ["a"]
+
+
+def test_blocks_are_cached(s3, tmp_path):
+    s3.put("data/part.parquet", pa.table({"a": list(range(1000))}))
+    objects = store(s3, tmp_path)
+    info = objects.resolve("s3://bucket/data/part.parquet")[0]
+
+    first = objects.read(info, 0, info.size)
+    requests = objects.requests
+    assert objects.read(info, 100, 2000) == first[100:2000]
+    assert objects.requests == requests
+
+
+def test_unwritable_path_disables_the_store(monkeypatch):
+    monkeypatch.setenv("OBJECT_CACHE_PATH", "/proc/object_cache/object_cache.sqlite3")
+    assert object_store.create_object_store() is None
@@ -0,0 +1,161 @@
+import json
+
+import pandas as pd
+import pytest
+
+from agent.tools import sql_cache
+from agent.tools.data_tools import DataTools
+from agent.tools.duckdb_engine import DuckDBEngine
+from agent.tools.sql_cache import SQLResultCache, _write_frame, is_cacheable, normalize_sql, table_sources
+
+
+@pytest.fixture
+def engine():
+    engine = DuckDBEngine(object_store=False, timeout=0)
+    yield engine
+    engine.close()
+
+
+@pytest.fixture
+def tools(engine, tmp_path):
+    tools = DataTools()
+    tools.engine = engine
+    tools.sql_cache = SQLResultCache(str(tmp_path / "sql_cache.sqlite3"))
+    return tools
+
+
+def sources(engine, sql):
+    return table_sources(engine.parse(normalize_sql(sql)))
+
+
+def query(tools, sql):
+    result = json.loads(tools.query_duckdb(sql))
+    assert "error" not in result, result
+    return result["preview"]
+
+
+def test_normalize_sql_folds_case_and_whitespace_outside_strings():
+    assert normalize_sql("SELECT  a\n FROM T -- note\nWHERE b = 'X  Y' ;") == "select a from t where b='X  Y'"
+    assert normalize_sql("select a from t where b = 'X Y'") != normalize_sql("select a from t where b = 'X  Y'")
+
+
+@pytest.mark.parametrize("sql", [
+    "INSERT INTO t VALUES (1)",
+    "SELECT 1; SELECT 2",
+    "SELECT random()",
+    "SELECT now()",
+])
+def test_is_cacheable_rejects_writes_and_volatile_queries(sql):
+    assert not is_cacheable(normalize_sql(sql))
+
+
+def test_comparison_strings_are_not_sources(engine):
+    assert sources(engine, "SELECT * FROM ds_1 WHERE src = 'https://example.invalid/x'") == ["ds_1"]
+
+
+def test_sources_of_replacement_scans_and_readers(engine):
+    sql = ("SELECT * FROM \"/tmp/a.csv\" JOIN read_parquet(['b.parquet', 'c.parquet']) USING (k) "
+           "WHERE k IN (SELECT k FROM read_json('d'))")
+    assert sorted(sources(engine, sql)) == ["/tmp/a.csv", "b.parquet", "c.parquet", "d"]
+
+
+def test_ctes_are_not_sources(engine):
+    assert sources(engine, "WITH x AS (SELECT * FROM ds_1) SELECT * FROM x") == ["ds_1"]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM glob('*.csv')",
+    "SELECT * FROM read_csv(concat('a', '.csv'))",
+    "SELECT * FROM (",
+])
+def test_unnamed_sources_are_not_versioned(engine, sql):
+    assert sources(engine, sql) is None
+
+
+def test_comparison_with_unreachable_url_runs(tools):
+    from agent.datasets import current_registry
+
+    handle = current_registry().add(pd.DataFrame({"src": ["https://example.invalid/x", "other"]}))
+    assert query(tools, f"SELECT count(*) AS n FROM {handle} WHERE src = 'https://example.invalid/x'") == [{"n": 1}]
+
+
+@pytest.mark.parametrize("name, source", [
+    ("data.csv", '"{path}"'),
+    ("data", "read_csv('{path}')"),
+    ("data.txt", "read_csv_auto('{path}')"),
+])
+def test_changed_file_updates_result(tools, tmp_path, name, source):
+    path = tmp_path / name
+    path.write_text("a\n1\n2\n")
+    sql = f"SELECT sum(a) AS total FROM {source.format(path=path)}"
+
+    assert query(tools, sql) == [{"total": 3}]
+    assert query(tools, sql) == [{"total": 3}]
+    assert tools.sql_cache.stats()["memory_hits"] == 1
+
+    path.write_text("a\n1\n2\n100\n")
+    assert query(tools, sql) == [{"total": 103}]
+
+
+def test_same_handle_in_a_new_run_updates_result(tools):
+    from agent.datasets import current_registry, end_run, start_run
+
+    totals = []
+    for values in ([1, 2], [1, 2, 100]):
+        token = start_run()
+        try:
+            handle = current_registry().add(pd.DataFrame({"a": values}))
+            totals.append(query(tools, f"SELECT sum(a) AS total FROM {handle}"))
+        finally:
+            end_run(token)
+    assert totals == [[{"total": 3}], [{"total": 103}]]
+
+
+def test_versioning_errors_run_the_query_uncached(tools, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("unreachable")
+
+    monkeypatch.setattr(sql_cache, "source_versions", fail)
+    assert query(tools, "SELECT 42 AS answer") == [{"answer": 42}]
+    assert tools.sql_cache.stats()["writes"] == 0
+
+
+def test_unknown_table_is_not_cached(tools):
+    result = json.loads(tools.query_duckdb("SELECT * FROM missing_table"))
+    assert "error" in result
+    assert tools.sql_cache.stats()["writes"] == 0
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "sql_cache.sqlite3")
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    SQLResultCache(path).store("key", "select 1", ["src"], frame, False)
+
+    cached, truncated = SQLResultCache(path).lookup("key")
+    pd.testing.assert_frame_equal(cached, frame)
+    assert not truncated
+
+
+def test_invalidate_by_source_prefix(tmp_path):
+    cache = SQLResultCache(str(tmp_path / "sql_cache.sqlite3"))
+    frame = pd.DataFrame({"a": [1]})
+    cache.store("one", "q1", ["/data/a.csv"], frame, False)
+    cache.store("two", "q2", ["/other/b.csv"], frame, False)
+
+    assert cache.invalidate("/data/") == 1
+    assert cache.lookup("one") is None
+    assert cache.lookup("two") is not None
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    frame = pd.DataFrame({"a": range(50)})
+    size = len(_write_frame(frame))
+    cache = SQLResultCache(str(tmp_path / "sql_cache.sqlite3"), max_bytes=4 * size + size // 2)
+    for key in ("one", "two", "three", "four", "five"):
+        cache.store(key, key, [], frame, False)
+    cache.lookup("one")
+    cache.store("six", "six", [], frame, False)
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 4
+    assert stats["evictions"] == 2
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from agent.tools.type_inference import infer_column, infer_types, parse_numeric
+
+
+@pytest.fixture(params=["object", "string[pyarrow]"])
+def dtype(request):
+    return request.param
+
+
+def column(values, dtype, name="value"):
+    return pd.Series(values, dtype=dtype, name=name)
+
+
+def test_formatted_numbers(dtype):
+    values = parse_numeric(column(["$2,923,706,026", "1,234[a]", "−5", "$1.5 bn", "—"], dtype))
+    assert values.tolist()[:4] == [2923706026, 1234, -5, 1500000000]
+    assert pd.isna(values.iloc[4])
+
+
+def test_parse_numeric_keeps_the_column_name(dtype):
+    assert parse_numeric(column(["1", "2"], dtype, name="gross")).name == "gross"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$1.5m", 1_500_000),
+    ("$2k", 2_000),
+    ("3 million", 3_000_000),
+])
+def test_magnitudes(dtype, text, expected):
+    assert parse_numeric(column([text], dtype)).iloc[0] == expected
+
+
+@pytest.mark.parametrize("text", ["8,848 m", "273 K", "5km"])
+def test_single_letter_units_are_not_magnitudes(dtype, text):
+    value = parse_numeric(column([text], dtype)).iloc[0]
+    assert pd.isna(value) or value < 10_000
+
+
+def test_leading_zeros_stay_text(dtype):
+    zip_codes = column(["02134", "10001", "00501"], dtype, name="zip")
+    assert parse_numeric(zip_codes).tolist() == ["02134", "10001", "00501"]
+
+    result, report = infer_column(zip_codes)
+    assert result.tolist() == ["02134", "10001", "00501"]
+    assert report["kind"] == "identifier"
+
+
+def test_plain_integers_are_still_numbers(dtype):
+    result, report = infer_column(column(["0", "10", "250"], dtype))
+    assert result.tolist() == [0, 10, 250]
+    assert report["kind"] == "integer"
+
+
+def test_rank_codes_keep_their_number_unless_most_values_are_coded(dtype):
+    ranks, report = infer_column(column(["1", "T2", "3", "4", "5"], dtype))
+    assert ranks.tolist() == [1, 2, 3, 4, 5]
+    assert report["codes_stripped"] == 1
+
+    codes, report = infer_column(column(["A4", "Q7", "B2"], dtype))
+    assert report["kind"] == "text"
+
+
+def test_dates(dtype):
+    result, report = infer_column(column(["December 18, 2009", "May 1, 2015 (United States)"], dtype))
+    assert report["kind"] == "date"
+    assert result.dt.year.tolist() == [2009, 2015]
+
+
+def test_infer_types_keeps_repeated_column_names():
+    df = pd.DataFrame([["1", "x"], ["2", "y"]], columns=["a", "a"])
+    result, reports = infer_types(df)
+    assert list(result.columns) == ["a", "a"]
+    assert [report["kind"] for report in reports] == ["integer", "text"]
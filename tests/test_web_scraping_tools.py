@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from agent.tools.table_catalog import end_catalog, start_catalog
+
+PAGE = b"""<html><body>
+<p>Intro</p>
+<table><tr><th>Key</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr><tr><td>b</td><td>2</td></tr></table>
+<table class="wikitable"><caption>Films</caption>
+<tr><th>Title</th><th>Worldwide gross</th></tr>
+<tr><td>Avatar</td><td>$2,923,706,026</td></tr>
+<tr><td>Titanic</td><td>$2,264,743,305[a]</td></tr>
+</table>
+</body></html>"""
+
+
+@pytest.fixture
+def tools(monkeypatch, page_server):
+    monkeypatch.setenv("HTTP_CACHE_ENABLED", "false")
+    monkeypatch.delenv("SCRAPE_HTTP_MODE", raising=False)
+    from agent.tools.web_scraping_tools import WebScrapingTools
+
+    page_server.pages["/films"] = (PAGE, {"Content-Type": "text/html"})
+    token = start_catalog()
+    yield WebScrapingTools()
+    end_catalog(token)
+
+
+def test_list_tables_reads_the_whole_page(tools, page_server):
+    result = json.loads(tools.list_tables(f"{page_server.url}/films"))
+    assert len(result["tables"]) == 2
+
+
+def test_alist_tables_reads_the_whole_page(tools, page_server):
+    async def run():
+        try:
+            return json.loads(await tools.alist_tables(f"{page_server.url}/films"))
+        finally:
+            await tools.async_client.aclose()
+
+    assert len(asyncio.run(run())["tables"]) == 2
+
+
+def test_tables_of_a_listed_page_come_from_the_catalog(tools, page_server):
+    url = f"{page_server.url}/films"
+    tools.list_tables(url)
+    result = json.loads(tools.scrape_wikipedia(url))
+
+    assert result["row_count"] == 2
+    assert result["columns"][1]["dtype"] == "Int64"
+    assert len(page_server.requests) == 1